@@ -0,0 +1,24 @@
+"""Downloads the full candle history of a market into the candle archive"""
+
+import argparse, sys
+
+# archive arguments, the remaining arguments configure the bot
+parser = argparse.ArgumentParser(description='Python Crypto Bot candle history import')
+parser.add_argument('--start', type=str, default='2017-01-01T00:00:00', help='ISO 8601 date of the first candle')
+parser.add_argument('--archive', type=str, default='archive', help='candle archive directory')
+args, sys.argv[1:] = parser.parse_known_args()
+
+from models.CandleArchive import CandleArchive
+from models.PyCryptoBot import PyCryptoBot
+from models.RequestScheduler import request_scheduler
+
+if __name__ == '__main__':
+    app = PyCryptoBot()
+    request_scheduler.setShare(app.getRateLimitShare())
+    archive = CandleArchive(args.archive)
+
+    print ('Importing', app.getMarket(), str(app.getGranularity()), 'from', args.start)
+
+    imported = app.importCandleHistory(archive, app.getMarket(), app.getGranularity(), args.start)
+
+    print ('Imported', imported, 'candles,', archive.getLength(app.getExchange(), app.getMarket(), app.getGranularity()), 'archived')
@@ -0,0 +1,314 @@
+"""Backtests the trading strategy on historical market data"""
+
+import math, os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from models.CandleFrame import CandleFrame
+from models.Strategy import Strategy
+from models.Trading import TechnicalAnalysis
+
+# backtest function and arguments of a worker process, shared by the items it runs
+worker_function = None
+worker_args = ()
+
+def initWorker(function, args):
+    """Receives the backtest function and its arguments once per worker process"""
+
+    global worker_function, worker_args
+    worker_function = function
+    worker_args = args
+
+def runWorker(item):
+    """Backtests an item in a worker process"""
+
+    return worker_function(item, *worker_args)
+
+def runBacktests(function, items, args=(), workers=None):
+    """Returns the summary of function(item, *args) for each item, run by worker processes
+
+    Parameters
+    ----------
+    function : function
+        Module level function backtesting an item and returning its summary
+    items : list
+        Items backtested, E.g. strategy settings or windows of the history
+    args : tuple
+        Arguments sent to each worker process once
+    workers : int, optional
+        Number of worker processes, 1 runs the backtests in this process
+    """
+
+    if workers == 1:
+        initWorker(function, args)
+        return [ runWorker(item) for item in items ]
+
+    if workers == None:
+        workers = os.cpu_count() or 1
+
+    # a few chunks per worker balance the load with little messaging
+    chunksize = max(1, len(items) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(function, args)) as executor:
+        return list(executor.map(runWorker, items, chunksize=chunksize))
+
+def getRunSettings(defaults, settings=None):
+    """Returns the default strategy settings overridden by settings
+
+    Parameters
+    ----------
+    defaults : dict
+        Strategy settings, see Backtest.getSettings()
+    settings : dict, optional
+        Strategy settings overriding the defaults, E.g. { 'sellupperpcnt': 5 }
+    """
+
+    run_settings = dict(defaults)
+    if settings != None:
+        for key in settings:
+            if not key in run_settings:
+                raise KeyError("Unknown strategy setting '" + str(key) + "'")
+        run_settings.update(settings)
+
+    return run_settings
+
+class Backtest():
+    def __init__(self, app, trading_data=pd.DataFrame()):
+        """Backtest object model
+
+        The indicators the strategy reads are calculated once over the full
+        history and the strategy then walks the precomputed rows, which makes
+        a backtest linear in the number of candles.
+
+        Parameters
+        ----------
+        app : object
+            PyCryptoBot object
+        trading_data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        """
+
+        if not isinstance(trading_data, pd.DataFrame):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        if len(trading_data) == 0:
+            raise ValueError('Trading data is empty.')
+
+        self.app = app
+        self.settings = Strategy(app).getSettings()
+
+        # indicators already in the trading data, E.g. of another backtest, are not calculated again
+        self.technical_analysis = TechnicalAnalysis(trading_data[[ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]].copy())
+        self.technical_analysis.df = trading_data.copy()
+        self.technical_analysis.require('ema12gtema26co', 'ema12ltema26co', 'macdgtsignal', 'macdltsignal', 'goldencross', 'obv_pc', 'eri_buy')
+        self.df = self.technical_analysis.getDataFrame()
+
+        self.trades = pd.DataFrame()
+        self.summary = {}
+
+    def __getstate__(self):
+        """Pickles the backtest without the app, E.g. to share it with worker processes"""
+
+        return { 'settings': self.settings, 'frame': CandleFrame(self.df) }
+
+    def __setstate__(self, state):
+        """Restores a pickled backtest, without recalculating the technical analysis"""
+
+        self.__init__(None, state['frame'].getDataFrame())
+        self.settings = state['settings']
+
+    def getDataFrame(self):
+        """Returns the Pandas DataFrame including the technical analysis"""
+
+        return self.df
+
+    def getTechnicalAnalysis(self):
+        """Returns the TechnicalAnalysis object"""
+
+        return self.technical_analysis
+
+    def getTrades(self):
+        """Returns the buy and sell actions of the last run"""
+
+        return self.trades
+
+    def getSummary(self):
+        """Returns the summary of the last run"""
+
+        return self.summary
+
+    def getSettings(self):
+        """Returns the strategy settings used when a run does not override them"""
+
+        return dict(self.settings)
+
+    def run(self, settings=None):
+        """Runs the strategy over the precomputed technical analysis
+
+        The buy, sell and wait decisions are those of executeJob in
+        pycryptobot.py, see Strategy. Smart switching between granularities is
+        not simulated as it requires live higher timeframe data.
+
+        Parameters
+        ----------
+        settings : dict, optional
+            Strategy settings overriding getSettings(), E.g. { 'sellupperpcnt': 5 }
+        """
+
+        run_settings = getRunSettings(self.settings, settings)
+        strategy = Strategy(None, run_settings)
+
+        # the criteria of every candle, calculated at once
+        signals = strategy.getSignals(self.df)
+        close = signals['close']
+        buy = signals['buy']
+        sell = signals['sell']
+        reversal = signals['reversal']
+        buy_positions = np.flatnonzero(buy)
+
+        if np.any(close < 0.0001):
+            raise Exception(run_settings['market'] + ' is unsuitable for trading, quote price is less than 0.0001!')
+
+        update_fib_bands = run_settings['verbose'] == 0
+
+        last_action = ''
+        last_buy = 0
+        fib_high = 0
+        fib_low = 0
+        buy_count = 0
+        sell_count = 0
+        buy_sum = 0
+        sell_sum = 0
+        win_count = 0
+        trades = []
+
+        # equity marked to market, for the drawdown
+        equity = 1.0
+        peak_equity = 1.0
+        max_drawdown = 0.0
+
+        i = 0
+        while i < len(close):
+            if last_action != 'BUY':
+                # without a position only a buy signal is an action, skip to the next
+                next_buy = np.searchsorted(buy_positions, i)
+                if next_buy == len(buy_positions):
+                    break
+                i = int(buy_positions[next_buy])
+
+            price = float(close[i])
+
+            if last_action == 'BUY':
+                equity = equity * (price / float(close[i - 1]))
+
+            action, triggers = strategy.getAction(buy[i], sell[i], reversal[i], price, last_action, last_buy, fib_low, fib_high)
+
+            if action == 'BUY':
+                last_buy = price
+                buy_count = buy_count + 1
+                buy_sum = buy_sum + (price + (price * 0.005))
+
+                if update_fib_bands:
+                    fib_low, fib_high = self.__getFibonacciBands(price, fib_low, fib_high)
+
+                equity = equity / 1.005
+                trades.append([ self.df.index[i], 'BUY', price, last_buy, np.nan ])
+
+            elif action == 'SELL':
+                sell_count = sell_count + 1
+                sell_sum = sell_sum + (price - (price * 0.005))
+
+                last_buy_minus_fees = last_buy + (last_buy * 0.005)
+                margin = ((price - last_buy_minus_fees) / price) * 100
+                if margin > 0:
+                    win_count = win_count + 1
+
+                equity = equity * 0.995
+                trades.append([ self.df.index[i], 'SELL', price, last_buy, margin ])
+
+            # last significant action
+            if action in [ 'BUY', 'SELL' ]:
+                last_action = action
+
+            peak_equity = max(peak_equity, equity)
+            max_drawdown = max(max_drawdown, ((peak_equity - equity) / peak_equity) * 100)
+
+            i = i + 1
+
+        if buy_count > sell_count:
+            # close the open position at the last price
+            price = float(close[-1])
+            sell_sum = sell_sum + (price - (price * 0.005))
+            sell_count = sell_count + 1
+
+            if ((price - (last_buy + (last_buy * 0.005))) / price) * 100 > 0:
+                win_count = win_count + 1
+
+            equity = equity * 0.995
+            max_drawdown = max(max_drawdown, ((peak_equity - equity) / peak_equity) * 100)
+
+        win_rate = 0.0
+        if sell_count > 0:
+            win_rate = (win_count / sell_count) * 100
+
+        margin = 0.0
+        if sell_count > 0:
+            margin = ((sell_sum - buy_sum) / sell_sum) * 100
+
+        self.trades = pd.DataFrame(trades, columns=[ 'ts', 'action', 'price', 'last_buy', 'margin' ])
+        self.trades.set_index('ts', inplace=True)
+
+        self.summary = {
+            'buy_count': buy_count,
+            'sell_count': sell_count,
+            'buy_sum': buy_sum,
+            'sell_sum': sell_sum,
+            'margin': margin,
+            'win_count': win_count,
+            'win_rate': win_rate,
+            'max_drawdown': max_drawdown,
+            'last_action': last_action
+        }
+
+        return self.trades
+
+    def printSummary(self):
+        """Prints the summary of the last run"""
+
+        if len(self.summary) == 0:
+            return
+
+        print ("\nSimulation Summary\n")
+        print ('   Buy Count :', self.summary['buy_count'])
+        print ('  Sell Count :', self.summary['sell_count'], "\n")
+
+        if self.summary['sell_count'] > 0:
+            print ('      Margin :', str(self.__truncate(self.summary['margin'], 2)) + '%', "\n")
+            print ('  ** non-live simulation, assuming highest fees', "\n")
+
+    def __getFibonacciBands(self, price, fib_low, fib_high):
+        """Fibonacci bands either side of the price (private function)"""
+
+        bands = self.technical_analysis.getFibonacciRetracementLevels(price)
+
+        if len(bands) == 1:
+            first_key = list(bands.keys())[0]
+            if first_key == 'ratio1':
+                fib_low = 0
+                fib_high = bands[first_key]
+            if first_key == 'ratio1_618':
+                fib_low = bands[first_key]
+                fib_high = bands[first_key] * 2
+            else:
+                fib_low = bands[first_key]
+
+        elif len(bands) == 2:
+            first_key = list(bands.keys())[0]
+            second_key = list(bands.keys())[1]
+            fib_low = bands[first_key]
+            fib_high = bands[second_key]
+
+        return fib_low, fib_high
+
+    def __truncate(self, f, n):
+        return math.floor(f * 10 ** n) / 10 ** n
@@ -1,9 +1,51 @@
 import sys
-import math, re
+import aiohttp, math, re
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
+from binance import AsyncClient
 from binance.client import Client
+from models.ExchangeMetadata import exchange_metadata, getPrecision, truncateAmount
+from models.RequestScheduler import RateLimitedAdapter, getTraceConfig
+
+def createClient(api_key=None, api_secret=None, requests_params=None):
+    """Returns a client of the Binance API, without pinging the server as it is constructed"""
+
+    try:
+        client = Client(api_key, api_secret, requests_params, ping=False)
+    except TypeError:
+        # python-binance before the ping option always pings
+        client = Client(api_key, api_secret, requests_params)
+
+    # every request waits for the rate limits of the exchange
+    client.session.mount('https://', RateLimitedAdapter('binance'))
+
+    return client
+
+def getExchangeInfoMarkets(resp):
+    """Returns the markets of the Binance exchange info"""
+
+    markets = {}
+    for symbol in resp['symbols']:
+        filters = { f['filterType']: f for f in symbol['filters'] }
+        step_size = float(filters['LOT_SIZE']['stepSize']) if 'LOT_SIZE' in filters else 10.0 ** -int(symbol['baseAssetPrecision'])
+        tick_size = float(filters['PRICE_FILTER']['tickSize']) if 'PRICE_FILTER' in filters else 10.0 ** -int(symbol['quoteAssetPrecision'])
+        notional = filters.get('MIN_NOTIONAL', filters.get('NOTIONAL', {}))
+
+        markets[symbol['symbol']] = {
+            'base': symbol['baseAsset'],
+            'quote': symbol['quoteAsset'],
+            'step_size': step_size,
+            'base_precision': getPrecision(step_size),
+            'tick_size': tick_size,
+            'price_precision': getPrecision(tick_size),
+            'quote_increment': 10.0 ** -int(symbol['quoteAssetPrecision']),
+            'quote_precision': int(symbol['quoteAssetPrecision']),
+            'min_quantity': float(filters['LOT_SIZE']['minQty']) if 'LOT_SIZE' in filters else 0.0,
+            'min_funds': float(notional.get('minNotional', 0))
+        }
+
+    return markets
 
 class AuthAPI():
     def __init__(self, api_key='', api_secret='', api_url='https://api.binance.com'):
@@ -55,7 +97,12 @@ class AuthAPI():
         self.api_url = api_url
         self.api_key = api_key
         self.api_secret = api_secret
-        self.client = Client(self.api_key, self.api_secret, { 'verify': False, 'timeout': 20 })
+        self.client = self.createClient()
+
+    def createClient(self):
+        """Returns a new client of the Binance API"""
+
+        return createClient(self.api_key, self.api_secret, { 'verify': False, 'timeout': 20 })
 
     def getClient(self):
         return self.client
@@ -73,6 +120,16 @@ class AuthAPI():
             raise TypeError('The funding amount is not numeric.')
 
         try:
+            info = exchange_metadata.getMarketInfo('binance', market, self, False)
+
+            if info != None:
+                # remove fees
+                quote_quantity = truncateAmount(quote_quantity * 0.9995, info['quote_increment'])
+
+                # execute market buy of the funding amount, priced by the exchange
+                print ('Order funds after rounding and fees:', quote_quantity)
+                return self.client.order_market_buy(symbol=market, quoteOrderQty=quote_quantity)
+
             current_price = self.getTicker(market)
 
             base_quantity = np.divide(quote_quantity, current_price)
@@ -105,9 +162,14 @@ class AuthAPI():
             raise TypeError('The crypto amount is not numeric.')
 
         try:
-            df_filters = self.getMarketInfoFilters(market)
-            step_size = float(df_filters.loc[df_filters['filterType'] == 'LOT_SIZE']['stepSize'])
-            precision = int(round(-math.log(step_size, 10), 0))
+            info = exchange_metadata.getMarketInfo('binance', market, self, False)
+
+            if info != None:
+                precision = info['base_precision']
+            else:
+                df_filters = self.getMarketInfoFilters(market)
+                step_size = float(df_filters.loc[df_filters['filterType'] == 'LOT_SIZE']['stepSize'])
+                precision = int(round(-math.log(step_size, 10), 0))
 
             # remove fees
             base_quantity = base_quantity * 0.9995
@@ -133,6 +195,11 @@ class AuthAPI():
     def getMarketInfoFilters(self, market):
         return pd.DataFrame(self.client.get_symbol_info(symbol=market)['filters'])
 
+    def getMarkets(self):
+        """Returns every market of the exchange, downloaded in a single request"""
+
+        return getExchangeInfoMarkets(self.client.get_exchange_info())
+
     def getTicker(self, market):
         # validates the market is syntactically correct
         p = re.compile(r"^[A-Z]{6,12}$")
@@ -148,7 +215,7 @@ class AuthAPI():
 
 class PublicAPI():
     def __init__(self):
-        self.client = Client()
+        self.client = createClient()
 
     def __truncate(self, f, n):
         return math.floor(f * 10 ** n) / 10 ** n
@@ -156,7 +223,24 @@ class PublicAPI():
     def getClient(self):
         return self.client
 
+    def getMarkets(self):
+        """Returns every market of the exchange, downloaded in a single request"""
+
+        return getExchangeInfoMarkets(self.client.get_exchange_info())
+
     def getHistoricalData(self, market='BTCGBP', granularity='1h', iso8601start='', iso8601end=''):
+        start, end = self.getKlinesRange(market, granularity, iso8601start, iso8601end)
+        resp = self.client.get_historical_klines(market, granularity, start, end)
+
+        return self.getKlinesDataFrame(resp, market, granularity, iso8601start)
+
+    def getKlinesRange(self, market='BTCGBP', granularity='1h', iso8601start='', iso8601end=''):
+        """Returns the start and end of the klines request, validating the arguments
+
+        From a start date, the request is bounded to the 300 candles that are
+        kept instead of downloading every candle since the start date.
+        """
+
         # validates the market is syntactically correct
         p = re.compile(r"^[A-Z]{6,12}$")
         if not p.match(market):
@@ -178,49 +262,31 @@ class PublicAPI():
         if not isinstance(iso8601end, str):
             raise TypeError('ISO8601 end integer as string required.')
 
-        # if only a start date is provided
-        if iso8601start != '' and iso8601end == '':
-            multiplier = 1
-            if(granularity == '1m'):
-                multiplier = 1
-            elif(granularity == '5m'):
-                multiplier = 5
-            elif(granularity == '15m'):
-                multiplier = 10
-            elif(granularity == '1h'):
-                multiplier = 60
-            elif(granularity == '6h'):
-                multiplier = 360
-            elif(granularity == '1d'):
-                multiplier = 1440
-
-            # calculate the end date using the granularity
-            iso8601end = str((datetime.strptime(iso8601start, '%Y-%m-%dT%H:%M:%S.%f') + timedelta(minutes=granularity * multiplier)).isoformat())
-
-        if iso8601start != '' and iso8601end != '':
-            print ('Attempting to retrieve data from ' + iso8601start)
-            resp = self.client.get_historical_klines(market, granularity, iso8601start)
-
-            if len(resp) > 300:
-                resp = resp[:300]
+        if iso8601start != '':
+            seconds = { '1m': 60, '5m': 300, '15m': 900, '1h': 3600, '6h': 21600, '1d': 86400 }
+            start = int(pd.Timestamp(iso8601start).timestamp()) * 1000
+            return start, start + (299 * seconds[granularity] * 1000)
+        elif granularity == '5m':
+            return '2 days ago UTC', None
+        elif granularity == '15m':
+            return '4 days ago UTC', None
+        elif granularity == '1h':
+            return '13 days ago UTC', None
+        elif granularity == '6h':
+            return '75 days ago UTC', None
+        elif granularity == '1d':
+            return '251 days ago UTC', None
         else:
-            if granularity == '5m':
-                resp = self.client.get_historical_klines(market, granularity, '2 days ago UTC')
-                resp = resp[-300:]
-            elif granularity == '15m':
-                resp = self.client.get_historical_klines(market, granularity, '4 days ago UTC')
-                resp = resp[-300:]
-            elif granularity == '1h':
-                resp = self.client.get_historical_klines(market, granularity, '13 days ago UTC')
-                resp = resp[-300:]
-            elif granularity == '6h':
-                resp = self.client.get_historical_klines(market, granularity, '75 days ago UTC')
-                resp = resp[-300:]
-            elif granularity == '1d':
-                resp = self.client.get_historical_klines(market, granularity, '251 days ago UTC')
-            else:
-                raise Exception('Something went wrong!')
-                   
+            raise Exception('Something went wrong!')
+
+    def getKlinesDataFrame(self, resp, market, granularity, iso8601start=''):
+        """Returns the klines response as trading data"""
+
+        if iso8601start != '':
+            resp = resp[:300]
+        elif granularity != '1d':
+            resp = resp[-300:]
+
         # convert the API response into a Pandas DataFrame
         df = pd.DataFrame(resp, columns=[ 'open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume', 'traker_buy_quote_asset_volume', 'ignore' ])
         df['market'] = market
@@ -284,4 +350,51 @@ class PublicAPI():
         if 'price' in resp:
             return float('{:.8f}'.format(float(resp['price'])))
 
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+class AsyncPublicAPI(PublicAPI):
+    def __init__(self, limit=10):
+        """Binance asyncio public API object model
+
+        Parameters
+        ----------
+        limit : int, optional
+            Maximum number of concurrent connections
+        """
+
+        self.limit = limit
+        self.client = None
+
+    def getClient(self):
+        """Returns the asyncio client, created on first use"""
+
+        if self.client == None:
+            self.client = AsyncClient(session_params={ 'connector': aiohttp.TCPConnector(limit=self.limit), 'timeout': aiohttp.ClientTimeout(total=20), 'trace_configs': [ getTraceConfig('binance') ] })
+
+        return self.client
+
+    async def close(self):
+        """Closes the client and its connections"""
+
+        if self.client != None:
+            await self.client.close_connection()
+            self.client = None
+
+    async def getHistoricalData(self, market='BTCGBP', granularity='1h', iso8601start='', iso8601end=''):
+        start, end = self.getKlinesRange(market, granularity, iso8601start, iso8601end)
+        resp = await self.getClient().get_historical_klines(market, granularity, start, end)
+
+        return self.getKlinesDataFrame(resp, market, granularity, iso8601start)
+
+    async def getTicker(self, market):
+        # validates the market is syntactically correct
+        p = re.compile(r"^[A-Z]{6,12}$")
+        if not p.match(market):
+            raise TypeError('Binance market required.')
+
+        resp = await self.getClient().get_symbol_ticker(symbol=market)
+
+        if 'price' in resp:
+            return float('{:.8f}'.format(float(resp['price'])))
+
+        return 0.0
@@ -0,0 +1,323 @@
+"""Append-only, memory-mapped archive of the full candle history of markets"""
+
+import os, re, time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+def getTradingData(arrays, market, granularity):
+    """Returns the columns of archived candles as trading data"""
+
+    tsidx = pd.DatetimeIndex(np.array(arrays['epoch']).astype('datetime64[s]').astype('datetime64[ns]'), name='ts')
+
+    df = pd.DataFrame({ 'date': tsidx, 'market': market, 'granularity': granularity }, index=tsidx)
+    for column in [ 'low', 'high', 'open', 'close', 'volume' ]:
+        df[column] = np.array(arrays[column])
+
+    return df
+
+class CandleArchive():
+    def __init__(self, directory='archive'):
+        """Candle Archive object model
+
+        Each market and granularity is a directory with a binary file per
+        column: the candle epochs (the sorted timestamp index) as int64 and
+        the prices and volume as float64. Files are only ever appended to and
+        are read through memory maps, so any slice of years of candles is
+        opened as NumPy arrays without loading the archive into memory.
+
+        Parameters
+        ----------
+        directory : str
+            Directory of the archive
+        """
+
+        if not isinstance(directory, str) or directory == '':
+            raise TypeError('Directory required.')
+
+        self.directory = directory
+        self.columns = { 'epoch': 'int64', 'low': 'float64', 'high': 'float64', 'open': 'float64', 'close': 'float64', 'volume': 'float64' }
+
+    def getGranularitySeconds(self, granularity):
+        """Returns the granularity of either exchange in seconds"""
+
+        if isinstance(granularity, int):
+            if not granularity in [ 60, 300, 900, 3600, 21600, 86400 ]:
+                raise ValueError('Granularity options: 60, 300, 900, 3600, 21600, 86400')
+            return granularity
+
+        seconds = { '1m': 60, '5m': 300, '15m': 900, '1h': 3600, '6h': 21600, '1d': 86400 }
+        if not granularity in seconds:
+            raise ValueError('Granularity options: 1m, 5m, 15m, 1h, 6h, 1d')
+
+        return seconds[granularity]
+
+    def getPath(self, exchange, market, granularity):
+        """Returns the directory of the candles of a market and granularity"""
+
+        name = exchange + '-' + market + '-' + str(granularity)
+
+        if not re.match(r'^[A-Za-z0-9-]+$', name):
+            raise ValueError('Invalid archive name: ' + name)
+
+        return os.path.join(self.directory, name)
+
+    def getLength(self, exchange, market, granularity):
+        """Returns the number of archived candles"""
+
+        path = os.path.join(self.getPath(exchange, market, granularity), 'epoch')
+
+        if not os.path.exists(path):
+            return 0
+
+        # an interrupted append is ignored, the epochs are always written last
+        return os.path.getsize(path) // np.dtype('int64').itemsize
+
+    def getLastEpoch(self, exchange, market, granularity):
+        """Returns the epoch of the last archived candle, None if there are none"""
+
+        epochs = self.getArrays(exchange, market, granularity)['epoch']
+
+        if len(epochs) == 0:
+            return None
+
+        return int(epochs[-1])
+
+    def append(self, exchange, market, granularity, data):
+        """Appends the candles newer than the last archived candle, returns the number appended
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market in the format of the exchange
+        granularity : int or str
+            Granularity in the format of the exchange
+        data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        """
+
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        if len(data) == 0:
+            return 0
+
+        path = self.getPath(exchange, market, granularity)
+        length = self.getLength(exchange, market, granularity)
+        last_epoch = self.getLastEpoch(exchange, market, granularity)
+
+        candles = pd.DataFrame({ 'epoch': data.index.values.astype('datetime64[s]').astype('int64') }, index=data.index)
+        for column in [ 'low', 'high', 'open', 'close', 'volume' ]:
+            candles[column] = data[column].astype('float64')
+
+        candles = candles.sort_values('epoch').drop_duplicates('epoch', keep='last')
+        if last_epoch != None:
+            candles = candles[candles['epoch'] > last_epoch]
+
+        if len(candles) == 0:
+            return 0
+
+        os.makedirs(path, exist_ok=True)
+
+        # columns are written epochs last, after dropping any interrupted append
+        for column in [ 'low', 'high', 'open', 'close', 'volume', 'epoch' ]:
+            filename = os.path.join(path, column)
+            dtype = np.dtype(self.columns[column])
+
+            with open(filename, 'ab') as column_file:
+                column_file.truncate(length * dtype.itemsize)
+                column_file.write(candles[column].to_numpy(dtype=dtype).tobytes())
+
+        return len(candles)
+
+    def getArrays(self, exchange, market, granularity, start=None, end=None):
+        """Returns the columns of the candles between the start and end epochs as read-only memory mapped arrays
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market in the format of the exchange
+        granularity : int or str
+            Granularity in the format of the exchange
+        start : int, optional
+            Epoch of the first candle
+        end : int, optional
+            Epoch of the last candle
+        """
+
+        path = self.getPath(exchange, market, granularity)
+        length = self.getLength(exchange, market, granularity)
+
+        if length == 0:
+            return { column: np.array([], dtype=dtype) for column, dtype in self.columns.items() }
+
+        arrays = { column: np.memmap(os.path.join(path, column), dtype=dtype, mode='r', shape=(length,)) for column, dtype in self.columns.items() }
+
+        first = 0 if start == None else int(np.searchsorted(arrays['epoch'], start, side='left'))
+        last = length if end == None else int(np.searchsorted(arrays['epoch'], end, side='right'))
+
+        return { column: values[first:last] for column, values in arrays.items() }
+
+    def getCandles(self, exchange, market, granularity, start=None, end=None, limit=None):
+        """Returns the candles between the start and end epochs as trading data
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market in the format of the exchange
+        granularity : int or str
+            Granularity in the format of the exchange
+        start : int, optional
+            Epoch of the first candle
+        end : int, optional
+            Epoch of the last candle
+        limit : int, optional
+            Maximum number of candles, the most recent are returned
+        """
+
+        arrays = self.getArrays(exchange, market, granularity, start, end)
+
+        if limit != None:
+            arrays = { column: values[-limit:] if limit > 0 else values[:0] for column, values in arrays.items() }
+
+        return getTradingData(arrays, market, granularity)
+
+    def getSlice(self, exchange, market, granularity, start=None, end=None, limit=None):
+        """Returns the candles between the start and end epochs as a slice read a window at a time, see CandleArchiveSlice
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market in the format of the exchange
+        granularity : int or str
+            Granularity in the format of the exchange
+        start : int, optional
+            Epoch of the first candle
+        end : int, optional
+            Epoch of the last candle
+        limit : int, optional
+            Maximum number of candles, the most recent are kept
+        """
+
+        return CandleArchiveSlice(self, exchange, market, granularity, start, end, limit)
+
+    def importHistory(self, api, exchange, market, granularity, iso8601start, limit=300):
+        """Downloads and archives the candles from the start date, or the last archived candle, to now
+
+        Parameters
+        ----------
+        api : object
+            Coinbase Pro or Binance PublicAPI object
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market in the format of the exchange
+        granularity : int or str
+            Granularity in the format of the exchange
+        iso8601start : str
+            ISO 8601 date of the first candle, E.g. the listing of the market
+        limit : int
+            Candles per request
+        """
+
+        seconds = self.getGranularitySeconds(granularity)
+        end = (int(time.time()) // seconds) * seconds
+
+        last_epoch = self.getLastEpoch(exchange, market, granularity)
+        if last_epoch != None:
+            start = last_epoch + seconds
+        else:
+            start = (int(pd.Timestamp(iso8601start).timestamp()) // seconds) * seconds
+
+        imported = 0
+
+        # pages forward, an empty page (E.g. before the market was listed) moves on to the next
+        for chunk_start in range(start, end + 1, limit * seconds):
+            chunk_end = min(end, chunk_start + ((limit - 1) * seconds))
+
+            iso8601chunkstart = datetime.utcfromtimestamp(chunk_start).isoformat(timespec='microseconds')
+            iso8601chunkend = datetime.utcfromtimestamp(chunk_end).isoformat(timespec='microseconds')
+            data = api.getHistoricalData(market, granularity, iso8601chunkstart, iso8601chunkend)
+
+            if isinstance(data, pd.DataFrame) and len(data) > 0:
+                # the current candle is still forming, it is archived once closed
+                data = data[(data.index >= pd.Timestamp(chunk_start, unit='s')) & (data.index < pd.Timestamp(end, unit='s'))]
+                imported += self.append(exchange, market, granularity, data)
+
+        return imported
+
+class CandleArchiveSlice():
+    def __init__(self, archive, exchange, market, granularity, start=None, end=None, limit=None):
+        """Candle Archive Slice object model
+
+        The candles of a slice of the archive stay in the memory maps, only
+        the windows asked for are read as trading data. A pickled slice holds
+        where its candles are archived rather than the candles, so each worker
+        process maps the archive itself.
+
+        Parameters
+        ----------
+        archive : CandleArchive
+            Archive of the candles
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market in the format of the exchange
+        granularity : int or str
+            Granularity in the format of the exchange
+        start : int, optional
+            Epoch of the first candle
+        end : int, optional
+            Epoch of the last candle
+        limit : int, optional
+            Maximum number of candles, the most recent are kept
+        """
+
+        self.archive = archive
+        self.exchange = exchange
+        self.market = market
+        self.granularity = granularity
+
+        self.arrays = archive.getArrays(exchange, market, granularity, start, end)
+        if limit != None:
+            self.arrays = { column: values[-limit:] if limit > 0 else values[:0] for column, values in self.arrays.items() }
+
+        self.index = pd.DatetimeIndex(np.array(self.arrays['epoch']).astype('datetime64[s]').astype('datetime64[ns]'), name='ts')
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getstate__(self):
+        """Pickles the location of the candles, E.g. to share the slice with worker processes"""
+
+        # the epochs keep the candles of the slice while the archive grows
+        epochs = self.arrays['epoch']
+        start, end = (int(epochs[0]), int(epochs[-1])) if len(epochs) > 0 else (0, -1)
+
+        return { 'directory': self.archive.directory, 'exchange': self.exchange, 'market': self.market, 'granularity': self.granularity, 'start': start, 'end': end }
+
+    def __setstate__(self, state):
+        """Maps the candles of a pickled slice"""
+
+        self.__init__(CandleArchive(state['directory']), state['exchange'], state['market'], state['granularity'], state['start'], state['end'])
+
+    def getDataFrame(self, start=None, end=None):
+        """Returns the candles between two positions as trading data
+
+        Parameters
+        ----------
+        start : int, optional
+            Position of the first candle
+        end : int, optional
+            Position after the last candle
+        """
+
+        return getTradingData({ column: values[start:end] for column, values in self.arrays.items() }, self.market, self.granularity)
@@ -0,0 +1,118 @@
+"""Compact columnar store of candles and their technical analysis"""
+
+import numpy as np
+import pandas as pd
+
+class CandleFrame():
+    def __init__(self, data=pd.DataFrame(), precision='float64'):
+        """Candle Frame object model
+
+        Holds a trading DataFrame in a fraction of the memory: the market and
+        granularity become attributes, the date column is rebuilt from the
+        index, boolean signals are packed 8 per byte and, with the float32
+        precision, prices and indicators take half the space. Columns are read
+        by name as with a DataFrame.
+
+        Parameters
+        ----------
+        data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume', ... ]
+        precision : str
+            'float64' or 'float32' for the float columns
+        """
+
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        if not precision in [ 'float64', 'float32' ]:
+            raise ValueError('Precision options: float64, float32')
+
+        self.precision = precision
+        self.index = data.index
+        self.columns = list(data.columns)
+        self.market = None
+        self.granularity = None
+
+        # column -> (kind, values, original dtype)
+        self.__columns = {}
+
+        for column in self.columns:
+            series = data[column]
+
+            if column == 'date' and isinstance(data.index, pd.DatetimeIndex) and np.array_equal(series.to_numpy(), data.index.to_numpy()):
+                self.__columns[column] = ('index', None, series.dtype)
+            elif column in [ 'market', 'granularity' ] and len(series) > 0 and (series == series.iloc[0]).all():
+                setattr(self, column, series.iloc[0])
+                self.__columns[column] = ('constant', series.iloc[0], series.dtype)
+            elif series.dtype == bool:
+                self.__columns[column] = ('bits', np.packbits(series.to_numpy()), series.dtype)
+            elif series.dtype.kind == 'f':
+                self.__columns[column] = ('float', series.to_numpy(dtype=precision), series.dtype)
+            else:
+                self.__columns[column] = ('values', series.to_numpy(), series.dtype)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, column):
+        return column in self.__columns
+
+    def __getitem__(self, column):
+        """Returns a column as a Pandas Series, float columns in the precision of the frame"""
+
+        if not column in self.__columns:
+            raise KeyError(column)
+
+        return pd.Series(self.__getValues(column, 0, len(self.index), False), index=self.index, name=column, copy=True)
+
+    def getDataFrame(self, start=None, end=None, columns=None):
+        """Returns the candles as a Pandas DataFrame, with the float columns in float64
+
+        Parameters
+        ----------
+        start : int, optional
+            Position of the first candle
+        end : int, optional
+            Position after the last candle
+        columns : list, optional
+            Columns of the DataFrame, all by default
+        """
+
+        start, end, step = slice(start, end).indices(len(self.index))
+
+        if columns == None:
+            columns = self.columns
+
+        for column in columns:
+            if not column in self.__columns:
+                raise KeyError(column)
+
+        return pd.DataFrame({ column: self.__getValues(column, start, end, True) for column in columns }, index=self.index[start:end], columns=columns)
+
+    def getMemoryUsage(self):
+        """Returns the bytes held by the columns and the index"""
+
+        usage = self.index.memory_usage()
+        for kind, values, dtype in self.__columns.values():
+            if isinstance(values, np.ndarray):
+                usage += values.nbytes
+
+        return usage
+
+    def __getValues(self, column, start, end, float64):
+        """Returns the values of a column between two positions (private function)"""
+
+        kind, values, dtype = self.__columns[column]
+
+        if kind == 'index':
+            return self.index[start:end].to_numpy()
+        elif kind == 'constant':
+            return np.full(end - start, values, dtype=dtype)
+        elif kind == 'bits':
+            # only the bytes holding the positions are unpacked
+            bits = np.unpackbits(values[start // 8:(end + 7) // 8])
+            return bits[start % 8:start % 8 + end - start].astype(bool)
+        elif kind == 'float' and float64:
+            return values[start:end].astype(dtype)
+
+        return values[start:end]
@@ -0,0 +1,151 @@
+"""Higher granularity candles aggregated locally from the candles of a base granularity"""
+
+import numpy as np
+import pandas as pd
+
+class CandleResampler():
+    def __init__(self, candles=300):
+        """Candle Resampler object model
+
+        Candles of a higher granularity are aggregated from the candles of the
+        base granularity, aligned to the epoch as the exchanges align them.
+        The last candle is forming, as the last candle downloaded from the
+        exchanges is. The complete candles are kept, so an update only
+        aggregates the base candles of the forming candle and those after it.
+
+        Parameters
+        ----------
+        candles : int
+            Maximum candles returned by an update, E.g. 300 as downloaded
+        """
+
+        if not isinstance(candles, int) or candles < 1:
+            raise ValueError('Candles must be an integer of 1 or more.')
+
+        self.candles = candles
+        # granularity -> complete candles and the epoch of the forming candle
+        self.frames = {}
+
+    def getGranularitySeconds(self, granularity):
+        """Returns the granularity of either exchange in seconds"""
+
+        if isinstance(granularity, (int, np.integer)):
+            if not granularity in [ 60, 300, 900, 3600, 21600, 86400 ]:
+                raise ValueError('Granularity options: 60, 300, 900, 3600, 21600, 86400')
+            return int(granularity)
+
+        seconds = { '1m': 60, '5m': 300, '15m': 900, '1h': 3600, '6h': 21600, '1d': 86400 }
+        if not granularity in seconds:
+            raise ValueError('Granularity options: 1m, 5m, 15m, 1h, 6h, 1d')
+
+        return seconds[granularity]
+
+    def canResample(self, base_granularity, granularity):
+        """Returns True if candles of the granularity can be aggregated from those of the base granularity, or are them"""
+
+        base_seconds = self.getGranularitySeconds(base_granularity)
+        seconds = self.getGranularitySeconds(granularity)
+
+        return seconds % base_seconds == 0
+
+    def getRatio(self, base_granularity, granularity):
+        """Returns the number of base candles in a candle of the granularity"""
+
+        if not self.canResample(base_granularity, granularity):
+            raise ValueError('Granularity is not a multiple of the base granularity.')
+
+        return self.getGranularitySeconds(granularity) // self.getGranularitySeconds(base_granularity)
+
+    def resample(self, data, granularity, partial=True):
+        """Returns the candles of the granularity aggregated from the trading data
+
+        Parameters
+        ----------
+        data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        granularity : int or str
+            Granularity in the format of the exchange, E.g. 3600 or '1h'
+        partial : bool
+            Includes the forming candle, False only returns complete candles
+        """
+
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        if list(data.keys()) != [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]:
+            raise ValueError('Data not not contain date, market, granularity, low, high, open, close, volume')
+
+        if len(data) == 0:
+            return data.copy()
+
+        if not self.canResample(data['granularity'].iloc[-1], granularity):
+            raise ValueError('Granularity is not a multiple of the base granularity.')
+
+        seconds = self.getGranularitySeconds(granularity)
+        epochs = pd.DatetimeIndex(data.index).asi8 // 10 ** 9
+        buckets = (epochs // seconds) * seconds
+
+        # the first and last base candle of each candle
+        first = np.ones(len(buckets), dtype=bool)
+        first[1:] = buckets[1:] != buckets[:-1]
+        starts = np.flatnonzero(first)
+        ends = np.append(starts[1:] - 1, len(buckets) - 1)
+
+        tsidx = pd.DatetimeIndex(pd.to_datetime(buckets[starts], unit='s'), name='ts')
+        df = pd.DataFrame({
+            'date': tsidx,
+            'market': data['market'].iloc[-1],
+            'granularity': granularity,
+            'low': np.minimum.reduceat(data['low'].to_numpy(dtype=float), starts),
+            'high': np.maximum.reduceat(data['high'].to_numpy(dtype=float), starts),
+            'open': data['open'].to_numpy(dtype=float)[starts],
+            'close': data['close'].to_numpy(dtype=float)[ends],
+            'volume': np.add.reduceat(data['volume'].to_numpy(dtype=float), starts)
+        }, index=tsidx)
+
+        if partial == False:
+            return df.iloc[:-1]
+
+        return df
+
+    def getNextStart(self, granularity):
+        """Returns the epoch of the first base candle the next update needs, None before the first update"""
+
+        if granularity not in self.frames:
+            return None
+
+        return self.frames[granularity][1]
+
+    def update(self, data, granularity):
+        """Aggregates the new base candles, returns the most recent candles of the granularity
+
+        Parameters
+        ----------
+        data : Pandas Time Series
+            Base candles, at least those from getNextStart(), E.g. as returned by CandleStore.getCandles()
+        granularity : int or str
+            Granularity in the format of the exchange, E.g. 3600 or '1h'
+        """
+
+        complete, next_start = self.frames.get(granularity, (None, None))
+
+        if next_start != None:
+            data = data[pd.DatetimeIndex(data.index).asi8 // 10 ** 9 >= next_start]
+
+        df = self.resample(data, granularity)
+
+        if len(df) == 0:
+            return pd.DataFrame() if complete is None else complete.copy()
+
+        if complete is not None and len(complete) > 0:
+            df = pd.concat([ complete[complete.index < df.index[0]], df ])
+
+        df = df.iloc[-self.candles:]
+        self.frames[granularity] = (df.iloc[:-1], int(df.index[-1].value // 10 ** 9))
+
+        return df.copy()
+
+    def clear(self):
+        """Forgets the complete candles"""
+
+        self.frames = {}
@@ -0,0 +1,226 @@
+"""Local store of exchange candles, kept in sync with the exchange APIs"""
+
+import math, sqlite3, time
+import pandas as pd
+from datetime import datetime
+
+class CandleStore():
+    def __init__(self, filename='candles.db'):
+        """Candle Store object model
+
+        Candles are stored in SQLite keyed by exchange, market, granularity and
+        the epoch of the candle. A sync only downloads the candles missing since
+        the last sync.
+
+        Parameters
+        ----------
+        filename : str
+            SQLite database file, ':memory:' for a store that is not persisted
+        """
+
+        if not isinstance(filename, str) or filename == '':
+            raise TypeError('Filename required.')
+
+        self.filename = filename
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS candles (exchange TEXT NOT NULL, market TEXT NOT NULL, granularity TEXT NOT NULL, ' \
+            + 'epoch INTEGER NOT NULL, low REAL, high REAL, open REAL, close REAL, volume REAL, PRIMARY KEY (exchange, market, granularity, epoch))')
+        self.conn.commit()
+
+    def close(self):
+        """Closes the SQLite database"""
+
+        self.conn.close()
+
+    def getGranularitySeconds(self, granularity):
+        """Returns the granularity of either exchange in seconds"""
+
+        if isinstance(granularity, int):
+            if not granularity in [ 60, 300, 900, 3600, 21600, 86400 ]:
+                raise ValueError('Granularity options: 60, 300, 900, 3600, 21600, 86400')
+            return granularity
+
+        seconds = { '1m': 60, '5m': 300, '15m': 900, '1h': 3600, '6h': 21600, '1d': 86400 }
+        if not granularity in seconds:
+            raise ValueError('Granularity options: 1m, 5m, 15m, 1h, 6h, 1d')
+
+        return seconds[granularity]
+
+    def getLastEpoch(self, exchange, market, granularity):
+        """Returns the epoch of the last stored candle, None if there are none"""
+
+        row = self.conn.execute('SELECT MAX(epoch) FROM candles WHERE exchange = ? AND market = ? AND granularity = ?',
+            (exchange, market, str(granularity))).fetchone()
+
+        return row[0]
+
+    def hasCandles(self, exchange, market, granularity, start, end):
+        """Returns True if every candle between the start and end epochs is stored"""
+
+        seconds = self.getGranularitySeconds(granularity)
+        first = int(math.ceil(start / seconds) * seconds)
+        last = int(math.floor(end / seconds) * seconds)
+
+        if last < first:
+            return False
+
+        row = self.conn.execute('SELECT COUNT(*) FROM candles WHERE exchange = ? AND market = ? AND granularity = ? AND epoch >= ? AND epoch <= ?',
+            (exchange, market, str(granularity), first, last)).fetchone()
+
+        return row[0] == ((last - first) // seconds) + 1
+
+    def getCandles(self, exchange, market, granularity, start=None, end=None, limit=300):
+        """Returns the most recent stored candles as a trading data DataFrame
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market in the format of the exchange
+        granularity : int or str
+            Granularity in the format of the exchange
+        start : int, optional
+            Epoch of the first candle
+        end : int, optional
+            Epoch of the last candle
+        limit : int, optional
+            Maximum number of candles
+        """
+
+        sql = 'SELECT epoch, low, high, open, close, volume FROM candles WHERE exchange = ? AND market = ? AND granularity = ?'
+        params = [ exchange, market, str(granularity) ]
+
+        if start != None:
+            sql += ' AND epoch >= ?'
+            params.append(int(start))
+
+        if end != None:
+            sql += ' AND epoch <= ?'
+            params.append(int(end))
+
+        sql += ' ORDER BY epoch DESC LIMIT ?'
+        params.append(int(limit))
+
+        df = pd.DataFrame(self.conn.execute(sql, params).fetchall(), columns=[ 'epoch', 'low', 'high', 'open', 'close', 'volume' ])
+        # earliest first
+        df = df.iloc[::-1]
+
+        freq = pd.tseries.frequencies.to_offset(str(self.getGranularitySeconds(granularity)) + 's')
+
+        # convert the DataFrame into a time series with the date as the index/key
+        try:
+            tsidx = pd.DatetimeIndex(pd.to_datetime(df['epoch'], unit='s'), dtype='datetime64[ns]', freq=freq)
+        except ValueError:
+            tsidx = pd.DatetimeIndex(pd.to_datetime(df['epoch'], unit='s'), dtype='datetime64[ns]')
+
+        df.set_index(tsidx, inplace=True)
+        df = df.drop(columns=['epoch'])
+        df.index.names = ['ts']
+        df['date'] = tsidx
+        df['market'] = market
+        df['granularity'] = granularity
+
+        return df[[ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]]
+
+    def saveCandles(self, exchange, data):
+        """Saves trading data to the store, replacing candles already stored
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        """
+
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        if len(data) == 0:
+            return
+
+        epochs = data.index.values.astype('datetime64[s]').astype('int64')
+        rows = zip([ exchange ] * len(data), data['market'].values, data['granularity'].astype(str).values, epochs.tolist(),
+            data['low'].astype(float).values.tolist(), data['high'].astype(float).values.tolist(), data['open'].astype(float).values.tolist(),
+            data['close'].astype(float).values.tolist(), data['volume'].astype(float).values.tolist())
+
+        self.conn.executemany('INSERT OR REPLACE INTO candles (exchange, market, granularity, epoch, low, high, open, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self.conn.commit()
+
+    def sync(self, api, exchange, market, granularity, limit=300):
+        """Downloads the candles missing since the last sync
+
+        The last stored candle is downloaded again as it may have been incomplete.
+        If more than limit candles are missing the most recent candles are
+        downloaded instead.
+
+        Parameters
+        ----------
+        api : object
+            Coinbase Pro or Binance PublicAPI object
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market in the format of the exchange
+        granularity : int or str
+            Granularity in the format of the exchange
+        """
+
+        iso8601start, iso8601end = self.getSyncRange(exchange, market, granularity, limit)
+        data = api.getHistoricalData(market, granularity, iso8601start, iso8601end)
+
+        if isinstance(data, pd.DataFrame):
+            self.saveCandles(exchange, data)
+
+    def backfill(self, api, exchange, market, granularity, candles=300, limit=300):
+        """Downloads the most recent candles not already stored, limit candles per request
+
+        Parameters
+        ----------
+        api : object
+            Coinbase Pro or Binance PublicAPI object
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market in the format of the exchange
+        granularity : int or str
+            Granularity in the format of the exchange
+        candles : int
+            Number of candles of history
+        """
+
+        seconds = self.getGranularitySeconds(granularity)
+        end = (int(time.time()) // seconds) * seconds
+        start = end - ((candles - 1) * seconds)
+
+        for chunk_end in range(end, start - 1, -(limit * seconds)):
+            chunk_start = max(start, chunk_end - ((limit - 1) * seconds))
+
+            if self.hasCandles(exchange, market, granularity, chunk_start, chunk_end):
+                continue
+
+            iso8601start = datetime.utcfromtimestamp(chunk_start).isoformat(timespec='microseconds')
+            iso8601end = datetime.utcfromtimestamp(chunk_end).isoformat(timespec='microseconds')
+            data = api.getHistoricalData(market, granularity, iso8601start, iso8601end)
+
+            if isinstance(data, pd.DataFrame):
+                self.saveCandles(exchange, data)
+
+    def getSyncRange(self, exchange, market, granularity, limit=300):
+        """Returns the ISO 8601 start and end of the candles missing since the last sync
+
+        Empty strings are returned if the most recent candles should be downloaded.
+        """
+
+        seconds = self.getGranularitySeconds(granularity)
+        last_epoch = self.getLastEpoch(exchange, market, granularity)
+        now = int(time.time())
+
+        if last_epoch == None or ((now - last_epoch) // seconds) >= limit:
+            return ('', '')
+
+        start = datetime.utcfromtimestamp(last_epoch)
+        end = datetime.utcfromtimestamp(min(last_epoch + (limit * seconds), now))
+
+        return (start.isoformat(timespec='microseconds'), end.isoformat(timespec='microseconds'))
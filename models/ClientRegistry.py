@@ -0,0 +1,92 @@
+"""Exchange API clients shared by the process"""
+
+import threading
+from models.Binance import AuthAPI as BAuthAPI, PublicAPI as BPublicAPI
+from models.CoinbasePro import AuthAPI as CBAuthAPI, PublicAPI as CBPublicAPI
+
+class ClientRegistry():
+    def __init__(self):
+        """Client Registry object model
+
+        The public API of each exchange and the authenticated API of each set
+        of credentials are created once and reused, with their HTTP sessions,
+        so no poll or order pays for constructing a client.
+        """
+
+        self.lock = threading.Lock()
+        self.clear()
+
+    def getPublicAPI(self, exchange):
+        """Returns the public API of the exchange
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        """
+
+        if exchange == 'coinbasepro':
+            return self.__getClient(('public', exchange), CBPublicAPI)
+        elif exchange == 'binance':
+            return self.__getClient(('public', exchange), BPublicAPI)
+
+        raise ValueError('Exchange options: coinbasepro, binance')
+
+    def getAuthAPI(self, exchange, api_key, api_secret, api_pass='', api_url=''):
+        """Returns the authenticated API of the credentials
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        api_key : str
+            Your account portfolio API key
+        api_secret : str
+            Your account portfolio API secret
+        api_pass : str, optional
+            Your Coinbase Pro account portfolio API passphrase
+        api_url : str, optional
+            API URL, defaults to that of the exchange
+        """
+
+        key = ('auth', exchange, api_key, api_secret, api_pass, api_url)
+
+        if exchange == 'coinbasepro':
+            if api_url == '':
+                return self.__getClient(key, lambda: CBAuthAPI(api_key, api_secret, api_pass))
+            return self.__getClient(key, lambda: CBAuthAPI(api_key, api_secret, api_pass, api_url))
+        elif exchange == 'binance':
+            if api_url == '':
+                return self.__getClient(key, lambda: BAuthAPI(api_key, api_secret))
+            return self.__getClient(key, lambda: BAuthAPI(api_key, api_secret, api_url))
+
+        raise ValueError('Exchange options: coinbasepro, binance')
+
+    def getStats(self):
+        """Returns the clients created and reused"""
+
+        with self.lock:
+            return { 'created': self.created, 'reused': self.reused, 'clients': len(self.clients) }
+
+    def clear(self):
+        """Forgets every client"""
+
+        with self.lock:
+            self.clients = {}
+            self.created = 0
+            self.reused = 0
+
+    def __getClient(self, key, create):
+        """Returns the client of the key, created if there is none (private function)"""
+
+        with self.lock:
+            if key in self.clients:
+                self.reused += 1
+            else:
+                self.clients[key] = create()
+                self.created += 1
+
+            return self.clients[key]
+
+# shared by the apps and trading accounts of every market in the process
+client_registry = ClientRegistry()
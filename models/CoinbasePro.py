@@ -1,13 +1,47 @@
 """Remotely control your Coinbase Pro account via their API"""
 
+import aiohttp, asyncio
 import pandas as pd
 import re, json, hmac, hashlib, time, requests, base64, sys
 from datetime import datetime, timedelta
 from requests.auth import AuthBase
+from models.ExchangeMetadata import exchange_metadata, getPrecision, truncateAmount
+from models.RequestScheduler import RateLimitedAdapter, getTraceConfig
 
 # production: disable traceback
 sys.tracebacklimit = 0
 
+# persistent connections shared by the API objects, saving a TLS handshake per request
+session = requests.Session()
+# every request waits for the rate limits of the exchange
+session.mount('https://', RateLimitedAdapter('coinbasepro'))
+
+def getProductMarkets(resp):
+    """Returns the markets of the Coinbase Pro products"""
+
+    markets = {}
+    if not isinstance(resp, list):
+        return markets
+
+    for product in resp:
+        step_size = float(product['base_increment'])
+        quote_increment = float(product['quote_increment'])
+
+        markets[product['id']] = {
+            'base': product['base_currency'],
+            'quote': product['quote_currency'],
+            'step_size': step_size,
+            'base_precision': getPrecision(step_size),
+            'tick_size': quote_increment,
+            'price_precision': getPrecision(quote_increment),
+            'quote_increment': quote_increment,
+            'quote_precision': getPrecision(quote_increment),
+            'min_quantity': float(product.get('base_min_size', 0)),
+            'min_funds': float(product.get('min_market_funds', 0))
+        }
+
+    return markets
+
 class AuthAPI():
     def __init__(self, api_key='', api_secret='', api_pass='', api_url='https://api.pro.coinbase.com'):
         """Coinbase Pro API object model
@@ -75,21 +109,26 @@ class AuthAPI():
     def __call__(self, request):
         """Signs the request"""
 
+        request.headers.update(self.getHeaders(request.method, request.path_url, (request.body or b'').decode()))
+
+        return request
+
+    def getHeaders(self, method, path_url, body=''):
+        """Returns the headers signing a request"""
+
         timestamp = str(time.time())
-        message = timestamp + request.method + request.path_url + (request.body or b'').decode()
+        message = timestamp + method + path_url + body
         hmac_key = base64.b64decode(self.api_secret)
         signature = hmac.new(hmac_key, message.encode(), hashlib.sha256)
         signature_b64 = base64.b64encode(signature.digest()).decode()
 
-        request.headers.update({
+        return {
             'CB-ACCESS-SIGN': signature_b64,
             'CB-ACCESS-TIMESTAMP': timestamp,
             'CB-ACCESS-KEY': self.api_key,
             'CB-ACCESS-PASSPHRASE': self.api_pass,
             'Content-Type': 'application/json'
-        })
-
-        return request
+        }
 
     def getAccounts(self):
         """Retrieves your list of accounts"""
@@ -136,8 +175,8 @@ class AuthAPI():
         fees = self.getFees()
         return float(fees['usd_volume'].to_string(index=False).strip())
 
-    def getOrders(self, market='', action='', status='all'):
-        """Retrieves your list of orders with optional filtering"""
+    def getOrders(self, market='', action='', status='all', iso8601start=''):
+        """Retrieves your list of orders with optional filtering, E.g. the orders created from an ISO 8601 date"""
 
         # if market provided
         if market != '':
@@ -156,8 +195,14 @@ class AuthAPI():
         if not status in ['open', 'pending', 'done', 'active', 'all']:
             raise ValueError('Invalid order status.')
 
+        if iso8601start != '':
+            # validates the start date is ISO 8601
+            p = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?$")
+            if not p.match(iso8601start):
+                raise ValueError('Start date is not ISO 8601.')
+
         # GET /orders?status
-        resp = self.authAPI('GET', 'orders?status=' + status)
+        resp = self.authAPI('GET', 'orders?status=' + status + ('&start_date=' + iso8601start if iso8601start != '' else ''))
         if len(resp) > 0:
             df = resp.copy()[[ 'created_at', 'product_id', 'side', 'type', 'filled_size', 'executed_value', 'status' ]]
         else:
@@ -212,6 +257,10 @@ class AuthAPI():
         if quote_quantity < 10:
             raise ValueError('Trade amount is too small (>= 10).')
 
+        info = exchange_metadata.getMarketInfo('coinbasepro', market, self, False)
+        if info != None:
+            quote_quantity = truncateAmount(quote_quantity, info['quote_increment'])
+
         order = {
             'product_id': market,
             'type': 'market',
@@ -222,11 +271,8 @@ class AuthAPI():
         if self.debug == True:
             print (order)
 
-        # connect to authenticated coinbase pro api
-        model = AuthAPI(self.api_key, self.api_secret, self.api_pass, self.api_url)
-
         # place order and return result
-        return model.authAPI('POST', 'orders', order)
+        return self.authAPI('POST', 'orders', order)
 
     def marketSell(self, market='', base_quantity=0):
         p = re.compile(r"^[A-Z]{3,4}\-[A-Z]{3,4}$")
@@ -236,6 +282,10 @@ class AuthAPI():
         if not isinstance(base_quantity, int) and not isinstance(base_quantity, float):
             raise TypeError('The crypto amount is not numeric.')
 
+        info = exchange_metadata.getMarketInfo('coinbasepro', market, self, False)
+        if info != None:
+            base_quantity = truncateAmount(base_quantity, info['step_size'])
+
         order = {
             'product_id': market,
             'type': 'market',
@@ -245,8 +295,7 @@ class AuthAPI():
 
         print (order)
 
-        model = AuthAPI(self.api_key, self.api_secret, self.api_pass, self.api_url)
-        return model.authAPI('POST', 'orders', order)
+        return self.authAPI('POST', 'orders', order)
 
     def limitSell(self, market='', base_quantity=0, futurePrice=0):
         p = re.compile(r"^[A-Z]{3,4}\-[A-Z]{3,4}$")
@@ -269,16 +318,19 @@ class AuthAPI():
 
         print (order)
 
-        model = AuthAPI(self.api_key, self.api_secret, self.api_pass, self.api_url)
-        return model.authAPI('POST', 'orders', order)
+        return self.authAPI('POST', 'orders', order)
+
+    def getMarkets(self):
+        """Returns every market of the exchange, downloaded in a single request"""
+
+        return getProductMarkets(self.authAPI('GET', 'products'))
 
     def cancelOrders(self, market=''):
         p = re.compile(r"^[A-Z]{3,4}\-[A-Z]{3,4}$")
         if not p.match(market):
             raise ValueError('Coinbase Pro market is invalid.')
 
-        model = AuthAPI(self.api_key, self.api_secret, self.api_pass, self.api_url)
-        return model.authAPI('DELETE', 'orders')
+        return self.authAPI('DELETE', 'orders')
 
     def authAPI(self, method, uri, payload=''):
         if not isinstance(method, str):
@@ -292,11 +344,11 @@ class AuthAPI():
 
         try:
             if method == 'DELETE':
-                resp = requests.delete(self.api_url + uri, auth=self)
+                resp = session.delete(self.api_url + uri, auth=self)
             elif method == 'GET':
-                resp = requests.get(self.api_url + uri, auth=self)
+                resp = session.get(self.api_url + uri, auth=self)
             elif method == 'POST':
-                resp = requests.post(self.api_url + uri, json=payload, auth=self)
+                resp = session.post(self.api_url + uri, json=payload, auth=self)
 
             if resp.status_code != 200:
                 if self.die_on_api_error:
@@ -366,6 +418,13 @@ class PublicAPI():
         self.api_url = 'https://api.pro.coinbase.com/'
 
     def getHistoricalData(self, market='BTC-GBP', granularity=86400, iso8601start='', iso8601end=''):
+        resp = self.authAPI('GET', self.getCandlesURI(market, granularity, iso8601start, iso8601end))
+
+        return self.getCandlesDataFrame(resp, market, granularity)
+
+    def getCandlesURI(self, market='BTC-GBP', granularity=86400, iso8601start='', iso8601end=''):
+        """Returns the URI of the candles request, validating the arguments"""
+
         # validates the market is syntactically correct
         p = re.compile(r"^[A-Z]{3,4}\-[A-Z]{3,4}$")
         if not p.match(market):
@@ -406,8 +465,11 @@ class PublicAPI():
             # calculate the end date using the granularity
             iso8601end = str((datetime.strptime(iso8601start, '%Y-%m-%dT%H:%M:%S.%f') + timedelta(minutes=granularity * multiplier)).isoformat()) 
 
-        resp = self.authAPI('GET','products/' + market + '/candles?granularity=' + str(granularity) + '&start=' + iso8601start + '&end=' + iso8601end)
-        
+        return 'products/' + market + '/candles?granularity=' + str(granularity) + '&start=' + iso8601start + '&end=' + iso8601end
+
+    def getCandlesDataFrame(self, resp, market, granularity):
+        """Returns the candles response as trading data"""
+
         # convert the API response into a Pandas DataFrame
         df = pd.DataFrame(resp, columns=[ 'epoch', 'low', 'high', 'open', 'close', 'volume' ])
         # reverse the order of the response with earliest last
@@ -448,6 +510,11 @@ class PublicAPI():
 
         return df
 
+    def getMarkets(self):
+        """Returns every market of the exchange, downloaded in a single request"""
+
+        return getProductMarkets(self.authAPI('GET', 'products'))
+
     def getTicker(self, market='BTC-GBP'):
        # validates the market is syntactically correct
         p = re.compile(r"^[A-Z]{3,4}\-[A-Z]{3,4}$")
@@ -472,9 +539,9 @@ class PublicAPI():
 
         try:
             if method == 'GET':
-                resp = requests.get(self.api_url + uri)
+                resp = session.get(self.api_url + uri)
             elif method == 'POST':
-                resp = requests.post(self.api_url + uri, json=payload)
+                resp = session.post(self.api_url + uri, json=payload)
 
             if resp.status_code != 200:
                 if self.die_on_api_error:
@@ -528,3 +595,93 @@ class PublicAPI():
                 else:
                     print('Timeout: ' + self.api_url)
                     return pd.DataFrame()
+
+class AsyncPublicAPI(PublicAPI):
+    def __init__(self, session=None, limit=10):
+        """Coinbase Pro asyncio public API object model
+
+        Parameters
+        ----------
+        session : aiohttp.ClientSession, optional
+            Session shared with other asyncio API objects
+        limit : int, optional
+            Maximum number of concurrent connections of a session created by the object
+        """
+
+        super().__init__()
+
+        self.session = session
+        self.limit = limit
+
+    def getSession(self):
+        """Returns the session, created on first use"""
+
+        if self.session == None or self.session.closed:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.limit), timeout=aiohttp.ClientTimeout(total=20), trace_configs=[ getTraceConfig('coinbasepro') ])
+
+        return self.session
+
+    async def close(self):
+        """Closes the session and its connections"""
+
+        if self.session != None:
+            await self.session.close()
+
+    async def getHistoricalData(self, market='BTC-GBP', granularity=86400, iso8601start='', iso8601end=''):
+        resp = await self.authAPI('GET', self.getCandlesURI(market, granularity, iso8601start, iso8601end))
+
+        return self.getCandlesDataFrame(resp, market, granularity)
+
+    async def getTicker(self, market='BTC-GBP'):
+        # validates the market is syntactically correct
+        p = re.compile(r"^[A-Z]{3,4}\-[A-Z]{3,4}$")
+        if not p.match(market):
+            raise TypeError('Coinbase Pro market required.')
+
+        resp = await self.authAPI('GET','products/' + market + '/ticker')
+        if 'price' in resp:
+            return float(resp['price'])
+
+        return 0.0
+
+    async def authAPI(self, method, uri, payload=''):
+        if not isinstance(method, str):
+            raise TypeError('Method is not a string.')
+
+        if not method in ['GET', 'POST']:
+            raise TypeError('Method not GET or POST.')
+
+        if not isinstance(uri, str):
+            raise TypeError('Method is not a string.')
+
+        try:
+            if method == 'GET':
+                request = self.getSession().get(self.api_url + uri)
+            elif method == 'POST':
+                request = self.getSession().post(self.api_url + uri, json=payload)
+
+            async with request as resp:
+                content = await resp.json(content_type=None)
+
+                if resp.status != 200:
+                    if self.die_on_api_error:
+                        raise Exception(method.upper() + ' (' + '{}'.format(resp.status) + ') ' + self.api_url + uri + ' - ' + '{}'.format(content['message']))
+                    else:
+                        print('error:', method.upper() + ' (' + '{}'.format(resp.status) + ') ' + self.api_url + uri + ' - ' + '{}'.format(content['message']))
+                        return pd.DataFrame()
+
+            return content
+
+        except aiohttp.ClientConnectionError as err:
+            if self.die_on_api_error:
+                raise SystemExit('ConnectionError: ' + self.api_url)
+            else:
+                print('ConnectionError: ' + self.api_url)
+                return pd.DataFrame()
+
+        except asyncio.TimeoutError as err:
+            if self.die_on_api_error:
+                raise SystemExit('Timeout: ' + self.api_url)
+            else:
+                print('Timeout: ' + self.api_url)
+                return pd.DataFrame()
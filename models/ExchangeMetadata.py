@@ -0,0 +1,167 @@
+"""Markets of the exchanges, loaded once and refreshed as they age"""
+
+import math, threading, time
+from datetime import datetime
+
+# quote currencies of Binance, the longest matched first, until the markets are loaded
+BINANCE_QUOTE_CURRENCIES = [ 'USDT', 'TUSD', 'BUSD', 'BIDR', 'BVND', 'BTC', 'BNB', 'ETH', 'DAX', 'NGN', 'RUB', 'TRY', 'EUR', 'GBP', 'ZAR', 'UAH', 'DAI', 'AUD', 'BRL', 'VAI', 'US' ]
+
+def getPrecision(increment):
+    """Returns the decimal places of an increment, E.g. 2 for 0.01"""
+
+    increment = float(increment)
+    if increment <= 0:
+        return 8
+
+    return max(0, int(round(-math.log(increment, 10), 0)))
+
+def truncateAmount(amount, increment):
+    """Returns the amount truncated to the decimal places of the increment"""
+
+    stepper = 10.0 ** getPrecision(increment)
+    return math.trunc(stepper * amount) / stepper
+
+class ExchangeMetadata():
+    def __init__(self, ttl=3600, retry=60):
+        """Exchange Metadata object model
+
+        The markets of an exchange, with their base and quote currencies, lot
+        sizes and precisions, are downloaded in a single request and kept
+        until they are older than the TTL. Orders use the markets already
+        loaded, so placing an order is only the request of the order.
+
+        Parameters
+        ----------
+        ttl : int
+            Seconds the markets are kept before they are refreshed
+        retry : int
+            Seconds before markets that failed to load are requested again
+        """
+
+        if not isinstance(ttl, int) or ttl < 0:
+            raise ValueError('TTL must be an integer of 0 or more.')
+
+        if not isinstance(retry, int) or retry < 0:
+            raise ValueError('Retry must be an integer of 0 or more.')
+
+        self.ttl = ttl
+        self.retry = retry
+        self.lock = threading.Lock()
+        self.clear()
+
+    def getMarkets(self, exchange, api, wait=True):
+        """Returns the markets of the exchange
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        api : object
+            API of the exchange, its getMarkets() downloads the markets
+        wait : bool
+            Waits for markets that are due a refresh, False refreshes them in the background
+        """
+
+        with self.lock:
+            entry = self.entries.get(exchange)
+
+            if entry != None and time.time() - entry['loaded_at'] < self.ttl:
+                self.hits += 1
+                return entry['markets']
+
+            refresh = entry == None or not entry['refreshing']
+            if entry != None and refresh:
+                entry['refreshing'] = True
+
+        # markets never loaded are always waited for
+        if entry == None or wait:
+            self.__refresh(exchange, api)
+        elif refresh:
+            threading.Thread(target=self.__refresh, args=(exchange, api), daemon=True).start()
+
+        with self.lock:
+            entry = self.entries.get(exchange)
+            return {} if entry == None else entry['markets']
+
+    def getMarketInfo(self, exchange, market, api, wait=True):
+        """Returns the base and quote currencies, lot size and precisions of the market, None if it is not listed"""
+
+        return self.getMarkets(exchange, api, wait).get(market)
+
+    def splitMarket(self, exchange, market, api, wait=True):
+        """Returns the base and quote currencies of the market
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str
+            Market of the exchange, E.g. BTCGBP
+        api : object
+            API of the exchange, its getMarkets() downloads the markets
+        wait : bool
+            Waits for the markets, False splits the market by its quote currency
+            unless the markets are loaded, and only downloads them if it cannot
+        """
+
+        info = None
+        if wait:
+            info = self.getMarketInfo(exchange, market, api)
+        else:
+            with self.lock:
+                entry = self.entries.get(exchange)
+                if entry != None:
+                    info = entry['markets'].get(market)
+
+        if info != None:
+            return (info['base'], info['quote'])
+
+        if exchange == 'coinbasepro':
+            return tuple(market.split('-', 2))
+
+        for quote in BINANCE_QUOTE_CURRENCIES:
+            if market.endswith(quote) and len(market) > len(quote):
+                return (market[:-len(quote)], quote)
+
+        if not wait:
+            return self.splitMarket(exchange, market, api)
+
+        raise ValueError('Binance market error.')
+
+    def getStats(self):
+        """Returns the loads, cached reads and cached exchanges"""
+
+        with self.lock:
+            return { 'loads': self.loads, 'hits': self.hits, 'entries': len(self.entries) }
+
+    def clear(self):
+        """Forgets the markets of every exchange"""
+
+        with self.lock:
+            self.entries = {}
+            self.loads = 0
+            self.hits = 0
+
+    def __refresh(self, exchange, api):
+        """Downloads the markets of the exchange (private function)"""
+
+        try:
+            markets = api.getMarkets()
+        except Exception as err:
+            ts = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+            print (ts, 'ExchangeMetadata', 'getMarkets', str(err))
+            markets = {}
+
+        with self.lock:
+            entry = self.entries.get(exchange)
+
+            if isinstance(markets, dict) and len(markets) > 0:
+                self.entries[exchange] = { 'markets': markets, 'loaded_at': time.time(), 'refreshing': False }
+                self.loads += 1
+            else:
+                # the markets already loaded are kept until the retry
+                markets = {} if entry == None else entry['markets']
+                self.entries[exchange] = { 'markets': markets, 'loaded_at': time.time() - self.ttl + self.retry, 'refreshing': False }
+
+# shared by the apps and exchange APIs of every market in the process
+exchange_metadata = ExchangeMetadata()
@@ -0,0 +1,154 @@
+"""Seasonal ARIMA price predictions, fitted once per market and updated as candles arrive"""
+
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future, ProcessPoolExecutor
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+def getSeasonalARIMAModel(endog):
+    """Returns the Seasonal ARIMA Model of the prices"""
+
+    # parameters for SARIMAX
+    return SARIMAX(endog, trend='n', order=(0,1,0), seasonal_order=(1,1,1,12))
+
+def fitParameters(values, start_params=None):
+    """Returns the fitted parameters of the Seasonal ARIMA Model, run in a worker process"""
+
+    return np.asarray(getSeasonalARIMAModel(values).fit(start_params=start_params, disp=-1).params)
+
+class ForecastService():
+    def __init__(self, refit_candles=12, workers=1):
+        """Forecast Service object model
+
+        The fitted parameters of the Seasonal ARIMA Model are kept per market
+        and granularity. New candles only run the filter with the parameters
+        already fitted, by appending the candles to the results or applying
+        them to the latest candles. Every so many candles the parameters are
+        refitted in a worker process, warm started from the last parameters.
+
+        Parameters
+        ----------
+        refit_candles : int
+            New candles after which the parameters are refitted
+        workers : int
+            Worker processes fitting the parameters, 0 fits in the calling thread
+        """
+
+        if not isinstance(refit_candles, int) or refit_candles < 1:
+            raise ValueError('Refit candles must be an integer of 1 or more.')
+
+        if not isinstance(workers, int) or workers < 0:
+            raise ValueError('Workers must be an integer of 0 or more.')
+
+        self.refit_candles = refit_candles
+        self.workers = workers
+        self.executor = None
+        self.lock = threading.Lock()
+        self.clear()
+
+    def getResults(self, data, wait=True):
+        """Returns the Seasonal ARIMA Model results of the closing prices
+
+        Parameters
+        ----------
+        data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        wait : bool
+            Waits for a refit that is due, False uses the last parameters until it finishes
+        """
+
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        if len(data) == 0:
+            raise ValueError('Data has no candles.')
+
+        key = (str(data['market'].iloc[-1]), str(data['granularity'].iloc[-1]))
+        close = data['close'].astype(float)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry == None:
+                # the first fit of the market always waits
+                entry = { 'params': self.__submitFit(close, None).result(), 'fitted_at': close.index[-1], 'refit': None, 'results': None, 'close': None }
+                self.entries[key] = entry
+                self.fits += 1
+
+            elif entry['refit'] == None and (close.index > entry['fitted_at']).sum() >= self.refit_candles:
+                # warm started from the last parameters
+                entry['refit'] = (self.__submitFit(close, entry['params']), close.index[-1])
+
+            if entry['refit'] != None and (wait or entry['refit'][0].done()):
+                future, fitted_at = entry['refit']
+                entry['params'] = future.result()
+                entry['fitted_at'] = fitted_at
+                entry['refit'] = None
+                entry['results'] = None
+                self.fits += 1
+
+            entry['results'] = self.__updateResults(entry, close)
+            entry['close'] = close
+
+            return entry['results']
+
+    def getStats(self):
+        """Returns the fits, appends, applies and cached markets"""
+
+        with self.lock:
+            return { 'fits': self.fits, 'appends': self.appends, 'applies': self.applies, 'entries': len(self.entries) }
+
+    def clear(self):
+        """Forgets every fit"""
+
+        with self.lock:
+            self.entries = {}
+            self.fits = 0
+            self.appends = 0
+            self.applies = 0
+
+    def close(self):
+        """Stops the worker processes"""
+
+        if self.executor != None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __updateResults(self, entry, close):
+        """Returns the results of the prices with the fitted parameters (private function)"""
+
+        results = entry['results']
+        cached = entry['close']
+
+        if results == None:
+            self.applies += 1
+            return getSeasonalARIMAModel(close).smooth(entry['params'])
+
+        if len(close) == len(cached) and close.index.equals(cached.index) and np.array_equal(close.to_numpy(), cached.to_numpy()):
+            return results
+
+        # new candles after the candles of the results are appended, other changes are applied
+        n = len(cached)
+        if len(close) > n and close.index[:n].equals(cached.index) and np.array_equal(close.to_numpy()[:n], cached.to_numpy()):
+            self.appends += 1
+            return results.append(close.iloc[len(cached):], refit=False)
+
+        self.applies += 1
+        return results.apply(close, refit=False)
+
+    def __submitFit(self, close, start_params):
+        """Returns the future parameters of the prices (private function)"""
+
+        if self.workers == 0:
+            future = Future()
+            future.set_result(fitParameters(close.to_numpy(), start_params))
+            return future
+
+        if self.executor == None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        return self.executor.submit(fitParameters, close.to_numpy(), start_params)
+
+# shared by the technical analysis of every market in the process
+forecast_service = ForecastService()
@@ -0,0 +1,121 @@
+"""Process-wide cache of calculated technical analysis indicators"""
+
+import hashlib, threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+class IndicatorCache():
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """Indicator Cache object model
+
+        The columns of each indicator are kept per candle content, so that the
+        live bot, the trend checks, the graphs and other markets of the
+        process never calculate the same indicator on the same candles twice.
+        The least recently used indicators are evicted to stay within the size.
+
+        Parameters
+        ----------
+        max_bytes : int
+            Maximum size of the cached columns, 0 disables the cache
+        """
+
+        if not isinstance(max_bytes, int) or max_bytes < 0:
+            raise ValueError('Maximum bytes must be an integer of 0 or more.')
+
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.clear()
+
+    def getKey(self, data):
+        """Returns the key of the candles: market, granularity, last candle timestamp and content hash
+
+        Parameters
+        ----------
+        data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        """
+
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        if len(data) == 0:
+            return None
+
+        content = hashlib.blake2b(digest_size=16)
+        content.update(pd.util.hash_pandas_object(data.index, index=False).to_numpy())
+        for column in [ 'low', 'high', 'open', 'close', 'volume' ]:
+            content.update(np.ascontiguousarray(data[column].to_numpy(dtype='float64')).view('uint8'))
+
+        return (str(data['market'].iloc[-1]), str(data['granularity'].iloc[-1]), str(data.index[-1]), content.hexdigest())
+
+    def get(self, key, indicator):
+        """Returns the cached columns of an indicator, None if not cached
+
+        Parameters
+        ----------
+        key : tuple
+            Candles of the indicator, see getKey()
+        indicator : str
+            Name of the indicator, E.g. 'macd'
+        """
+
+        with self.lock:
+            columns = self.entries.get((key, indicator))
+
+            if columns is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end((key, indicator))
+            self.hits += 1
+
+        return { column: values.copy() for column, values in columns.items() }
+
+    def set(self, key, indicator, columns):
+        """Caches the columns of an indicator, evicting the least recently used
+
+        Parameters
+        ----------
+        key : tuple
+            Candles of the indicator, see getKey()
+        indicator : str
+            Name of the indicator, E.g. 'macd'
+        columns : dict
+            Column name and values of each column of the indicator
+        """
+
+        columns = { column: np.array(values) for column, values in columns.items() }
+        size = sum(values.nbytes for values in columns.values())
+
+        if key is None or size > self.max_bytes:
+            return
+
+        with self.lock:
+            if (key, indicator) in self.entries:
+                self.bytes -= sum(values.nbytes for values in self.entries.pop((key, indicator)).values())
+
+            self.entries[(key, indicator)] = columns
+            self.bytes += size
+
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= sum(values.nbytes for values in evicted.values())
+
+    def getStats(self):
+        """Returns the hits, misses, entries and size of the cache"""
+
+        with self.lock:
+            return { 'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries), 'bytes': self.bytes }
+
+    def clear(self):
+        """Empties the cache"""
+
+        with self.lock:
+            self.entries = OrderedDict()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+# shared by the technical analysis of every market in the process
+indicator_cache = IndicatorCache()
@@ -0,0 +1,260 @@
+"""Moving average and deviation kernels of the technical analysis
+
+The kernels take NumPy arrays without missing values and write their results
+straight into NumPy buffers, instead of deriving a chain of intermediate
+Pandas Series per indicator. Each kernel has a step function calculating its
+last value from a running state, with the same floating point operations in
+the same order, so the incremental technical analysis matches the full
+analysis exactly.
+"""
+
+import numpy as np
+from scipy.signal import lfilter
+
+def exponentialMean(values, com, adjust=False, min_periods=0, out=None):
+    """Exponentially weighted mean with the centre of mass com, as Pandas ewm(com=com).mean()
+
+    Parameters
+    ----------
+    values : NumPy array
+        Values without missing values
+    com : float
+        Centre of mass, E.g. (span - 1) / 2
+    adjust : bool
+        False: y[i] = (1 - alpha) * y[i - 1] + alpha * x[i], seeded with the first value
+        True: the weighted sum of the values divided by the sum of the weights
+    min_periods : int
+        Values before the first min_periods values are NaN
+    out : NumPy array, optional
+        Buffer of the results, the length of the values
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    if out is None:
+        out = np.empty(len(values), dtype=np.float64)
+
+    if len(values) == 0:
+        return out
+
+    alpha = 1. / (1. + com)
+    beta = 1. - alpha
+
+    if adjust:
+        # the weights are filtered as ones to divide by the same rounding as the values
+        out[:] = lfilter([1.], [1., -beta], values)
+        np.divide(out, lfilter([1.], [1., -beta], np.ones(len(values))), out=out)
+    else:
+        out[0] = values[0]
+        if len(values) > 1:
+            out[1:] = lfilter([alpha], [1., -beta], values[1:], zi=[beta * values[0]])[0]
+
+    out[:max(min_periods, 1) - 1] = np.nan
+
+    return out
+
+def exponentialMeanStep(state, value, com, adjust=False, min_periods=0):
+    """Next value of exponentialMean() from its running state, E.g. { 'count': 0, 'mean': 0.0, 'weight': 0.0 }"""
+
+    alpha = 1. / (1. + com)
+    beta = 1. - alpha
+
+    if adjust:
+        state['mean'] = beta * state['mean'] + value
+        state['weight'] = beta * state['weight'] + 1.
+    elif state['count'] == 0:
+        state['mean'] = value
+    else:
+        state['mean'] = beta * state['mean'] + alpha * value
+
+    state['count'] += 1
+
+    if state['count'] < max(min_periods, 1):
+        return np.nan
+
+    return state['mean'] / state['weight'] if adjust else state['mean']
+
+def rollingSum(values, window, out=None):
+    """Sums of the last window values, fewer at the start
+
+    The values are split into blocks of the window, each window is the end of
+    a block plus the start of the next, both cumulative sums within blocks.
+    Sums are never carried across blocks, so there is no drift.
+
+    Parameters
+    ----------
+    values : NumPy array
+        Values without missing values
+    window : int
+        Number of values summed
+    out : NumPy array, optional
+        Buffer of the results, the length of the values
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    if out is None:
+        out = np.empty(len(values), dtype=np.float64)
+
+    if len(values) == 0:
+        return out
+
+    blocks = np.zeros((-(-len(values) // window), window))
+    blocks.ravel()[:len(values)] = values
+
+    # the sums to the end of each block, then the sums from the start of each block
+    suffix = np.cumsum(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    np.cumsum(blocks, axis=1, out=blocks)
+    out[:] = blocks.ravel()[:len(values)]
+
+    # windows ending within a block, after the first, start in the previous block
+    ends = np.arange(window, len(values))
+    ends = ends[ends % window != window - 1]
+    out[ends] += suffix[ends - window + 1]
+
+    return out
+
+def rollingSumStep(state, values, window):
+    """Next value of rollingSum() from its running state, E.g. { 'count': 0, 'prefix': 0.0, 'suffix': None }
+
+    The values are those so far, the last being the new value. The sum from
+    the start of the block is carried, the sums to the end of the previous
+    block are calculated once when the block after it starts, so a value
+    costs 2 additions and window - 1 more once per block of window values.
+    """
+
+    position = state['count']
+    offset = position % window
+    value = np.float64(values[-1])
+
+    if offset == 0:
+        state['prefix'] = value
+        state['suffix'] = None
+    else:
+        state['prefix'] = state['prefix'] + value
+
+    state['count'] += 1
+
+    if position < window or offset == window - 1:
+        return state['prefix']
+
+    # the previous block is complete, only the last value can be revised
+    if state['suffix'] is None:
+        previous = np.asarray(values[position - offset - window:position - offset], dtype=np.float64)
+        state['suffix'] = np.cumsum(previous[::-1])[::-1]
+
+    return state['prefix'] + state['suffix'][offset + 1]
+
+def rollingMean(values, window, min_periods=None, out=None):
+    """Mean of the last window values, as Pandas rolling(window, min_periods).mean()
+
+    Parameters
+    ----------
+    values : NumPy array
+        Values without missing values
+    window : int
+        Number of values averaged
+    min_periods : int, optional
+        Means of fewer values are NaN, defaults to the window
+    out : NumPy array, optional
+        Buffer of the results, the length of the values
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    if min_periods is None:
+        min_periods = window
+
+    out = rollingSum(values, window, out)
+
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    np.divide(out, counts, out=out)
+
+    # a window of equal values is their value, without rounding
+    constant = getRunLengths(values) >= counts
+    out[constant] = values[constant]
+
+    out[:max(min_periods, 1) - 1] = np.nan
+
+    return out
+
+def rollingMeanStep(state, values, window, min_periods=None):
+    """Next value of rollingMean() from its running state, E.g. { 'count': 0, 'prefix': 0.0, 'suffix': None, 'run': 0, 'prev': np.nan }"""
+
+    if min_periods is None:
+        min_periods = window
+
+    value = values[-1]
+    total = rollingSumStep(state, values, window)
+    count = min(state['count'], window)
+
+    state['run'] = state['run'] + 1 if value == state['prev'] else 1
+    state['prev'] = value
+
+    if count < max(min_periods, 1):
+        return np.nan
+
+    if state['run'] >= count:
+        return np.float64(value)
+
+    return total / count
+
+def rollingStd(values, window, ddof=1, out=None):
+    """Standard deviation of the last window values, as Pandas rolling(window).std(ddof)
+
+    The squared deviations from the mean of each window are summed, which
+    avoids the cancellation of a running sum of squares.
+
+    Parameters
+    ----------
+    values : NumPy array
+        Values without missing values
+    window : int
+        Number of values, the deviations of fewer values are NaN
+    ddof : int
+        Delta degrees of freedom
+    out : NumPy array, optional
+        Buffer of the results, the length of the values
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    if out is None:
+        out = np.empty(len(values), dtype=np.float64)
+
+    mean = rollingMean(values, window)
+    deviation = np.empty(len(values), dtype=np.float64)
+
+    out[:] = 0.
+    for lag in range(min(window, len(values)) - 1, -1, -1):
+        np.subtract(values[:len(values) - lag], mean[lag:], out=deviation[lag:])
+        np.multiply(deviation[lag:], deviation[lag:], out=deviation[lag:])
+        out[lag:] += deviation[lag:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(out, window - ddof, out=out)
+    np.sqrt(out, out=out)
+
+    out[:window - 1] = np.nan
+
+    return out
+
+def rollingStdStep(values, mean, window, ddof=1):
+    """Last value of rollingStd() from the values and the mean of the last window values
+
+    The squared deviations of the window are summed again for every value,
+    window operations, as the mean they deviate from changes every value.
+    """
+
+    if len(values) < window:
+        return np.nan
+
+    deviation = np.asarray(values[-window:], dtype=np.float64) - mean
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sqrt(np.cumsum(deviation * deviation)[-1] / (window - ddof))
+
+def getRunLengths(values):
+    """Number of consecutive equal values ending at each value"""
+
+    positions = np.arange(len(values))
+    starts = np.ones(len(values), dtype=bool)
+    np.not_equal(values[1:], values[:-1], out=starts[1:])
+
+    return positions - np.maximum.accumulate(np.where(starts, positions, 0)) + 1
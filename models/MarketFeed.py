@@ -0,0 +1,301 @@
+"""Live candles and prices of a market built from the exchange websocket feeds"""
+
+import aiohttp, asyncio, json, threading, time
+import pandas as pd
+
+class MarketFeed():
+    def __init__(self, app, interval=5):
+        """Market Feed object model
+
+        Coinbase Pro ticker messages and Binance kline messages update the
+        candles of the market as they arrive, so the bot is told as soon as a
+        candle closes or the price changes, without polling the REST APIs.
+        The feed runs its own event loop in a background thread.
+
+        Parameters
+        ----------
+        app : object
+            PyCryptoBot object of the market
+        interval : int
+            Minimum seconds between price change events, a closed candle is always an event
+        """
+
+        if not app.getExchange() in [ 'coinbasepro', 'binance' ]:
+            raise ValueError('Exchange options: coinbasepro, binance')
+
+        self.app = app
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.thread = None
+        self.running = False
+
+        self.granularity = None
+        # closed candles and the forming candle
+        self.df = pd.DataFrame()
+        self.candle = None
+        self.price = 0.0
+        self.last_message = 0
+        self.last_price_event = 0
+        self.last_closed = None
+        self.resubscribe = False
+
+    def addListener(self, listener):
+        """Adds a function called with 'candle' when a candle closes and 'price' when the price changes"""
+
+        self.listeners.append(listener)
+
+    def start(self):
+        """Loads the recent candles and starts reading the websocket feed in a background thread"""
+
+        self.seed()
+        self.running = True
+        self.thread = threading.Thread(target=lambda: asyncio.run(self.__run()), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops reading the websocket feed"""
+
+        self.running = False
+
+    def isLive(self, timeout=60):
+        """Returns True if a message was received within the timeout in seconds"""
+
+        return self.last_message > time.time() - timeout
+
+    def seed(self):
+        """Loads the recent candles of the granularity of the app"""
+
+        data = self.app.getHistoricalData(self.app.getMarket(), self.app.getGranularity())
+
+        if not isinstance(data, pd.DataFrame) or len(data) == 0:
+            raise Exception('Unable to load the candles of ' + self.app.getMarket())
+
+        with self.lock:
+            self.granularity = self.app.getGranularity()
+            self.df = data[[ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]].astype({ 'low': 'float64', 'high': 'float64', 'open': 'float64', 'close': 'float64', 'volume': 'float64' })
+
+            # the last candle is still forming
+            last = self.df.iloc[-1]
+            self.candle = { 'epoch': int(self.df.index[-1].timestamp()), 'low': last['low'], 'high': last['high'], 'open': last['open'], 'close': last['close'], 'volume': last['volume'] }
+            self.df = self.df.iloc[:-1]
+            self.last_closed = None
+
+            if self.price == 0:
+                self.price = float(last['close'])
+
+    def getMarketData(self):
+        """Returns the trading data, including the forming candle, and the last price"""
+
+        if self.app.getGranularity() != self.granularity:
+            # E.g. a smart switch, the candles of the new granularity are loaded and Binance is subscribed to them
+            self.seed()
+            self.resubscribe = self.app.getExchange() == 'binance'
+
+        with self.lock:
+            df = self.df
+            # a closed Binance kline stays the forming candle until the next kline starts
+            if self.candle != None and self.candle['epoch'] != self.last_closed:
+                df = pd.concat([ df, self.__getCandleDataFrame(self.candle) ])
+
+            return df.tail(300).copy(), self.price
+
+    def getURL(self):
+        """Returns the websocket URL of the exchange"""
+
+        if self.app.getExchange() == 'coinbasepro':
+            if 'sandbox' in self.app.getAPIURL():
+                return 'wss://ws-feed-public.sandbox.pro.coinbase.com'
+            return 'wss://ws-feed.pro.coinbase.com'
+
+        stream = self.app.getMarket().lower() + '@kline_' + str(self.granularity)
+        if 'testnet' in self.app.getAPIURL():
+            return 'wss://testnet.binance.vision/ws/' + stream
+        return 'wss://stream.binance.com:9443/ws/' + stream
+
+    def getSubscription(self):
+        """Returns the subscribe message of the exchange, None if the URL subscribes"""
+
+        if self.app.getExchange() == 'coinbasepro':
+            return { 'type': 'subscribe', 'product_ids': [ self.app.getMarket() ], 'channels': [ 'ticker' ] }
+
+        return None
+
+    def onMessage(self, message):
+        """Updates the candles from a websocket message, returns 'candle', 'price' or None
+
+        Parameters
+        ----------
+        message : dict
+            Coinbase Pro ticker or Binance kline message
+        """
+
+        if self.app.getExchange() == 'coinbasepro':
+            event = self.__onTicker(message)
+        else:
+            event = self.__onKline(message)
+
+        if event == 'price':
+            if time.time() - self.last_price_event < self.interval:
+                return None
+            self.last_price_event = time.time()
+
+        if event != None:
+            for listener in self.listeners:
+                listener(event)
+
+        return event
+
+    async def getMessages(self):
+        """Yields the messages of the websocket feed"""
+
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self.getURL(), heartbeat=30) as websocket:
+                if self.getSubscription() != None:
+                    await websocket.send_json(self.getSubscription())
+
+                async for message in websocket:
+                    if message.type == aiohttp.WSMsgType.TEXT:
+                        yield json.loads(message.data)
+                    elif message.type in [ aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR ]:
+                        return
+
+    async def __run(self):
+        """Reads the feed, reconnecting after errors (private function)"""
+
+        delay = 1
+        while self.running:
+            self.resubscribe = False
+            messages = self.getMessages()
+
+            try:
+                async for message in messages:
+                    self.last_message = time.time()
+                    self.onMessage(message)
+                    delay = 1
+
+                    if not self.running or self.resubscribe:
+                        break
+            except Exception as err:
+                print ('websocket feed error:', err)
+            finally:
+                await messages.aclose()
+
+            if self.running and not self.resubscribe:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+    def __onTicker(self, message):
+        """Adds a Coinbase Pro ticker to the forming candle (private function)"""
+
+        if message.get('type') != 'ticker' or message.get('product_id') != self.app.getMarket() or not 'time' in message:
+            return None
+
+        price = float(message['price'])
+        volume = float(message.get('last_size', 0))
+        epoch = int(pd.Timestamp(message['time']).timestamp())
+
+        with self.lock:
+            start = (epoch // int(self.granularity)) * int(self.granularity)
+            self.price = price
+
+            if self.candle != None and start < self.candle['epoch']:
+                return None
+
+            if self.candle != None and start == self.candle['epoch']:
+                self.candle['low'] = min(self.candle['low'], price)
+                self.candle['high'] = max(self.candle['high'], price)
+                self.candle['close'] = price
+                self.candle['volume'] = self.candle['volume'] + volume
+                return 'price'
+
+            # the first ticker of a candle closes the previous candle
+            closed = self.__closeCandle()
+            self.candle = { 'epoch': start, 'low': price, 'high': price, 'open': price, 'close': price, 'volume': volume }
+
+        return 'candle' if closed else 'price'
+
+    def __onKline(self, message):
+        """Replaces the forming candle with a Binance kline (private function)"""
+
+        if message.get('e') != 'kline' or message.get('s') != self.app.getMarket() or message['k'].get('i') != self.granularity:
+            return None
+
+        kline = message['k']
+        start = int(kline['t']) // 1000
+        candle = { 'epoch': start, 'low': float(kline['l']), 'high': float(kline['h']), 'open': float(kline['o']), 'close': float(kline['c']), 'volume': float(kline['v']) }
+
+        with self.lock:
+            self.price = candle['close']
+
+            if self.candle != None and start < self.candle['epoch']:
+                return None
+
+            closed = False
+            if self.candle != None and start > self.candle['epoch']:
+                closed = self.__closeCandle()
+
+            self.candle = candle
+
+            # the last update of a kline marks it as closed
+            if kline.get('x') == True:
+                closed = self.__closeCandle() or closed
+
+        return 'candle' if closed else 'price'
+
+    def __closeCandle(self):
+        """Moves the forming candle to the closed candles, returns False if it was already closed (private function)"""
+
+        if self.candle == None or self.candle['epoch'] == self.last_closed:
+            return False
+
+        self.last_closed = self.candle['epoch']
+        self.df = pd.concat([ self.df, self.__getCandleDataFrame(self.candle) ]).tail(300)
+
+        return True
+
+    def __getCandleDataFrame(self, candle):
+        """Returns a candle as trading data (private function)"""
+
+        tsidx = pd.DatetimeIndex([ pd.Timestamp(candle['epoch'], unit='s') ], name='ts')
+
+        return pd.DataFrame({ 'date': tsidx, 'market': self.app.getMarket(), 'granularity': self.granularity,
+            'low': candle['low'], 'high': candle['high'], 'open': candle['open'], 'close': candle['close'], 'volume': candle['volume'] }, index=tsidx)
+
+class ReplayFeed(MarketFeed):
+    def __init__(self, app, filename, interval=0):
+        """Replay Feed object model
+
+        Stands in for the websocket feed by replaying recorded messages, one
+        JSON message per line, E.g. to test the bot without a connection.
+
+        Parameters
+        ----------
+        app : object
+            PyCryptoBot object of the market
+        filename : str
+            File of the recorded messages
+        interval : int
+            Minimum seconds between price change events
+        """
+
+        MarketFeed.__init__(self, app, interval)
+        self.filename = filename
+
+    async def getMessages(self):
+        """Yields the recorded messages"""
+
+        with open(self.filename) as replay_file:
+            for line in replay_file:
+                if line.strip() != '':
+                    yield json.loads(line)
+
+    def replay(self):
+        """Loads the recent candles and replays every message in this thread, returns the events"""
+
+        self.seed()
+
+        async def replayMessages():
+            return [ self.onMessage(message) async for message in self.getMessages() ]
+
+        return asyncio.run(replayMessages())
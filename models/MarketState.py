@@ -0,0 +1,90 @@
+"""Trading state of a market run by the bot"""
+
+import threading
+
+class MarketState():
+    def __init__(self, app, account=None):
+        """Market State object model
+
+        Holds everything the bot job remembers between iterations of a market,
+        so several markets can share one process and one scheduler.
+
+        Parameters
+        ----------
+        app : object
+            PyCryptoBot object of the market
+        account : object, optional
+            TradingAccount object, required for live trading
+        """
+
+        self.app = app
+        self.account = account
+
+        # initial state is to wait
+        self.action = 'WAIT'
+        self.last_action = ''
+        self.last_df_index = ''
+        self.buy_state = ''
+        self.eri_text = ''
+        self.last_buy = 0
+        self.iterations = 0
+        self.buy_count = 0
+        self.sell_count = 0
+        self.buy_sum = 0
+        self.sell_sum = 0
+        self.fib_high = 0
+        self.fib_low = 0
+        self.sim_ta = None
+
+        # the next scheduled job of the market
+        self.event = None
+
+        # websocket feed of the market and the job it triggered
+        self.feed = None
+        self.trigger_event = None
+
+        # the order tracker is saved when polled, and by a triggered job after a closed candle or an order
+        self.tracker_due = False
+        self.lock = threading.Lock()
+
+    def schedule(self, sc, delay, action, argument=()):
+        """Replaces the next scheduled job of the market
+
+        Parameters
+        ----------
+        sc : sched.scheduler
+            Scheduler shared by the markets
+        delay : int
+            Seconds until the job runs
+        action : function
+            Job to run
+        argument : tuple, optional
+            Arguments of the job
+        """
+
+        with self.lock:
+            if self.event != None and self.event in sc.queue:
+                sc.cancel(self.event)
+
+            self.event = sc.enter(delay, 1, action, argument)
+
+            return self.event
+
+    def trigger(self, sc, action, argument=()):
+        """Schedules a job to run now, E.g. from the websocket feed thread, unless a triggered job is still waiting
+
+        Parameters
+        ----------
+        sc : sched.scheduler
+            Scheduler shared by the markets
+        action : function
+            Job to run
+        argument : tuple, optional
+            Arguments of the job
+        """
+
+        with self.lock:
+            if self.trigger_event == None or not self.trigger_event in sc.queue:
+                self.trigger_event = sc.enter(0, 1, action, argument)
+
+            return self.trigger_event
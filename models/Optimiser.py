@@ -0,0 +1,118 @@
+"""Optimises the strategy settings by backtesting them in parallel"""
+
+import itertools, random
+import pandas as pd
+from models.Backtest import Backtest, runBacktests
+
+def backtestSettings(settings, backtest):
+    """Backtests settings, in a worker process"""
+
+    backtest.run(settings)
+    return backtest.getSummary()
+
+class Optimiser():
+    def __init__(self, app, trading_data=pd.DataFrame()):
+        """Optimiser object model
+
+        The technical analysis is calculated once and sent to each worker
+        process when it starts, so a configuration only costs a walk over the
+        precomputed rows.
+
+        Parameters
+        ----------
+        app : object
+            PyCryptoBot object, the settings not searched are read from it
+        trading_data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        """
+
+        self.backtest = Backtest(app, trading_data)
+        self.results = pd.DataFrame()
+
+    def getGridSearch(self, space):
+        """Returns every combination of the values of a search space
+
+        Parameters
+        ----------
+        space : dict
+            Values of each strategy setting, E.g. { 'sellupperpcnt': [ None, 5, 10 ] }
+        """
+
+        self.__validateSpace(space)
+
+        keys = list(space.keys())
+        return [ dict(zip(keys, values)) for values in itertools.product(*[ space[key] for key in keys ]) ]
+
+    def getRandomSearch(self, space, samples=100, seed=None):
+        """Returns distinct random combinations of the values of a search space
+
+        Parameters
+        ----------
+        space : dict
+            Values of each strategy setting, E.g. { 'sellupperpcnt': [ None, 5, 10 ] }
+        samples : int
+            Number of combinations, fewer if the space is smaller
+        seed : int, optional
+            Seed of the random generator
+        """
+
+        grid = self.getGridSearch(space)
+
+        if samples >= len(grid):
+            return grid
+
+        return random.Random(seed).sample(grid, samples)
+
+    def run(self, settings_list, workers=None):
+        """Backtests each settings and returns the results ranked by margin
+
+        Parameters
+        ----------
+        settings_list : list
+            Strategy settings overriding the app, see Backtest.getSettings()
+        workers : int, optional
+            Number of worker processes, 1 runs the backtests in this process
+        """
+
+        if not isinstance(settings_list, list) or len(settings_list) == 0:
+            raise ValueError('Settings list is empty.')
+
+        summaries = runBacktests(backtestSettings, settings_list, (self.backtest,), workers)
+
+        results = pd.DataFrame(settings_list)
+        for key in [ 'margin', 'buy_count', 'sell_count', 'win_rate', 'max_drawdown' ]:
+            results[key] = [ summary[key] for summary in summaries ]
+
+        self.results = results.sort_values('margin', ascending=False, kind='mergesort').reset_index(drop=True)
+
+        return self.results
+
+    def getResults(self):
+        """Returns the ranked results of the last run"""
+
+        return self.results
+
+    def printResults(self, top=10):
+        """Prints the best results of the last run"""
+
+        if len(self.results) == 0:
+            return
+
+        print ("\nOptimiser Results (" + str(len(self.results)) + " configurations)\n")
+        print (self.results.head(top).to_string())
+        print ("\n  ** non-live simulation, assuming highest fees", "\n")
+
+    def __validateSpace(self, space):
+        """Validates the search space (private function)"""
+
+        if not isinstance(space, dict) or len(space) == 0:
+            raise ValueError('Search space is empty.')
+
+        settings = self.backtest.getSettings()
+
+        for key in space:
+            if not key in settings:
+                raise KeyError("Unknown strategy setting '" + str(key) + "'")
+
+            if not isinstance(space[key], list) or len(space[key]) == 0:
+                raise ValueError("Search space of '" + str(key) + "' is not a list of values.")
@@ -0,0 +1,166 @@
+"""Local ledger of the done orders of an account and the trades they pair into"""
+
+import sqlite3
+import numpy as np
+import pandas as pd
+
+class OrderLedger():
+    def __init__(self, filename='orders.db'):
+        """Order Ledger object model
+
+        Orders are stored in SQLite as they are synced from the exchange, so
+        only orders newer than the last synced order are downloaded. Buys and
+        sells are paired into trades once, the orders after the last paired
+        sell are all that is left to pair when new orders arrive.
+
+        Parameters
+        ----------
+        filename : str
+            SQLite database file, ':memory:' for a ledger that is not persisted
+        """
+
+        if not isinstance(filename, str) or filename == '':
+            raise TypeError('Filename required.')
+
+        self.filename = filename
+        self.conn = sqlite3.connect(filename)
+        # times are epoch microseconds in UTC
+        self.conn.execute('CREATE TABLE IF NOT EXISTS orders (exchange TEXT NOT NULL, market TEXT NOT NULL, created_at INTEGER NOT NULL, ' \
+            + 'action TEXT NOT NULL, type TEXT, size REAL, value REAL, status TEXT, price REAL, UNIQUE (exchange, market, created_at, action, size, value))')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS trades (exchange TEXT NOT NULL, market TEXT NOT NULL, status TEXT, ' \
+            + 'buy_at INTEGER NOT NULL, buy_type TEXT, buy_size REAL, buy_value REAL, buy_price REAL, ' \
+            + 'sell_at INTEGER NOT NULL, sell_type TEXT, sell_size REAL, sell_value REAL, sell_price REAL, PRIMARY KEY (exchange, market, buy_at, sell_at))')
+        self.conn.commit()
+
+        self.order_columns = [ 'created_at', 'market', 'action', 'type', 'size', 'value', 'status', 'price' ]
+        self.trade_columns = [ 'status', 'market', 'buy_at', 'buy_type', 'buy_size', 'buy_value', 'buy_price',
+            'sell_at', 'sell_type', 'sell_size', 'sell_value', 'sell_price' ]
+
+    def close(self):
+        """Closes the SQLite database"""
+
+        self.conn.close()
+
+    def getLastOrderTime(self, exchange, market=''):
+        """Returns the time of the last stored order of the market, or of every market, None if there are none"""
+
+        sql = 'SELECT MAX(created_at) FROM orders WHERE exchange = ?'
+        params = [ exchange ]
+        if market != '':
+            sql += ' AND market = ?'
+            params.append(market)
+
+        row = self.conn.execute(sql, params).fetchone()
+
+        if row[0] == None:
+            return None
+
+        return pd.Timestamp(row[0], unit='us')
+
+    def addOrders(self, exchange, orders):
+        """Stores the orders not already stored, returns the number stored
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        orders : Pandas DataFrame
+            Orders as returned by TradingAccount.getOrders()
+        """
+
+        if not isinstance(orders, pd.DataFrame):
+            raise TypeError('Orders are not a Pandas dataframe.')
+
+        if len(orders) == 0:
+            return 0
+
+        if list(orders.keys()) != self.order_columns:
+            raise ValueError('Orders do not contain ' + ', '.join(self.order_columns))
+
+        rows = pd.DataFrame({ 'exchange': exchange, 'created_at': self.__getEpochs(orders['created_at']) })
+        for column in [ 'market', 'action', 'type', 'status' ]:
+            rows[column] = orders[column].astype(str).to_numpy()
+        for column in [ 'size', 'value', 'price' ]:
+            rows[column] = orders[column].astype(float).to_numpy()
+
+        before = self.conn.total_changes
+        self.conn.executemany('INSERT OR IGNORE INTO orders (exchange, market, created_at, action, type, size, value, status, price) ' \
+            + 'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows[[ 'exchange', 'market', 'created_at', 'action', 'type', 'size', 'value', 'status', 'price' ]] \
+            .astype(object).itertuples(index=False, name=None))
+        self.conn.commit()
+
+        return self.conn.total_changes - before
+
+    def pairOrders(self, exchange, market=''):
+        """Pairs the done orders after the last paired sell of each market, returns the new trades
+
+        The first buy of each run of buys is paired with the first sell of the
+        run of sells after it, like the order tracker has always paired them.
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        market : str, optional
+            Pairs the orders of the market, defaults to every market
+        """
+
+        sql = 'SELECT o.market, o.created_at, o.action, o.type, o.size, o.value, o.status, o.price FROM orders o ' \
+            + 'LEFT JOIN (SELECT market, MAX(sell_at) AS last_sell FROM trades WHERE exchange = ? GROUP BY market) t ON o.market = t.market ' \
+            + "WHERE o.exchange = ? AND o.status = 'done' AND (t.last_sell IS NULL OR o.created_at > t.last_sell)"
+        params = [ exchange, exchange ]
+        if market != '':
+            sql += ' AND o.market = ?'
+            params.append(market)
+
+        orders = pd.read_sql_query(sql + ' ORDER BY o.market, o.created_at, o.rowid', self.conn, params=params)
+
+        # the first order of each run of buys or sells of a market
+        market_values = orders['market'].to_numpy()
+        action_values = orders['action'].to_numpy()
+        first = np.ones(len(orders), dtype=bool)
+        first[1:] = (market_values[1:] != market_values[:-1]) | (action_values[1:] != action_values[:-1])
+        runs = orders[first].reset_index(drop=True)
+
+        # a run of buys followed by a run of sells of the same market is a trade
+        buys = runs.iloc[:-1].reset_index(drop=True)
+        sells = runs.iloc[1:].reset_index(drop=True)
+        paired = ((buys['action'] == 'buy') & (sells['action'] == 'sell') & (buys['market'] == sells['market'])).to_numpy()
+        buys = buys[paired]
+        sells = sells[paired]
+
+        trades = pd.DataFrame({ 'exchange': exchange, 'market': buys['market'].to_numpy(), 'status': sells['status'].to_numpy() })
+        for side, side_orders in [ ('buy', buys), ('sell', sells) ]:
+            for column in [ 'created_at', 'type', 'size', 'value', 'price' ]:
+                trades[side + ('_at' if column == 'created_at' else '_' + column)] = side_orders[column].to_numpy()
+
+        self.conn.executemany('INSERT OR IGNORE INTO trades (' + ', '.join(trades.columns) + ') VALUES (' + ', '.join([ '?' ] * len(trades.columns)) + ')',
+            trades.astype(object).itertuples(index=False, name=None))
+        self.conn.commit()
+
+        return self.__getTrackerFrame(trades)
+
+    def getTrades(self, exchange, market=''):
+        """Returns every paired trade of the market, or of every market"""
+
+        sql = 'SELECT * FROM trades WHERE exchange = ?'
+        params = [ exchange ]
+        if market != '':
+            sql += ' AND market = ?'
+            params.append(market)
+
+        return self.__getTrackerFrame(pd.read_sql_query(sql + ' ORDER BY market, buy_at', self.conn, params=params))
+
+    def __getTrackerFrame(self, trades):
+        """Returns trades with the columns of the order tracker (private function)"""
+
+        df = trades.reindex(columns=self.trade_columns)
+        df['buy_at'] = pd.to_datetime(df['buy_at'], unit='us')
+        df['sell_at'] = pd.to_datetime(df['sell_at'], unit='us')
+
+        return df.reset_index(drop=True)
+
+    def __getEpochs(self, times):
+        """Returns times as epoch microseconds in UTC (private function)"""
+
+        return (pd.to_datetime(times, utc=True).dt.tz_localize(None).to_numpy(dtype='datetime64[us]').astype('int64'))
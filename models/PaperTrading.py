@@ -0,0 +1,242 @@
+"""Simulated exchange filling the market orders of test trading"""
+
+from datetime import datetime
+import pandas as pd
+
+class PaperOrder():
+    """Done order of the simulated exchange"""
+
+    __slots__ = [ 'created_at', 'market', 'action', 'type', 'size', 'value', 'status', 'price' ]
+
+    def __init__(self, created_at, market, action, size, value, price, type='market', status='done'):
+        self.created_at = created_at
+        self.market = market
+        self.action = action
+        self.type = type
+        self.size = size
+        self.value = value
+        self.status = status
+        self.price = price
+
+class PercentageFee():
+    def __init__(self, rate=0.005):
+        """Percentage Fee object model
+
+        Parameters
+        ----------
+        rate : float
+            Fee charged on the amount spent by an order, 0.005 is 0.5%
+        """
+
+        if not isinstance(rate, float) and not isinstance(rate, int):
+            raise TypeError('Fee rate not numeric.')
+
+        if rate < 0 or rate >= 1:
+            raise ValueError('Fee rate must be 0 or more and less than 1.')
+
+        self.rate = rate
+
+    def getFee(self, action, amount):
+        """Returns the fee on the amount spent, QUOTE for a buy and BASE for a sell"""
+
+        return amount * self.rate
+
+class PercentageSlippage():
+    def __init__(self, rate=0.0):
+        """Percentage Slippage object model
+
+        Parameters
+        ----------
+        rate : float
+            Fraction the fill price is worse than the market price, 0.001 is 0.1%
+        """
+
+        if not isinstance(rate, float) and not isinstance(rate, int):
+            raise TypeError('Slippage rate not numeric.')
+
+        if rate < 0 or rate >= 1:
+            raise ValueError('Slippage rate must be 0 or more and less than 1.')
+
+        self.rate = rate
+
+    def getPrice(self, action, price):
+        """Returns the fill price of a market order at the price"""
+
+        if action == 'buy':
+            return price * (1 + self.rate)
+
+        return price * (1 - self.rate)
+
+class PaperTradingEngine():
+    def __init__(self, balances={ 'QUOTE': 1000.0, 'BASE': 0.0 }, fee_model=None, slippage_model=None):
+        """Paper Trading Engine object model
+
+        Balances are a dictionary and orders are slotted objects, so a fill
+        is a few float operations. The orders are only exported as a Pandas
+        dataframe when they are requested.
+
+        Parameters
+        ----------
+        balances : dict
+            Opening balance of each currency
+        fee_model : object, optional
+            Fee of an order, see PercentageFee, defaults to 0.5%
+        slippage_model : object, optional
+            Fill price of an order, see PercentageSlippage, defaults to none
+        """
+
+        if not isinstance(balances, dict):
+            raise TypeError('Balances is not a dictionary.')
+
+        self.balances = { currency: float(balance) for currency, balance in balances.items() }
+        self.fee_model = PercentageFee() if fee_model == None else fee_model
+        self.slippage_model = PercentageSlippage() if slippage_model == None else slippage_model
+        self.order_columns = [ 'created_at', 'market', 'action', 'type', 'size', 'value', 'status', 'price' ]
+        self.clearOrders()
+
+    def clearOrders(self):
+        """Removes every order"""
+
+        self.orders = []
+        self.orders_df = None
+
+    def getBalance(self, currency):
+        """Returns the balance of the currency, 0 for a currency never held"""
+
+        return self.balances.get(currency, 0.0)
+
+    def getBalances(self):
+        """Returns the balances as a Pandas dataframe of currency, balance, hold and available"""
+
+        currencies = list(self.balances.keys())
+        balances = list(self.balances.values())
+
+        return pd.DataFrame({ 'currency': currencies, 'balance': balances, 'hold': 0.0, 'available': balances },
+            columns=[ 'currency', 'balance', 'hold', 'available' ])
+
+    def renameCurrency(self, placeholder, currency):
+        """Renames a placeholder balance, E.g. 'QUOTE', once the currency is known"""
+
+        if placeholder in self.balances and currency not in self.balances:
+            self.balances = { currency if name == placeholder else name: balance for name, balance in self.balances.items() }
+
+    def buy(self, market, base_currency, quote_currency, quote_amount, price, created_at=None):
+        """Fills a market buy spending the QUOTE amount, returns the order
+
+        Parameters
+        ----------
+        market : str
+            Market of the order, E.g. 'BTC-GBP'
+        base_currency : str
+            Currency bought
+        quote_currency : str
+            Currency spent
+        quote_amount : float
+            QUOTE amount spent, including the fee
+        price : float
+            Market price
+        created_at : datetime, optional
+            Time of the order, defaults to now
+        """
+
+        if quote_amount <= 0:
+            raise ValueError('Invalid QUOTE amount.')
+
+        if quote_amount > self.getBalance(quote_currency):
+            raise Exception('Insufficient funds.')
+
+        price = self.slippage_model.getPrice('buy', price)
+        value = quote_amount - self.fee_model.getFee('buy', quote_amount)
+        size = value / price
+
+        self.balances[quote_currency] = self.getBalance(quote_currency) - quote_amount
+        self.balances[base_currency] = self.getBalance(base_currency) + size
+
+        return self.__addOrder(created_at, market, 'buy', float('{:.8f}'.format(size)), value, price)
+
+    def sell(self, market, base_currency, quote_currency, base_amount, price, created_at=None):
+        """Fills a market sell of the BASE amount, returns the order
+
+        Parameters
+        ----------
+        market : str
+            Market of the order, E.g. 'BTC-GBP'
+        base_currency : str
+            Currency sold
+        quote_currency : str
+            Currency received
+        base_amount : float
+            BASE amount sold, including the fee
+        price : float
+            Market price
+        created_at : datetime, optional
+            Time of the order, defaults to now
+        """
+
+        if base_amount <= 0:
+            raise ValueError('Invalid BASE amount.')
+
+        if base_amount > self.getBalance(base_currency):
+            raise Exception('Insufficient funds.')
+
+        price = self.slippage_model.getPrice('sell', price)
+        size = base_amount - self.fee_model.getFee('sell', base_amount)
+        value = price * size
+
+        self.balances[base_currency] = self.getBalance(base_currency) - base_amount
+        self.balances[quote_currency] = self.getBalance(quote_currency) + value
+
+        return self.__addOrder(created_at, market, 'sell', size, float('{:.8f}'.format(value)), price)
+
+    def setOrders(self, orders):
+        """Replaces the orders with those of a Pandas dataframe, E.g. as returned by getOrders()"""
+
+        if not isinstance(orders, pd.DataFrame):
+            raise TypeError('Orders are not a Pandas dataframe.')
+
+        self.clearOrders()
+
+        if len(orders) == 0:
+            return
+
+        if list(orders.keys()) != self.order_columns:
+            raise ValueError('Orders do not contain ' + ', '.join(self.order_columns))
+
+        for created_at, market, action, type, size, value, status, price in orders.itertuples(index=False, name=None):
+            self.orders.append(PaperOrder(pd.Timestamp(created_at), market, action, size, value, price, type, status))
+
+    def getOrders(self, market='', iso8601start=''):
+        """Returns the orders as a Pandas dataframe
+
+        Parameters
+        ----------
+        market : str, optional
+            Filters orders by market
+        iso8601start : str, optional
+            Filters the orders created from the ISO 8601 date
+        """
+
+        if self.orders_df is None:
+            self.orders_df = pd.DataFrame([ [ getattr(order, column) for column in self.order_columns ] for order in self.orders ],
+                columns=self.order_columns)
+            self.orders_df['created_at'] = pd.to_datetime(self.orders_df['created_at'])
+            self.orders_df.index = pd.DatetimeIndex(self.orders_df['created_at'].to_numpy())
+
+        df = self.orders_df
+
+        if market != '':
+            df = df[df['market'] == market]
+
+        if iso8601start != '':
+            df = df[df['created_at'] >= pd.Timestamp(iso8601start)]
+
+        return df.copy()
+
+    def __addOrder(self, created_at, market, action, size, value, price):
+        """Appends a done market order (private function)"""
+
+        order = PaperOrder(datetime.now() if created_at == None else created_at, market, action, size, value, price)
+        self.orders.append(order)
+        self.orders_df = None
+
+        return order
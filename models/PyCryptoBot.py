@@ -1,9 +1,12 @@
 import pandas as pd
-import argparse, json, logging, math, random, re, sys, urllib3
+import argparse, asyncio, copy, json, logging, math, random, re, sys, urllib3
 from datetime import datetime, timedelta
-from models.Trading import TechnicalAnalysis
-from models.Binance import AuthAPI as BAuthAPI, PublicAPI as BPublicAPI
-from models.CoinbasePro import AuthAPI as CBAuthAPI, PublicAPI as CBPublicAPI
+from models.CandleStore import CandleStore
+from models.ClientRegistry import client_registry
+from models.ExchangeMetadata import exchange_metadata
+from models.TrendService import TrendService
+from models.Binance import AsyncPublicAPI as BAsyncPublicAPI
+from models.CoinbasePro import AsyncPublicAPI as CBAsyncPublicAPI
 
 # disable insecure ssl warning
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -16,17 +19,21 @@ logging.getLogger("urllib3").setLevel(logging.WARNING)
 parser = argparse.ArgumentParser(description='Python Crypto Bot using the Coinbase Pro or Binanace API')
 
 # optional arguments
+parser.add_argument('--candlestore', type=int, help='store candles locally=1, always download candles=0')
 parser.add_argument('--exchange', type=str, help="'coinbasepro', 'binance', 'dummy'")
 parser.add_argument('--granularity', type=str, help="coinbasepro: (60,300,900,3600,21600,86400), binance: (1m,5m,15m,1h,6h,1d)")
 parser.add_argument('--graphs', type=int, help='save graphs=1, do not save graphs=0')
 parser.add_argument('--live', type=int, help='live=1, test=0')
 parser.add_argument('--market', type=str, help='coinbasepro: BTC-GBP, binance: BTCGBP etc.')
+parser.add_argument('--ratelimitshare', type=float, help='share of the exchange rate limits of the IP used by the bot, E.g. 0.5 for two bots')
+parser.add_argument('--markets', type=str, help='comma separated markets run in one process, coinbasepro: BTC-GBP,ETH-GBP, binance: BTCGBP,ETHGBP etc.')
 parser.add_argument('--sellatloss', type=int, help='toggle if bot should sell at a loss')
 parser.add_argument('--sellupperpcnt', type=int, help='optionally set sell upper percent limit')
 parser.add_argument('--selllowerpcnt', type=int, help='optionally set sell lower percent limit')
 parser.add_argument('--sim', type=str, help='simulation modes: fast, fast-sample, slow-sample')
 parser.add_argument('--smartswitch', type=int, help='optionally smart switch between 1 hour and 15 minute intervals')
 parser.add_argument('--verbose', type=int, help='verbose output=1, minimal output=0')
+parser.add_argument('--websocket', type=int, help='trade on the exchange websocket feeds=1, poll the exchange APIs=0')
 
 # parse arguments
 args = parser.parse_args()
@@ -47,6 +54,7 @@ class PyCryptoBot():
             self.exchange = exchange
 
         self.market = 'BTC-GBP'
+        self.markets = []
         self.base_currency = 'BTC'
         self.quote_currency = 'GBP'
         self.granularity = None
@@ -60,6 +68,13 @@ class PyCryptoBot():
         self.sell_at_loss = 1
         self.smart_switch = 1
         self.telegram = False
+        self.use_candle_store = 1
+        self.candle_store = None
+        self.use_websocket = 0
+        self.rate_limit_share = 1.0
+        self.trend_service = None
+        self.event_loop = None
+        self.async_public_api = None
 
         self._telegram_token = None
         self._telegram_client_id = None
@@ -135,6 +150,10 @@ class PyCryptoBot():
                         if self.base_currency != '' and self.quote_currency != '':
                             self.market = self.base_currency + '-' + self.quote_currency
 
+                        if 'markets' in config:
+                            if isinstance(config['markets'], list):
+                                self.markets = [ str(market) for market in config['markets'] ]
+
                         if 'live' in config:
                             if isinstance(config['live'], int):
                                 if config['live'] in [ 0, 1 ]:
@@ -191,6 +210,11 @@ class PyCryptoBot():
                                     else:
                                         self.smart_switch = 0
 
+                        if 'ratelimitshare' in config:
+                            if isinstance(config['ratelimitshare'], (int, float)):
+                                if config['ratelimitshare'] > 0 and config['ratelimitshare'] <= 1:
+                                    self.rate_limit_share = float(config['ratelimitshare'])
+
                         if 'granularity' in config:
                             if isinstance(config['granularity'], int):
                                 if config['granularity'] in [ 60, 300, 900, 3600, 21600, 86400 ]:
@@ -226,6 +250,10 @@ class PyCryptoBot():
                         if self.base_currency != '' and self.quote_currency != '':
                             self.market = self.base_currency + self.quote_currency
 
+                        if 'markets' in config:
+                            if isinstance(config['markets'], list):
+                                self.markets = [ str(market) for market in config['markets'] ]
+
                         if 'live' in config:
                             if isinstance(config['live'], int):
                                 if config['live'] in [0, 1]:
@@ -282,6 +310,11 @@ class PyCryptoBot():
                                     else:
                                         self.smart_switch = 0
 
+                        if 'ratelimitshare' in config:
+                            if isinstance(config['ratelimitshare'], (int, float)):
+                                if config['ratelimitshare'] > 0 and config['ratelimitshare'] <= 1:
+                                    self.rate_limit_share = float(config['ratelimitshare'])
+
                         if 'granularity' in config:
                             if isinstance(config['granularity'], str):
                                 if config['granularity'] in [ '1m', '5m', '15m', '1h', '6h', '1d' ]:
@@ -324,6 +357,10 @@ class PyCryptoBot():
                             if self.base_currency != '' and self.quote_currency != '':
                                 self.market = self.base_currency + '-' + self.quote_currency
 
+                            if 'markets' in config:
+                                if isinstance(config['markets'], list):
+                                    self.markets = [ str(market) for market in config['markets'] ]
+
                             if 'live' in config:
                                 if isinstance(config['live'], int):
                                     if config['live'] in [0, 1]:
@@ -380,6 +417,11 @@ class PyCryptoBot():
                                         else:
                                             self.smart_switch = 0
 
+                            if 'ratelimitshare' in config:
+                                if isinstance(config['ratelimitshare'], (int, float)):
+                                    if config['ratelimitshare'] > 0 and config['ratelimitshare'] <= 1:
+                                        self.rate_limit_share = float(config['ratelimitshare'])
+
                             if 'granularity' in config:
                                 if isinstance(config['granularity'], int):
                                     if config['granularity'] in [60, 300, 900, 3600, 21600, 86400]:
@@ -416,6 +458,10 @@ class PyCryptoBot():
                             if self.base_currency != '' and self.quote_currency != '':
                                 self.market = self.base_currency + self.quote_currency
 
+                            if 'markets' in config:
+                                if isinstance(config['markets'], list):
+                                    self.markets = [ str(market) for market in config['markets'] ]
+
                             if 'live' in config:
                                 if isinstance(config['live'], int):
                                     if config['live'] in [0, 1]:
@@ -472,6 +518,11 @@ class PyCryptoBot():
                                         else:
                                             self.smart_switch = 0
 
+                            if 'ratelimitshare' in config:
+                                if isinstance(config['ratelimitshare'], (int, float)):
+                                    if config['ratelimitshare'] > 0 and config['ratelimitshare'] <= 1:
+                                        self.rate_limit_share = float(config['ratelimitshare'])
+
                             if 'granularity' in config:
                                 if isinstance(config['granularity'], str):
                                     if config['granularity'] in ['1m', '5m', '15m', '1h', '6h', '1d']:
@@ -502,72 +553,8 @@ class PyCryptoBot():
                     raise ValueError('Binance market required.')
 
                 self.market = args.market
-                if self.market.endswith('BTC'):
-                    self.base_currency = self.market.replace('BTC', '')
-                    self.quote_currency = 'BTC'
-                elif self.market.endswith('BNB'):
-                    self.base_currency = self.market.replace('BNB', '')
-                    self.quote_currency = 'BNB'
-                elif self.market.endswith('ETH'):
-                    self.base_currency = self.market.replace('ETH', '')
-                    self.quote_currency = 'ETH'
-                elif self.market.endswith('USDT'):
-                    self.base_currency = self.market.replace('USDT', '')
-                    self.quote_currency = 'USDT'
-                elif self.market.endswith('TUSD'):
-                    self.base_currency = self.market.replace('TUSD', '')
-                    self.quote_currency = 'TUSD'
-                elif self.market.endswith('BUSD'):
-                    self.base_currency = self.market.replace('BUSD', '')
-                    self.quote_currency = 'BUSD'
-                elif self.market.endswith('DAX'):
-                    self.base_currency = self.market.replace('DAX', '')
-                    self.quote_currency = 'DAX'
-                elif self.market.endswith('NGN'):
-                    self.base_currency = self.market.replace('NGN', '')
-                    self.quote_currency = 'NGN'
-                elif self.market.endswith('RUB'):
-                    self.base_currency = self.market.replace('RUB', '')
-                    self.quote_currency = 'RUB'
-                elif self.market.endswith('TRY'):
-                    self.base_currency = self.market.replace('TRY', '')
-                    self.quote_currency = 'TRY'
-                elif self.market.endswith('EUR'):
-                    self.base_currency = self.market.replace('EUR', '')
-                    self.quote_currency = 'EUR'
-                elif self.market.endswith('GBP'):
-                    self.base_currency = self.market.replace('GBP', '')
-                    self.quote_currency = 'GBP'
-                elif self.market.endswith('ZAR'):
-                    self.base_currency = self.market.replace('ZAR', '')
-                    self.quote_currency = 'ZAR'
-                elif self.market.endswith('UAH'):
-                    self.base_currency = self.market.replace('UAH', '')
-                    self.quote_currency = 'UAH'
-                elif self.market.endswith('DAI'):
-                    self.base_currency = self.market.replace('DAI', '')
-                    self.quote_currency = 'DAI'
-                elif self.market.endswith('BIDR'):
-                    self.base_currency = self.market.replace('BIDR', '')
-                    self.quote_currency = 'BIDR'
-                elif self.market.endswith('AUD'):
-                    self.base_currency = self.market.replace('AUD', '')
-                    self.quote_currency = 'AUD'
-                elif self.market.endswith('US'):
-                    self.base_currency = self.market.replace('US', '')
-                    self.quote_currency = 'US'
-                elif self.market.endswith('NGN'):
-                    self.base_currency = self.market.replace('NGN', '')
-                    self.quote_currency = 'NGN'
-                elif self.market.endswith('BRL'):
-                    self.base_currency = self.market.replace('BRL', '')
-                    self.quote_currency = 'BRL'
-                elif self.market.endswith('BVND'):
-                    self.base_currency = self.market.replace('BVND', '')
-                    self.quote_currency = 'BVND'
-                elif self.market.endswith('VAI'):
-                    self.base_currency = self.market.replace('VAI', '')
-                    self.quote_currency = 'VAI'
+                # split without downloading the markets, startApp loads them
+                self.base_currency, self.quote_currency = exchange_metadata.splitMarket(self.exchange, args.market, self.__getPublicAPI(), False)
 
                 if len(self.market) != len(self.base_currency) + len(self.quote_currency):
                     raise ValueError('Binance market error.')
@@ -655,6 +642,21 @@ class PyCryptoBot():
                 if self.sell_at_loss == 0:
                     self.sell_lower_pcnt = None
 
+        if args.candlestore != None:
+            if args.candlestore in [ 0, 1 ]:
+                self.use_candle_store = args.candlestore
+
+        if args.websocket != None:
+            if args.websocket in [ 0, 1 ]:
+                self.use_websocket = args.websocket
+
+        if args.ratelimitshare != None:
+            if args.ratelimitshare > 0 and args.ratelimitshare <= 1:
+                self.rate_limit_share = args.ratelimitshare
+
+        if args.markets != None:
+            self.markets = [ market.strip() for market in args.markets.split(',') if market.strip() != '' ]
+
         if self.exchange == 'binance':
             if len(self.api_url) > 1 and self.api_url[-1] != '/':
                 self.api_url = self.api_url + '/'
@@ -729,116 +731,224 @@ class PyCryptoBot():
     def getMarket(self):
         return self.market
 
+    def getMarkets(self):
+        """Returns the markets run by the bot, the market if none are configured"""
+
+        if len(self.markets) == 0:
+            return [ self.market ]
+
+        return self.markets
+
+    def forMarket(self, market):
+        """Returns a copy of the app for another market, sharing the candle store"""
+
+        # created before copying so every market syncs into the same store
+        # and downloads over the same pool of connections
+        self.getCandleStore()
+        self.getEventLoop()
+        self.__getAsyncPublicAPI()
+
+        app = copy.copy(self)
+        app.trend_service = None
+        app.setMarket(market)
+
+        if app.getMarket() != market:
+            raise ValueError('Invalid market: ' + str(market))
+
+        return app
+
     def getGranularity(self):
         if self.exchange == 'binance':
             return str(self.granularity)
         elif self.exchange == 'coinbasepro':
             return int(self.granularity)
 
+    def getCandleStore(self):
+        """Returns the local candle store, None if disabled"""
+
+        if self.use_candle_store == 1 and self.candle_store == None:
+            self.candle_store = CandleStore()
+
+        return self.candle_store
+
+    def useWebSocket(self):
+        """Returns 1 if the bot trades on the exchange websocket feeds"""
+
+        return self.use_websocket
+
+    def getRateLimitShare(self):
+        """Returns the share of the exchange rate limits of the IP used by the bot"""
+
+        return self.rate_limit_share
+
     def getHistoricalData(self, market, granularity, iso8601start='', iso8601end=''):
+        if self.exchange not in [ 'coinbasepro', 'binance' ]:
+            return pd.DataFrame()
+
+        store = self.getCandleStore()
+
+        if store != None and iso8601start == '' and iso8601end == '':
+            # only download the candles since the last sync
+            store.sync(self.__getPublicAPI(), self.exchange, market, granularity)
+            return store.getCandles(self.exchange, market, granularity)
+
+        if store != None and iso8601start != '' and iso8601end != '':
+            start = pd.Timestamp(iso8601start).timestamp()
+            end = pd.Timestamp(iso8601end).timestamp()
+
+            if store.hasCandles(self.exchange, market, granularity, start, end):
+                return store.getCandles(self.exchange, market, granularity, start, end)
+
+        if self.exchange == 'coinbasepro':
+            df = self.__getPublicAPI().getHistoricalData(market, granularity, iso8601start, iso8601end)
+        elif iso8601start != '' and iso8601end != '':
+            print ('Attempting to retrieve data from ' + iso8601start)
+            df = self.__getPublicAPI().getHistoricalData(market, granularity, str(datetime.strptime(iso8601start, '%Y-%m-%dT%H:%M:%S.%f').strftime('%d %b, %Y')), str(datetime.strptime(iso8601end, '%Y-%m-%dT%H:%M:%S.%f').strftime('%d %b, %Y')))
+        else:
+            df = self.__getPublicAPI().getHistoricalData(market, granularity)
+
+        if store != None:
+            store.saveCandles(self.exchange, df)
+
+        return df
+
+    def getCandleHistory(self, market, granularity, candles=300):
+        """Returns the most recent candles from the candle store, downloading those missing"""
+
+        store = self.getCandleStore()
+
+        if store == None or self.exchange not in [ 'coinbasepro', 'binance' ]:
+            return self.getHistoricalData(market, granularity)
+
+        store.backfill(self.__getPublicAPI(), self.exchange, market, granularity, candles)
+
+        return store.getCandles(self.exchange, market, granularity, limit=candles)
+
+    def importCandleHistory(self, archive, market, granularity, iso8601start):
+        """Downloads the candles from the start date, or the last archived candle, into a candle archive"""
+
+        if self.exchange not in [ 'coinbasepro', 'binance' ]:
+            raise ValueError('Invalid exchange: ' + str(self.exchange))
+
+        return archive.importHistory(self.__getPublicAPI(), self.exchange, market, granularity, iso8601start)
+
+    def __getPublicAPI(self):
+        """Returns the public API of the exchange, shared by the process (private function)"""
+
+        if self.exchange in [ 'coinbasepro', 'binance' ]:
+            return client_registry.getPublicAPI(self.exchange)
+
+    def getAuthAPI(self):
+        """Returns the authenticated API of the account, shared by the process"""
+
         if self.exchange == 'coinbasepro':
-            api = CBPublicAPI()
-            return api.getHistoricalData(market, granularity, iso8601start, iso8601end)
+            return client_registry.getAuthAPI(self.exchange, self.getAPIKey(), self.getAPISecret(), self.getAPIPassphrase(), self.getAPIURL())
         elif self.exchange == 'binance':
-            api = BPublicAPI()
+            return client_registry.getAuthAPI(self.exchange, self.getAPIKey(), self.getAPISecret(), api_url=self.getAPIURL())
 
-            if iso8601start != '' and iso8601end != '':
-                return api.getHistoricalData(market, granularity, str(datetime.strptime(iso8601start, '%Y-%m-%dT%H:%M:%S.%f').strftime('%d %b, %Y')), str(datetime.strptime(iso8601end, '%Y-%m-%dT%H:%M:%S.%f').strftime('%d %b, %Y')))
-            else:
-                return api.getHistoricalData(market, granularity)
-        else:
-            return pd.DataFrame()
+    def getEventLoop(self):
+        """Returns the event loop of the asyncio APIs, kept between polls to reuse connections"""
 
-    def getSmartSwitch(self):
-        return self.smart_switch
+        if self.event_loop == None:
+            self.event_loop = asyncio.new_event_loop()
 
-    def is1hEMA1226Bull(self):
-        try:
-            if self.exchange == 'coinbasepro':
-                api = CBPublicAPI()
-                df_data = api.getHistoricalData(self.market, 3600)
-            elif self.exchange == 'binance':
-                api = BPublicAPI()
-                df_data = api.getHistoricalData(self.market, '1h')
-            else:
-                return False
+        return self.event_loop
 
-            ta = TechnicalAnalysis(df_data)
-            ta.addEMA(12)
-            ta.addEMA(26)
-            df_last = ta.getDataFrame().copy().iloc[-1,:]
-            df_last['bull'] = df_last['ema12'] > df_last['ema26']
-            return bool(df_last['bull'])
-        except Exception:
-            return False
+    def __getAsyncPublicAPI(self):
+        """Returns the asyncio public API of the exchange (private function)"""
 
-    def is1hSMA50200Bull(self):
-        try:
+        if self.async_public_api == None:
             if self.exchange == 'coinbasepro':
-                api = CBPublicAPI()
-                df_data = api.getHistoricalData(self.market, 3600)
+                self.async_public_api = CBAsyncPublicAPI()
             elif self.exchange == 'binance':
-                api = BPublicAPI()
-                df_data = api.getHistoricalData(self.market, '1h')
-            else:
-                return False
+                self.async_public_api = BAsyncPublicAPI()
 
-            ta = TechnicalAnalysis(df_data)
-            ta.addSMA(50)
-            ta.addSMA(200)
-            df_last = ta.getDataFrame().copy().iloc[-1,:]
-            df_last['bull'] = df_last['sma50'] > df_last['sma200']
-            return bool(df_last['bull'])
-        except Exception:
-            return False
+        return self.async_public_api
 
-    def is6hEMA1226Bull(self):
-        try:
-            if self.exchange == 'coinbasepro':
-                api = CBPublicAPI()
-                df_data = api.getHistoricalData(self.market, 21600)
-            elif self.exchange == 'binance':
-                api = BPublicAPI()
-                df_data = api.getHistoricalData(self.market, '6h')
-            else:
-                return False
+    def getMarketData(self):
+        """Returns the trading data and ticker of the market for a poll
 
-            ta = TechnicalAnalysis(df_data)
-            ta.addEMA(12)
-            ta.addEMA(26)
-            df_last = ta.getDataFrame().copy().iloc[-1,:]
-            df_last['bull'] = df_last['ema12'] > df_last['ema26']
-            return bool(df_last['bull'])
-        except Exception:
-            return False
+        The candles, the ticker and, when smart switching, the 1h and 6h candles
+        of trends not cached are downloaded concurrently.
+        """
 
-    def is6hSMA50200Bull(self):
-        try:
-            if self.exchange == 'coinbasepro':
-                api = CBPublicAPI()
-                df_data = api.getHistoricalData(self.market, 21600)
-            elif self.exchange == 'binance':
-                api = BPublicAPI()
-                df_data = api.getHistoricalData(self.market, '6h')
-            else:
-                return False
+        if self.exchange not in [ 'coinbasepro', 'binance' ]:
+            return (pd.DataFrame(), None)
+
+        return self.getEventLoop().run_until_complete(self.__getMarketData())
+
+    async def __getMarketData(self):
+        """Downloads the data of a poll concurrently (private function)"""
+
+        api = self.__getAsyncPublicAPI()
+        requests = [ self.__getHistoricalDataAsync(api, self.getMarket(), self.getGranularity()), api.getTicker(self.getMarket()) ]
+
+        timeframes = []
+        if self.getSmartSwitch() == 1:
+            trend_service = self.getTrendService()
+            # the timeframes aggregated from the candles of the poll are not downloaded
+            timeframes = [ timeframe for timeframe in [ '1h', '6h' ] if not trend_service.isCached(timeframe) and not trend_service.canResample(timeframe) ]
+            for timeframe in timeframes:
+                requests.append(self.__getHistoricalDataAsync(api, self.getMarket(), trend_service.getGranularity(timeframe)))
+
+        results = await asyncio.gather(*requests, return_exceptions=True)
+
+        for timeframe, data in zip(timeframes, results[2:]):
+            # failed trends are downloaded again when checked
+            if isinstance(data, pd.DataFrame):
+                try:
+                    self.getTrendService().setTrendData(timeframe, data)
+                except Exception:
+                    pass
+
+        for result in results[:2]:
+            if isinstance(result, Exception):
+                raise result
+
+        return (results[0], results[1])
+
+    async def __getHistoricalDataAsync(self, api, market, granularity):
+        """Downloads the candles missing from the candle store (private function)"""
+
+        store = self.getCandleStore()
+
+        if store == None:
+            return await api.getHistoricalData(market, granularity)
+
+        iso8601start, iso8601end = store.getSyncRange(self.exchange, market, granularity)
+        data = await api.getHistoricalData(market, granularity, iso8601start, iso8601end)
 
-            ta = TechnicalAnalysis(df_data)
-            ta.addSMA(50)
-            ta.addSMA(200)
-            df_last = ta.getDataFrame().copy().iloc[-1,:]
-            df_last['bull'] = df_last['sma50'] > df_last['sma200']
-            return bool(df_last['bull'])
-        except Exception:
-            return False
+        if isinstance(data, pd.DataFrame):
+            store.saveCandles(self.exchange, data)
+
+        return store.getCandles(self.exchange, market, granularity)
+
+    def getSmartSwitch(self):
+        return self.smart_switch
+
+    def getTrendService(self):
+        """Returns the service caching the 1h and 6h trends, aggregated from the candle store if enabled"""
+
+        if self.trend_service == None:
+            self.trend_service = TrendService(self, self.getCandleStore() != None)
+
+        return self.trend_service
+
+    def is1hEMA1226Bull(self):
+        return self.getTrendService().getTrend('1h')['ema1226_bull']
+
+    def is1hSMA50200Bull(self):
+        return self.getTrendService().getTrend('1h')['sma50200_bull']
+
+    def is6hEMA1226Bull(self):
+        return self.getTrendService().getTrend('6h')['ema1226_bull']
+
+    def is6hSMA50200Bull(self):
+        return self.getTrendService().getTrend('6h')['sma50200_bull']
 
     def getTicker(self, market):
-        if self.exchange == 'coinbasepro':
-            api = CBPublicAPI()
-            return api.getTicker(market)
-        elif self.exchange == 'binance':
-            api = BPublicAPI()
-            return api.getTicker(market)
+        if self.exchange in [ 'coinbasepro', 'binance' ]:
+            return self.__getPublicAPI().getTicker(market)
         else:
             return None
 
@@ -920,97 +1030,36 @@ class PyCryptoBot():
                 return label + ': ' + str(self.truncate(val1, precision)) + ' = ' + str(self.truncate(val2, precision))
 
     def marketBuy(self, market, quote_currency):
-        if self.exchange == 'coinbasepro':
-            api = CBAuthAPI(self.getAPIKey(), self.getAPISecret(), self.getAPIPassphrase(), self.getAPIURL())
-            return api.marketBuy(market, quote_currency)
-        elif self.exchange == 'binance':
-            api = BAuthAPI(self.getAPIKey(), self.getAPISecret(), self.getAPIURL())
-            return api.marketBuy(market, quote_currency)
+        if self.exchange in [ 'coinbasepro', 'binance' ]:
+            return self.getAuthAPI().marketBuy(market, quote_currency)
         else:
             return None
 
     def marketSell(self, market, base_currency):
-        if self.exchange == 'coinbasepro':
-            api = CBAuthAPI(self.getAPIKey(), self.getAPISecret(), self.getAPIPassphrase(), self.getAPIURL())
-            return api.marketSell(market, base_currency)
-        elif self.exchange == 'binance':
-            api = BAuthAPI(self.getAPIKey(), self.getAPISecret(), self.getAPIURL())
-            return api.marketSell(market, base_currency)
+        if self.exchange in [ 'coinbasepro', 'binance' ]:
+            return self.getAuthAPI().marketSell(market, base_currency)
         else:
             return None
 
+    def loadMarkets(self):
+        """Loads the markets of the exchange before the first order, so placing an order is a single request
+
+        The base and quote currencies of a Binance market split by its quote
+        currency are replaced with those of the loaded markets.
+        """
+
+        exchange_metadata.getMarkets(self.exchange, self.__getPublicAPI())
+
+        if self.exchange == 'binance':
+            self.setMarket(self.market)
+
     def setMarket(self, market):
         if self.exchange == 'binance':
             p = re.compile(r"^[A-Z]{6,12}$")
             if p.match(market):
                 self.market = market
 
-                if self.market.endswith('BTC'):
-                    self.base_currency = self.market.replace('BTC', '')
-                    self.quote_currency = 'BTC'
-                elif self.market.endswith('BNB'):
-                    self.base_currency = self.market.replace('BNB', '')
-                    self.quote_currency = 'BNB'
-                elif self.market.endswith('ETH'):
-                    self.base_currency = self.market.replace('ETH', '')
-                    self.quote_currency = 'ETH'
-                elif self.market.endswith('USDT'):
-                    self.base_currency = self.market.replace('USDT', '')
-                    self.quote_currency = 'USDT'
-                elif self.market.endswith('TUSD'):
-                    self.base_currency = self.market.replace('TUSD', '')
-                    self.quote_currency = 'TUSD'
-                elif self.market.endswith('BUSD'):
-                    self.base_currency = self.market.replace('BUSD', '')
-                    self.quote_currency = 'BUSD'
-                elif self.market.endswith('DAX'):
-                    self.base_currency = self.market.replace('DAX', '')
-                    self.quote_currency = 'DAX'
-                elif self.market.endswith('NGN'):
-                    self.base_currency = self.market.replace('NGN', '')
-                    self.quote_currency = 'NGN'
-                elif self.market.endswith('RUB'):
-                    self.base_currency = self.market.replace('RUB', '')
-                    self.quote_currency = 'RUB'
-                elif self.market.endswith('TRY'):
-                    self.base_currency = self.market.replace('TRY', '')
-                    self.quote_currency = 'TRY'
-                elif self.market.endswith('EUR'):
-                    self.base_currency = self.market.replace('EUR', '')
-                    self.quote_currency = 'EUR'
-                elif self.market.endswith('GBP'):
-                    self.base_currency = self.market.replace('GBP', '')
-                    self.quote_currency = 'GBP'
-                elif self.market.endswith('ZAR'):
-                    self.base_currency = self.market.replace('ZAR', '')
-                    self.quote_currency = 'ZAR'
-                elif self.market.endswith('UAH'):
-                    self.base_currency = self.market.replace('UAH', '')
-                    self.quote_currency = 'UAH'
-                elif self.market.endswith('DAI'):
-                    self.base_currency = self.market.replace('DAI', '')
-                    self.quote_currency = 'DAI'
-                elif self.market.endswith('BIDR'):
-                    self.base_currency = self.market.replace('BIDR', '')
-                    self.quote_currency = 'BIDR'
-                elif self.market.endswith('AUD'):
-                    self.base_currency = self.market.replace('AUD', '')
-                    self.quote_currency = 'AUD'
-                elif self.market.endswith('US'):
-                    self.base_currency = self.market.replace('US', '')
-                    self.quote_currency = 'US'
-                elif self.market.endswith('NGN'):
-                    self.base_currency = self.market.replace('NGN', '')
-                    self.quote_currency = 'NGN'
-                elif self.market.endswith('BRL'):
-                    self.base_currency = self.market.replace('BRL', '')
-                    self.quote_currency = 'BRL'
-                elif self.market.endswith('BVND'):
-                    self.base_currency = self.market.replace('BVND', '')
-                    self.quote_currency = 'BVND'
-                elif self.market.endswith('VAI'):
-                    self.base_currency = self.market.replace('VAI', '')
-                    self.quote_currency = 'VAI'
+                self.base_currency, self.quote_currency = exchange_metadata.splitMarket(self.exchange, market, self.__getPublicAPI(), False)
 
                 if len(self.market) != len(self.base_currency) + len(self.quote_currency):
                     raise ValueError('Binance market error.')
@@ -1074,6 +1123,8 @@ class PyCryptoBot():
 
         # if live
         if self.isLive() == 1:
+            self.loadMarkets()
+
             if self.getExchange() == 'binance':
                 if last_action == 'SELL'and account.getBalance(self.getQuoteCurrency()) < 0.001:
                     raise Exception('Insufficient available funds to place sell order: ' + str(account.getBalance(self.getQuoteCurrency())) + ' < 0.1 ' + self.getQuoteCurrency() + "\nNote: A manual limit order places a hold on available funds.")
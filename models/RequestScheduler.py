@@ -0,0 +1,383 @@
+"""Rate limits of the exchange APIs, shared by every request of the process"""
+
+import aiohttp, asyncio, logging, threading, time
+from requests.adapters import HTTPAdapter
+from urllib.parse import parse_qs, urlparse
+
+# exchange -> limit -> (counting, requests or weight, seconds)
+LIMITS = {
+    'binance': {
+        # counted by Binance in windows aligned to the clock
+        'weight': ('window', 1200, 60),
+        'orders': ('window', 50, 10)
+    },
+    'coinbasepro': {
+        # 3 and 5 requests a second, with bursts of twice that
+        'public': ('bucket', 6, 2),
+        'private': ('bucket', 10, 2)
+    }
+}
+
+# exchange -> endpoint class -> limits drawn from
+ENDPOINTS = {
+    'binance': { 'order': [ 'weight', 'orders' ], 'account': [ 'weight' ], 'market': [ 'weight' ] },
+    'coinbasepro': { 'order': [ 'private' ], 'account': [ 'private' ], 'market': [ 'public' ] }
+}
+
+# orders are placed before account requests, which are sent before market data
+PRIORITIES = { 'order': 0, 'account': 1, 'market': 2 }
+
+# response headers of the weight used in the current window of a limit
+HEADERS = {
+    'binance': { 'X-MBX-USED-WEIGHT-1M': 'weight', 'X-MBX-ORDER-COUNT-10S': 'orders' }
+}
+
+BINANCE_WEIGHTS = { 'api/v3/exchangeInfo': 20, 'api/v3/account': 20, 'api/v3/allOrders': 20, 'api/v3/myTrades': 20, 'api/v3/openOrders': 6, 'api/v3/klines': 2, 'api/v3/ticker/price': 2, 'api/v3/ticker/24hr': 2, 'api/v3/depth': 5 }
+
+def getEndpoint(exchange, method, url):
+    """Returns the endpoint class and weight of a request to the exchange"""
+
+    parsed = urlparse(str(url))
+    path = parsed.path.strip('/')
+    method = method.upper()
+
+    if exchange == 'binance':
+        weight = BINANCE_WEIGHTS.get(path, 1)
+        if path == 'api/v3/ticker/price' and not 'symbol' in parse_qs(parsed.query):
+            weight = 4
+
+        if path in [ 'api/v3/order', 'api/v3/order/oco' ] and method in [ 'POST', 'DELETE' ]:
+            return ('order', weight)
+        elif path in [ 'api/v3/order', 'api/v3/account', 'api/v3/allOrders', 'api/v3/myTrades', 'api/v3/openOrders' ]:
+            return ('account', weight)
+
+        return ('market', weight)
+
+    elif exchange == 'coinbasepro':
+        if path.startswith('orders') and method in [ 'POST', 'DELETE' ]:
+            return ('order', 1)
+        elif path.split('/')[0] in [ 'accounts', 'fees', 'fills', 'orders', 'users' ]:
+            return ('account', 1)
+
+        return ('market', 1)
+
+    raise ValueError('Exchange options: coinbasepro, binance')
+
+class TokenBucket():
+    def __init__(self, capacity, seconds):
+        """Token Bucket object model
+
+        Parameters
+        ----------
+        capacity : int
+            Requests or weight of a burst
+        seconds : float
+            Seconds to refill the bucket from empty
+        """
+
+        self.capacity = capacity
+        self.rate = capacity / seconds
+        self.tokens = float(capacity)
+        self.updated = time.time()
+
+    def getWait(self, weight, now):
+        """Returns the seconds until the weight can be taken"""
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        # a weight above the capacity waits for a full bucket
+        weight = min(weight, self.capacity)
+        if self.tokens >= weight:
+            return 0.0
+
+        return (weight - self.tokens) / self.rate
+
+    def take(self, weight, now):
+        self.tokens -= weight
+
+    def setUsed(self, used, now):
+        """Limits the tokens to the weight the exchange has not counted"""
+
+        self.tokens = min(self.tokens, self.capacity - used)
+
+class RequestWindow():
+    def __init__(self, capacity, seconds):
+        """Request Window object model
+
+        Parameters
+        ----------
+        capacity : int
+            Requests or weight of a window
+        seconds : int
+            Seconds of a window, the windows starting on multiples of it since the epoch
+        """
+
+        self.capacity = capacity
+        self.seconds = seconds
+        self.window = None
+        self.used = 0
+
+    def getWait(self, weight, now):
+        """Returns the seconds until the weight can be taken"""
+
+        window = int(now // self.seconds)
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+        if self.used == 0 or self.used + weight <= self.capacity:
+            return 0.0
+
+        return (window + 1) * self.seconds - now
+
+    def take(self, weight, now):
+        self.used += weight
+
+    def setUsed(self, used, now):
+        """Counts the weight the exchange counted in the current window"""
+
+        if int(now // self.seconds) == self.window:
+            self.used = max(self.used, used)
+
+class RequestScheduler():
+    def __init__(self, limits=LIMITS, share=1.0, backoff=10):
+        """Request Scheduler object model
+
+        Every request to an exchange takes its weight from the limits of its
+        endpoint class before it is sent, waiting while they are used up.
+        Waiting orders go before account requests and those before market
+        data. The weight the exchange reports is counted and a rate limit
+        response pauses the requests of the exchange.
+
+        Parameters
+        ----------
+        limits : dict
+            exchange -> limit -> (counting, requests or weight, seconds), E.g. LIMITS
+        share : float
+            Share of the limits of the IP used by the process, E.g. 0.5 for two bots
+        backoff : int
+            Seconds requests are paused after a rate limit response without Retry-After
+        """
+
+        if not isinstance(backoff, (int, float)) or backoff < 0:
+            raise ValueError('Backoff must be 0 or more.')
+
+        self.limits = limits
+        self.backoff = backoff
+        # seconds between checks of a request waiting for another of a higher priority
+        self.poll = 0.05
+        self.cond = threading.Condition()
+        self.setShare(share)
+
+    def setShare(self, share):
+        """Sets the share of the limits of the IP used by the process and refills the limits
+
+        Parameters
+        ----------
+        share : float
+            Share of the limits of the IP used by the process, E.g. 0.5 for two bots
+        """
+
+        if not isinstance(share, (int, float)) or share <= 0 or share > 1:
+            raise ValueError('Share must be more than 0 and at most 1.')
+
+        self.share = share
+        self.clear()
+
+    def acquire(self, exchange, endpoint, weight=1):
+        """Waits until the request can be sent without exceeding the limits
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        endpoint : str
+            'order', 'account' or 'market'
+        weight : int
+            Weight of the request, 1 unless the exchange weighs it higher
+        """
+
+        priority = self.__getPriority(exchange, endpoint)
+        start = time.time()
+
+        with self.cond:
+            self.waiting[exchange][priority] += 1
+
+            try:
+                wait = self.__take(exchange, endpoint, weight, priority)
+                while wait > 0:
+                    self.cond.wait(wait)
+                    wait = self.__take(exchange, endpoint, weight, priority)
+            finally:
+                self.waiting[exchange][priority] -= 1
+                self.cond.notify_all()
+
+            self.__count(exchange, time.time() - start)
+
+    async def acquireAsync(self, exchange, endpoint, weight=1):
+        """Waits in the event loop until the request can be sent without exceeding the limits"""
+
+        priority = self.__getPriority(exchange, endpoint)
+        start = time.time()
+
+        while True:
+            with self.cond:
+                wait = self.__take(exchange, endpoint, weight, priority)
+                if wait == 0:
+                    self.__count(exchange, time.time() - start)
+                    return
+
+            await asyncio.sleep(wait)
+
+    def update(self, exchange, status, headers):
+        """Counts the weight reported by the response and pauses after a rate limit response
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        status : int
+            HTTP status of the response
+        headers : dict
+            Headers of the response, case insensitive
+        """
+
+        now = time.time()
+
+        with self.cond:
+            if not exchange in self.limits:
+                return
+
+            for header, name in HEADERS.get(exchange, {}).items():
+                if header in headers:
+                    self.counters[exchange][name].setUsed(int(headers[header]), now)
+                    self.stats[exchange]['used_' + name] = int(headers[header])
+
+            if status in [ 418, 429 ]:
+                retry = float(headers.get('Retry-After', self.backoff))
+                self.paused[exchange] = max(self.paused[exchange], now + retry)
+                self.stats[exchange]['limited'] += 1
+                logging.warning(exchange + ' rate limit response (' + str(status) + '), requests paused for ' + str(retry) + ' seconds')
+
+            self.cond.notify_all()
+
+    def getStats(self, exchange=None):
+        """Returns the requests, throttled requests, seconds waited and rate limit responses of the exchanges"""
+
+        with self.cond:
+            if exchange != None:
+                return dict(self.stats[exchange])
+
+            return { name: dict(stats) for name, stats in self.stats.items() }
+
+    def clear(self):
+        """Refills the limits and resets the statistics"""
+
+        with self.cond:
+            self.counters = {}
+            self.waiting = {}
+            self.paused = {}
+            self.stats = {}
+
+            for exchange, limits in self.limits.items():
+                self.counters[exchange] = {}
+                for name, (counting, capacity, seconds) in limits.items():
+                    capacity = max(1, int(capacity * self.share))
+                    if counting == 'window':
+                        self.counters[exchange][name] = RequestWindow(capacity, seconds)
+                    else:
+                        self.counters[exchange][name] = TokenBucket(capacity, seconds)
+
+                self.waiting[exchange] = [ 0 ] * len(PRIORITIES)
+                self.paused[exchange] = 0.0
+                self.stats[exchange] = { 'requests': 0, 'throttled': 0, 'waited': 0.0, 'limited': 0 }
+
+    def __getPriority(self, exchange, endpoint):
+        """Returns the priority of the endpoint class (private function)"""
+
+        if not exchange in self.limits:
+            raise ValueError('Exchange options: ' + ', '.join(self.limits.keys()))
+
+        if not endpoint in PRIORITIES:
+            raise ValueError('Endpoint options: order, account, market')
+
+        return PRIORITIES[endpoint]
+
+    def __take(self, exchange, endpoint, weight, priority):
+        """Takes the weight from the limits, returns the seconds to wait if it cannot (private function)"""
+
+        # waits for requests of a higher priority
+        if sum(self.waiting[exchange][:priority]) > 0:
+            return self.poll
+
+        now = time.time()
+        limits = [ self.counters[exchange][name] for name in ENDPOINTS[exchange][endpoint] ]
+
+        wait = max([ self.paused[exchange] - now ] + [ limit.getWait(weight, now) for limit in limits ])
+        if wait > 0:
+            return wait
+
+        for limit in limits:
+            limit.take(weight, now)
+
+        return 0.0
+
+    def __count(self, exchange, waited):
+        """Counts a request sent (private function)"""
+
+        stats = self.stats[exchange]
+        stats['requests'] += 1
+
+        # waits shorter than a millisecond are the lock, not the limits
+        if waited >= 0.001:
+            stats['throttled'] += 1
+            stats['waited'] += waited
+
+class RateLimitedAdapter(HTTPAdapter):
+    def __init__(self, exchange, scheduler=None, **kwargs):
+        """Sends the requests of a requests session through the request scheduler
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        scheduler : RequestScheduler, optional
+            Defaults to the scheduler of the process
+        """
+
+        super().__init__(**kwargs)
+
+        self.exchange = exchange
+        self.scheduler = scheduler if scheduler != None else request_scheduler
+
+    def send(self, request, **kwargs):
+        endpoint, weight = getEndpoint(self.exchange, request.method, request.url)
+        self.scheduler.acquire(self.exchange, endpoint, weight)
+
+        response = super().send(request, **kwargs)
+        self.scheduler.update(self.exchange, response.status_code, response.headers)
+
+        return response
+
+def getTraceConfig(exchange, scheduler=None):
+    """Returns the trace config sending the requests of an aiohttp session through the request scheduler"""
+
+    if scheduler == None:
+        scheduler = request_scheduler
+
+    async def onRequestStart(session, context, params):
+        endpoint, weight = getEndpoint(exchange, params.method, params.url)
+        await scheduler.acquireAsync(exchange, endpoint, weight)
+
+    async def onRequestEnd(session, context, params):
+        scheduler.update(exchange, params.response.status, params.response.headers)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(onRequestStart)
+    trace_config.on_request_end.append(onRequestEnd)
+
+    return trace_config
+
+# shared by the exchange APIs of every market in the process
+request_scheduler = RequestScheduler()
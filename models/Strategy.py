@@ -0,0 +1,160 @@
+"""Buy, sell and wait decisions of the trading strategy"""
+
+import numpy as np
+import pandas as pd
+
+class Strategy():
+    def __init__(self, app=None, settings=None):
+        """Strategy object model
+
+        The buy and sell criteria of every candle are calculated at once as
+        NumPy arrays, only the failsafes, which depend on the open position,
+        are decided candle by candle. The live bot and the backtests share
+        these decisions.
+
+        Parameters
+        ----------
+        app : object, optional
+            PyCryptoBot object, the settings are read from it
+        settings : dict, optional
+            Settings overriding the app, E.g. { 'sellupperpcnt': 5 }
+        """
+
+        self.settings = {
+            'market': '',
+            'exchange': '',
+            'granularity': '',
+            'verbose': 0,
+            'sellupperpcnt': None,
+            'selllowerpcnt': None,
+            'sellatloss': 1,
+            'smartswitch': 0,
+            # thresholds fixed in the live bot
+            'buyobvpcnt': -5,
+            'smartswitchbankpcnt': 2,
+            'reversalbankmargin': 3
+        }
+
+        if app != None:
+            self.settings['market'] = app.getMarket()
+            self.settings['exchange'] = app.getExchange()
+            self.settings['granularity'] = app.getGranularity()
+            self.settings['verbose'] = app.isVerbose()
+            self.settings['sellupperpcnt'] = app.sellUpperPcnt()
+            self.settings['selllowerpcnt'] = app.sellLowerPcnt()
+            self.settings['sellatloss'] = app.allowSellAtLoss()
+            self.settings['smartswitch'] = app.getSmartSwitch()
+
+        if settings != None:
+            for key in settings:
+                if not key in self.settings:
+                    raise KeyError("Unknown strategy setting '" + str(key) + "'")
+            self.settings.update(settings)
+
+    def getSettings(self):
+        """Returns the strategy settings"""
+
+        return dict(self.settings)
+
+    def isSmartSwitched(self):
+        """Returns True if smart switch has moved to the 15 minute granularity"""
+
+        return self.settings['smartswitch'] == 1 and ((self.settings['exchange'] == 'binance' and self.settings['granularity'] == '15m') \
+            or (self.settings['exchange'] == 'coinbasepro' and self.settings['granularity'] == 900))
+
+    def getSignals(self, df):
+        """Returns the close and the buy, sell and strong reversal criteria of every candle as NumPy arrays
+
+        Parameters
+        ----------
+        df : Pandas Time Series
+            Trading data including the technical analysis
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        obv_pc = df['obv_pc'].to_numpy(dtype=float)
+        macdltsignal = df['macdltsignal'].to_numpy(dtype=bool)
+
+        return {
+            'close': df['close'].to_numpy(dtype=float),
+            'buy': df['ema12gtema26co'].to_numpy(dtype=bool) & df['macdgtsignal'].to_numpy(dtype=bool) & df['goldencross'].to_numpy(dtype=bool) \
+                & (obv_pc > self.settings['buyobvpcnt']) & df['eri_buy'].to_numpy(dtype=bool),
+            'sell': df['ema12ltema26co'].to_numpy(dtype=bool) & macdltsignal,
+            'reversal': (obv_pc < 0) & macdltsignal
+        }
+
+    def getAction(self, buy, sell, reversal, price, last_action='', last_buy=0, fib_low=0, fib_high=0):
+        """Returns the action of a candle and the failsafes that decided it
+
+        Parameters
+        ----------
+        buy, sell, reversal : bool
+            Criteria of the candle, see getSignals()
+        price : float
+            Current price
+        last_action : str
+            Last buy or sell, '' if none
+        last_buy : float
+            Price of the last buy
+        fib_low, fib_high : float
+            Fibonacci bands of the last buy
+        """
+
+        # criteria for a buy signal
+        if buy and last_action != 'BUY':
+            action = 'BUY'
+        # criteria for a sell signal
+        elif sell and last_action not in ['', 'SELL']:
+            action = 'SELL'
+        # anything other than a buy or sell, just wait
+        else:
+            action = 'WAIT'
+
+        triggers = []
+
+        if last_buy > 0 and last_action == 'BUY':
+            change_pcnt = ((price / last_buy) - 1) * 100
+
+            # calculate last buy minus fees
+            last_buy_minus_fees = last_buy + (last_buy * 0.005)
+            margin = ((price - last_buy_minus_fees) / price) * 100
+
+            sell_at_loss = self.settings['sellatloss']
+            sell_upper_pcnt = self.settings['sellupperpcnt']
+            sell_lower_pcnt = self.settings['selllowerpcnt']
+
+            # loss failsafe sell at fibonacci band
+            if sell_at_loss and sell_lower_pcnt == None and fib_low > 0 and fib_low >= price:
+                triggers.append('fibonacci_loss')
+
+            # loss failsafe sell at sell_lower_pcnt
+            if sell_at_loss and sell_lower_pcnt != None and change_pcnt < sell_lower_pcnt:
+                triggers.append('lower_pcnt')
+
+            # profit bank at 2% in smart switched mode
+            if self.isSmartSwitched() and change_pcnt >= self.settings['smartswitchbankpcnt']:
+                triggers.append('smart_switch_bank')
+
+            # profit bank at sell_upper_pcnt
+            if sell_upper_pcnt != None and change_pcnt > sell_upper_pcnt:
+                triggers.append('upper_pcnt')
+
+            # profit bank at sell at fibonacci band
+            if margin > 3 and sell_upper_pcnt != None and fib_high > fib_low and fib_high <= price:
+                triggers.append('fibonacci_bank')
+
+            # profit bank when strong reversal detected
+            if margin > self.settings['reversalbankmargin'] and reversal:
+                triggers.append('reversal_bank')
+
+            if len(triggers) > 0:
+                action = 'SELL'
+
+            # configuration specifies to not sell at a loss
+            if not sell_at_loss and margin <= 0:
+                action = 'WAIT'
+                triggers.append('no_sell_at_loss')
+
+        return action, triggers
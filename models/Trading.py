@@ -1,23 +1,29 @@
 """Technical analysis on a trading Pandas DataFrame"""
 
-import json, math
+import bisect, json, math
 import numpy as np
 import pandas as pd
 import re, sys
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 from models.CoinbasePro import AuthAPI
+from models import Kernels
+from models.ForecastService import forecast_service
+from models.IndicatorCache import indicator_cache
 
 # production: disable traceback
 sys.tracebacklimit = 0
 
 class TechnicalAnalysis():
-    def __init__(self, data=pd.DataFrame()):
+    def __init__(self, data=pd.DataFrame(), cache=indicator_cache, forecast=forecast_service):
         """Technical Analysis object model
     
         Parameters
         ----------
         data : Pandas Time Series
             data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        cache : object, optional
+            IndicatorCache of the indicators, shared by the process by default, None to always calculate them
+        forecast : object, optional
+            ForecastService of the Seasonal ARIMA Model, shared by the process by default
         """
 
         if not isinstance(data, pd.DataFrame):
@@ -34,6 +40,45 @@ class TechnicalAnalysis():
 
         self.df = data
         self.levels = []
+        self.cache = cache
+        self.forecast = forecast
+        self.__cache_key = None
+        # columns of cached indicators waiting to be joined to the DataFrame
+        self.__cached_columns = {}
+        # candlestick patterns of every candle and the candles they were detected in
+        self.__patterns = None
+        self.__patterns_ohlc = None
+
+        # indicators added on demand: name -> (columns added, indicators depended on, function adding the columns)
+        self.__indicators = {}
+        self.__registerIndicator('close_pc', [ 'close_pc', 'close_cpc' ], [], self.addChangePct)
+        self.__registerIndicator('cma', [ 'cma' ], [], self.addCMA)
+        self.__registerIndicator('sma20', [ 'sma20' ], [], lambda: self.addSMA(20))
+        self.__registerIndicator('sma50', [ 'sma50' ], [], lambda: self.addSMA(50))
+        self.__registerIndicator('sma200', [ 'sma200' ], [], lambda: self.addSMA(200))
+        self.__registerIndicator('ema12', [ 'ema12' ], [], lambda: self.addEMA(12))
+        self.__registerIndicator('ema26', [ 'ema26' ], [], lambda: self.addEMA(26))
+        self.__registerIndicator('goldencross', [ 'goldencross' ], [ 'sma50', 'sma200' ], self.addGoldenCross)
+        self.__registerIndicator('deathcross', [ 'deathcross' ], [ 'sma50', 'sma200' ], self.addDeathCross)
+        self.__registerIndicator('fbb', [ 'fbb_mid', 'fbb_upper0_236', 'fbb_upper0_382', 'fbb_upper0_5', 'fbb_upper0_618', 'fbb_upper0_764', 'fbb_upper1', 
+            'fbb_lower0_236', 'fbb_lower0_382', 'fbb_lower0_5', 'fbb_lower0_618', 'fbb_lower0_764', 'fbb_lower1' ], [], self.addFibonacciBollingerBands)
+        self.__registerIndicator('rsi14', [ 'rsi14' ], [], lambda: self.addRSI(14))
+        self.__registerIndicator('macd', [ 'macd', 'signal' ], [ 'ema12', 'ema26' ], self.addMACD)
+        self.__registerIndicator('obv', [ 'obv', 'obv_pc' ], [], self.addOBV)
+        self.__registerIndicator('ema13', [ 'ema13' ], [], lambda: self.addEMA(13))
+        self.__registerIndicator('eri', [ 'elder_ray_bull', 'elder_ray_bear', 'eri_buy', 'eri_sell' ], [ 'ema13' ], self.addElderRayIndex)
+        self.__registerIndicator('ema_signals', [ 'ema12gtema26', 'ema12gtema26co', 'ema12ltema26', 'ema12ltema26co' ], [ 'ema12', 'ema26' ], self.addEMABuySignals)
+        self.__registerIndicator('sma_signals', [ 'sma50gtsma200', 'sma50gtsma200co', 'sma50ltsma200', 'sma50ltsma200co' ], [ 'sma50', 'sma200' ], self.addSMABuySignals)
+        self.__registerIndicator('macd_signals', [ 'macdgtsignal', 'macdgtsignalco', 'macdltsignal', 'macdltsignalco' ], [ 'macd' ], self.addMACDBuySignals)
+        self.__registerIndicator('candlestick_patterns', [ 'astral_buy', 'astral_sell', 'hammer', 'inverted_hammer', 'shooting_star', 'hanging_man', 
+            'three_white_soldiers', 'three_black_crows', 'doji', 'three_line_strike', 'two_black_gapping', 'morning_star', 'evening_star', 
+            'abandoned_baby', 'morning_doji_star', 'evening_doji_star' ], [], self.addCandlestickPatterns)
+
+    def __getitem__(self, column):
+        """Returns a column of the DataFrame, adding its indicator when first accessed"""
+
+        self.require(column)
+        return self.df[column]
 
     def getDataFrame(self):
         """Returns the Pandas DataFrame"""
@@ -41,45 +86,89 @@ class TechnicalAnalysis():
         return self.df
 
     def addAll(self):
-        """Adds analysis to the DataFrame"""
-
-        self.addChangePct()
-
-        self.addCMA()
-        self.addSMA(20)
-        self.addSMA(50)
-        self.addSMA(200)
-        self.addEMA(12)
-        self.addEMA(26)
-        self.addGoldenCross()
-        self.addDeathCross()
-        self.addFibonacciBollingerBands()
-
-        self.addRSI(14)
-        self.addMACD()
-        self.addOBV()
-        self.addElderRayIndex()
-
-        self.addEMABuySignals()
-        self.addSMABuySignals()
-        self.addMACDBuySignals()       
-
-        self.addCandleAstralBuy()
-        self.addCandleAstralSell()
-        self.addCandleHammer()
-        self.addCandleInvertedHammer()
-        self.addCandleShootingStar()
-        self.addCandleHangingMan()
-        self.addCandleThreeWhiteSoldiers()
-        self.addCandleThreeBlackCrows()
-        self.addCandleDoji()
-        self.addCandleThreeLineStrike()
-        self.addCandleTwoBlackGapping()
-        self.addCandleMorningStar()
-        self.addCandleEveningStar()
-        self.addCandleAbandonedBaby()
-        self.addCandleMorningDojiStar()
-        self.addCandleEveningDojiStar()
+        """Adds every indicator not already in the DataFrame"""
+
+        self.__cache_key = None
+        for name in self.__indicators:
+            self.__addIndicator(name)
+        self.__joinCachedColumns()
+
+        # indicators requested on demand were added out of order
+        order = list(self.df.columns[:8])
+        for columns, _, _ in self.__indicators.values():
+            order.extend(columns)
+        order.extend([ column for column in self.df.columns if column not in order ])
+
+        if list(self.df.columns) != order:
+            self.df = self.df[order]
+
+    def require(self, *columns):
+        """Adds the indicators providing the columns, and the indicators they depend on, if not already added"""
+
+        self.__cache_key = None
+        for column in columns:
+            if column in self.df.columns or column in self.__cached_columns:
+                continue
+
+            name = self.__getIndicatorName(column)
+            if name is None:
+                self.__joinCachedColumns()
+                raise KeyError("Unknown indicator column '" + str(column) + "'")
+
+            self.__addIndicator(name)
+        self.__joinCachedColumns()
+
+    def __registerIndicator(self, name, columns, dependencies, add):
+        """Registers an indicator to be added on demand (private function)"""
+
+        self.__indicators[name] = (columns, dependencies, add)
+
+    def __getIndicatorName(self, column):
+        """Returns the name of the indicator adding the column (private function)"""
+
+        for name, (columns, _, _) in self.__indicators.items():
+            if column in columns:
+                return name
+
+        return None
+
+    def __addIndicator(self, name):
+        """Adds an indicator after the indicators it depends on (private function)"""
+
+        columns, dependencies, add = self.__indicators[name]
+
+        if all(column in self.df.columns or column in self.__cached_columns for column in columns):
+            return
+
+        for dependency in dependencies:
+            self.__addIndicator(dependency)
+
+        if self.cache is None:
+            add()
+            return
+
+        # the candles are hashed once per call, when the first indicator is missing
+        if self.__cache_key is None:
+            self.__cache_key = self.cache.getKey(self.df)
+
+        cached = self.cache.get(self.__cache_key, name)
+        if cached is None:
+            # the indicator may read the columns of cached indicators
+            self.__joinCachedColumns()
+            add()
+            self.cache.set(self.__cache_key, name, { column: self.df[column].to_numpy() for column in columns })
+        else:
+            self.__cached_columns.update(cached)
+
+    def __joinCachedColumns(self):
+        """Joins the columns of the cached indicators to the DataFrame at once, faster than setting each column (private function)"""
+
+        if len(self.__cached_columns) == 0:
+            return
+
+        cached = pd.DataFrame(self.__cached_columns, index=self.df.index)
+        self.__cached_columns = {}
+        self.df = pd.concat([ self.df.drop(columns=[ column for column in cached.columns if column in self.df.columns ]), cached ], axis=1)
 
     """Candlestick References
     https://commodity.com/technical-analysis
@@ -88,12 +177,152 @@ class TechnicalAnalysis():
     https://www.incrediblecharts.com/candlestick_patterns/candlestick-patterns-strongest.php
     """
 
+    def calculateCandlestickPatterns(self, open, high, low, close):
+        """Calculates every candlestick pattern in one pass on NumPy OHLC arrays
+
+        Each pattern looks back at most 12 candles. The arrays are padded once
+        and the lagged candles are views into the padded arrays, so no shifted
+        copies are made. Candles before the start of the arrays are NaN and
+        never match, as with Pandas shift().
+        """
+
+        size = len(close)
+        padded = {}
+        with np.errstate(invalid='ignore'):
+            for name, values in [ ('open', open), ('high', high), ('low', low), ('close', close) ]:
+                padded[name] = np.concatenate([ np.full(12, np.nan), np.asarray(values, dtype=np.float64) ])
+            padded['body'] = np.abs(padded['open'] - padded['close'])
+            padded['range'] = padded['high'] - padded['low']
+            padded['top'] = np.maximum(padded['open'], padded['close'])
+            padded['bottom'] = np.minimum(padded['open'], padded['close'])
+
+        # lagged views, e.g. c[3] is close.shift(3)
+        o, h, l, c, body, rng, top, bottom = [ [ padded[name][12 - lag:12 - lag + size] for lag in range(13) ] \
+            for name in [ 'open', 'high', 'low', 'close', 'body', 'range', 'top', 'bottom' ] ]
+
+        def nonzero(values):
+            return (values != 0) & (values == values)
+
+        patterns = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            patterns['astral_buy'] = np.ones(size, dtype=bool)
+            patterns['astral_sell'] = np.ones(size, dtype=bool)
+            for lag in range(8):
+                patterns['astral_buy'] &= (c[lag] < c[lag + 3]) & (l[lag] < l[lag + 5])
+                patterns['astral_sell'] &= (c[lag] > c[lag + 3]) & (h[lag] > h[lag + 5])
+
+            patterns['hammer'] = (rng[0] > 3 * (o[0] - c[0])) \
+                & (((c[0] - l[0]) / (.001 + h[0] - l[0])) > 0.6) \
+                & (((o[0] - l[0]) / (.001 + h[0] - l[0])) > 0.6)
+
+            patterns['inverted_hammer'] = (rng[0] > 3 * (o[0] - c[0])) \
+                & ((h[0] - c[0]) / (.001 + h[0] - l[0]) > 0.6) \
+                & ((h[0] - o[0]) / (.001 + h[0] - l[0]) > 0.6)
+
+            patterns['shooting_star'] = ((o[1] < c[1]) & (c[1] < o[0])) \
+                & (h[0] - top[0] >= (body[0] * 3)) \
+                & ((bottom[0] - l[0]) <= body[0])
+
+            patterns['hanging_man'] = (rng[0] > (4 * (o[0] - c[0]))) \
+                & (((c[0] - l[0]) / (.001 + h[0] - l[0])) >= 0.75) \
+                & (((o[0] - l[0]) / (.001 + h[0] - l[0])) >= 0.75) \
+                & (h[1] < o[0]) \
+                & (h[2] < o[0])
+
+            patterns['three_white_soldiers'] = ((o[0] > o[1]) & (o[0] < c[1])) \
+                & (c[0] > h[1]) \
+                & (h[0] - top[0] < body[0]) \
+                & ((o[1] > o[2]) & (o[1] < c[2])) \
+                & (c[1] > h[2]) \
+                & (h[1] - top[1] < body[1])
+
+            patterns['three_black_crows'] = ((o[0] < o[1]) & (o[0] > c[1])) \
+                & (c[0] < l[1]) \
+                & (l[0] - top[0] < body[0]) \
+                & ((o[1] < o[2]) & (o[1] > c[2])) \
+                & (c[1] < l[2]) \
+                & (l[1] - top[1] < body[1])
+
+            patterns['doji'] = ((body[0] / rng[0]) < 0.1) \
+                & ((h[0] - top[0]) > (3 * body[0])) \
+                & ((bottom[0] - l[0]) > (3 * body[0]))
+
+            patterns['three_line_strike'] = ((o[1] < o[2]) & (o[1] > c[2])) \
+                & (c[1] < l[2]) \
+                & (l[1] - top[1] < body[1]) \
+                & ((o[2] < o[3]) & (o[2] > c[3])) \
+                & (c[2] < l[3]) \
+                & (l[2] - top[2] < body[2]) \
+                & ((o[0] < l[1]) & (c[0] > h[3]))
+
+            patterns['two_black_gapping'] = ((o[0] < o[1]) & (o[0] > c[1])) \
+                & (c[0] < l[1]) \
+                & (l[0] - top[0] < body[0]) \
+                & (h[1] < l[2])
+
+            patterns['morning_star'] = ((top[1] < c[2]) & (c[2] < o[2])) \
+                & ((c[0] > o[0]) & (o[0] > top[1]))
+
+            patterns['evening_star'] = ((bottom[1] > c[2]) & (c[2] > o[2])) \
+                & ((c[0] < o[0]) & (o[0] < bottom[1]))
+
+            patterns['abandoned_baby'] = (o[0] < c[0]) \
+                & (h[1] < l[0]) \
+                & (o[2] > c[2]) \
+                & (h[1] < l[2])
+
+            # the final comparison applies to the whole expression, as in the original detector
+            patterns['morning_doji_star'] = ((c[2] < o[2]) \
+                & (body[2] / rng[2] >= 0.7) \
+                & (body[1] / rng[1] < 0.1) \
+                & (c[0] > o[0]) \
+                & (body[0] / rng[0] >= 0.7) \
+                & (c[2] > c[1]) \
+                & (c[2] > o[1]) \
+                & (c[1] < o[0]) \
+                & (o[1] < o[0]) \
+                & (c[0] > c[2]) \
+                & ((h[1] - top[1]) > (3 * body[1])) \
+                & nonzero(bottom[1] - l[1])) > (3 * body[1])
+
+            patterns['evening_doji_star'] = ((c[2] > o[2]) \
+                & (body[2] / rng[2] >= 0.7) \
+                & (body[1] / rng[1] < 0.1) \
+                & (c[0] < o[0]) \
+                & (body[0] / rng[0] >= 0.7) \
+                & (c[2] < c[1]) \
+                & (c[2] < o[1]) \
+                & (c[1] > o[0]) \
+                & (o[1] > o[0]) \
+                & (c[0] < c[2]) \
+                & ((h[1] - top[1]) > (3 * body[1])) \
+                & nonzero(bottom[1] - l[1])) > (3 * body[1])
+
+        return patterns
+
+    def candlestickPatterns(self):
+        """Detects every candlestick pattern in the DataFrame, once until the candles change"""
+
+        ohlc = [ self.df[column].to_numpy() for column in [ 'open', 'high', 'low', 'close' ] ]
+
+        if self.__patterns is None or not self.__patterns.index.equals(self.df.index) \
+            or not all(np.array_equal(values, previous) for values, previous in zip(ohlc, self.__patterns_ohlc)):
+            self.__patterns = pd.DataFrame(self.calculateCandlestickPatterns(*ohlc), index=self.df.index)
+            self.__patterns_ohlc = [ values.copy() for values in ohlc ]
+
+        return self.__patterns
+
+    def addCandlestickPatterns(self):
+        """Adds every candlestick pattern to the DataFrame"""
+
+        patterns = self.candlestickPatterns()
+        for column in patterns.columns:
+            self.df[column] = patterns[column]
+
     def candleHammer(self):
         """* Candlestick Detected: Hammer ("Weak - Reversal - Bullish Signal - Up"""
 
-        return ((self.df['high'] - self.df['low']) > 3 * (self.df['open'] - self.df['close'])) \
-            & (((self.df['close'] - self.df['low']) / (.001 + self.df['high'] - self.df['low'])) > 0.6) \
-            & (((self.df['open'] - self.df['low']) / (.001 + self.df['high'] - self.df['low'])) > 0.6)
+        return self.candlestickPatterns()['hammer']
 
     def addCandleHammer(self):
         self.df['hammer'] = self.candleHammer()
@@ -101,9 +330,7 @@ class TechnicalAnalysis():
     def candleShootingStar(self):
         """* Candlestick Detected: Shooting Star ("Weak - Reversal - Bearish Pattern - Down")"""
 
-        return ((self.df['open'].shift(1) < self.df['close'].shift(1)) & (self.df['close'].shift(1) < self.df['open'])) \
-            & (self.df['high'] - np.maximum(self.df['open'], self.df['close']) >= (abs(self.df['open'] - self.df['close']) * 3)) \
-            & ((np.minimum(self.df['close'], self.df['open']) - self.df['low']) <= abs(self.df['open'] - self.df['close']))
+        return self.candlestickPatterns()['shooting_star']
 
     def addCandleShootingStar(self):
         self.df['shooting_star'] = self.candleShootingStar()
@@ -111,11 +338,7 @@ class TechnicalAnalysis():
     def candleHangingMan(self):
         """* Candlestick Detected: Hanging Man ("Weak - Continuation - Bearish Pattern - Down")"""
 
-        return ((self.df['high'] - self.df['low']) > (4 * (self.df['open'] - self.df['close']))) \
-            & (((self.df['close'] - self.df['low']) / (.001 + self.df['high'] - self.df['low'])) >= 0.75) \
-            & (((self.df['open'] - self.df['low']) / (.001 + self.df['high'] - self.df['low'])) >= 0.75) \
-            & (self.df['high'].shift(1) < self.df['open']) \
-            & (self.df['high'].shift(2) < self.df['open'])
+        return self.candlestickPatterns()['hanging_man']
 
     def addCandleHangingMan(self):
         self.df['hanging_man'] = self.candleHangingMan()
@@ -123,9 +346,7 @@ class TechnicalAnalysis():
     def candleInvertedHammer(self):
         """* Candlestick Detected: Inverted Hammer ("Weak - Continuation - Bullish Pattern - Up")"""
 
-        return (((self.df['high'] - self.df['low']) > 3 * (self.df['open'] - self.df['close'])) \
-            & ((self.df['high'] - self.df['close']) / (.001 + self.df['high'] - self.df['low']) > 0.6) \
-            & ((self.df['high'] - self.df['open']) / (.001 + self.df['high'] - self.df['low']) > 0.6))
+        return self.candlestickPatterns()['inverted_hammer']
 
     def addCandleInvertedHammer(self):
         self.df['inverted_hammer'] = self.candleInvertedHammer()
@@ -133,12 +354,7 @@ class TechnicalAnalysis():
     def candleThreeWhiteSoldiers(self):
         """*** Candlestick Detected: Three White Soldiers ("Strong - Reversal - Bullish Pattern - Up")"""
 
-        return ((self.df['open'] > self.df['open'].shift(1)) & (self.df['open'] < self.df['close'].shift(1))) \
-            & (self.df['close'] > self.df['high'].shift(1)) \
-            & (self.df['high'] - np.maximum(self.df['open'], self.df['close']) < (abs(self.df['open'] - self.df['close']))) \
-            & ((self.df['open'].shift(1) > self.df['open'].shift(2)) & (self.df['open'].shift(1) < self.df['close'].shift(2))) \
-            & (self.df['close'].shift(1) > self.df['high'].shift(2)) \
-            & (self.df['high'].shift(1) - np.maximum(self.df['open'].shift(1), self.df['close'].shift(1)) < (abs(self.df['open'].shift(1) - self.df['close'].shift(1))))
+        return self.candlestickPatterns()['three_white_soldiers']
 
     def addCandleThreeWhiteSoldiers(self):
         self.df['three_white_soldiers'] = self.candleThreeWhiteSoldiers()
@@ -146,12 +362,7 @@ class TechnicalAnalysis():
     def candleThreeBlackCrows(self):
         """* Candlestick Detected: Three Black Crows ("Strong - Reversal - Bearish Pattern - Down")"""
 
-        return ((self.df['open'] < self.df['open'].shift(1)) & (self.df['open'] > self.df['close'].shift(1))) \
-            & (self.df['close'] < self.df['low'].shift(1)) \
-            & (self.df['low'] - np.maximum(self.df['open'], self.df['close']) < (abs(self.df['open'] - self.df['close']))) \
-            & ((self.df['open'].shift(1) < self.df['open'].shift(2)) & (self.df['open'].shift(1) > self.df['close'].shift(2))) \
-            & (self.df['close'].shift(1) < self.df['low'].shift(2)) \
-            & (self.df['low'].shift(1) - np.maximum(self.df['open'].shift(1), self.df['close'].shift(1)) < (abs(self.df['open'].shift(1) - self.df['close'].shift(1))))
+        return self.candlestickPatterns()['three_black_crows']
 
     def addCandleThreeBlackCrows(self):
         self.df['three_black_crows'] = self.candleThreeBlackCrows()
@@ -159,9 +370,7 @@ class TechnicalAnalysis():
     def candleDoji(self):
         """! Candlestick Detected: Doji ("Indecision")"""
 
-        return ((abs(self.df['close'] - self.df['open']) / (self.df['high'] - self.df['low'])) < 0.1) \
-            & ((self.df['high'] - np.maximum(self.df['close'], self.df['open'])) > (3 * abs(self.df['close'] - self.df['open']))) \
-            & ((np.minimum(self.df['close'], self.df['open']) - self.df['low']) > (3 * abs(self.df['close'] - self.df['open'])))
+        return self.candlestickPatterns()['doji']
 
     def addCandleDoji(self):
         self.df['doji'] = self.candleDoji()
@@ -169,13 +378,7 @@ class TechnicalAnalysis():
     def candleThreeLineStrike(self):
         """** Candlestick Detected: Three Line Strike ("Reliable - Reversal - Bullish Pattern - Up")"""
 
-        return ((self.df['open'].shift(1) < self.df['open'].shift(2)) & (self.df['open'].shift(1) > self.df['close'].shift(2))) \
-            & (self.df['close'].shift(1) < self.df['low'].shift(2)) \
-            & (self.df['low'].shift(1) - np.maximum(self.df['open'].shift(1), self.df['close'].shift(1)) < (abs(self.df['open'].shift(1) - self.df['close'].shift(1)))) \
-            & ((self.df['open'].shift(2) < self.df['open'].shift(3)) & (self.df['open'].shift(2) > self.df['close'].shift(3))) \
-            & (self.df['close'].shift(2) < self.df['low'].shift(3)) \
-            & (self.df['low'].shift(2) - np.maximum(self.df['open'].shift(2), self.df['close'].shift(2)) < (abs(self.df['open'].shift(2) - self.df['close'].shift(2)))) \
-            & ((self.df['open'] < self.df['low'].shift(1)) & (self.df['close'] > self.df['high'].shift(3)))
+        return self.candlestickPatterns()['three_line_strike']
 
     def addCandleThreeLineStrike(self):
         self.df['three_line_strike'] = self.candleThreeLineStrike()
@@ -183,10 +386,7 @@ class TechnicalAnalysis():
     def candleTwoBlackGapping(self):
         """*** Candlestick Detected: Two Black Gapping ("Reliable - Reversal - Bearish Pattern - Down")"""
 
-        return ((self.df['open'] < self.df['open'].shift(1)) & (self.df['open'] > self.df['close'].shift(1))) \
-            & (self.df['close'] < self.df['low'].shift(1)) \
-            & (self.df['low'] - np.maximum(self.df['open'], self.df['close']) < (abs(self.df['open'] - self.df['close']))) \
-            & (self.df['high'].shift(1) < self.df['low'].shift(2))
+        return self.candlestickPatterns()['two_black_gapping']
 
     def addCandleTwoBlackGapping(self):
         self.df['two_black_gapping'] = self.candleTwoBlackGapping()
@@ -194,8 +394,7 @@ class TechnicalAnalysis():
     def candleMorningStar(self):
         """*** Candlestick Detected: Morning Star ("Strong - Reversal - Bullish Pattern - Up")"""
 
-        return ((np.maximum(self.df['open'].shift(1), self.df['close'].shift(1)) < self.df['close'].shift(2)) & (self.df['close'].shift(2) < self.df['open'].shift(2))) \
-            & ((self.df['close'] > self.df['open']) & (self.df['open'] > np.maximum(self.df['open'].shift(1), self.df['close'].shift(1))))
+        return self.candlestickPatterns()['morning_star']
 
     def addCandleMorningStar(self):
         self.df['morning_star'] = self.candleMorningStar()
@@ -203,8 +402,7 @@ class TechnicalAnalysis():
     def candleEveningStar(self):
         """*** Candlestick Detected: Evening Star ("Strong - Reversal - Bearish Pattern - Down")"""
 
-        return ((np.minimum(self.df['open'].shift(1), self.df['close'].shift(1)) > self.df['close'].shift(2)) & (self.df['close'].shift(2) > self.df['open'].shift(2))) \
-            & ((self.df['close'] < self.df['open']) & (self.df['open'] < np.minimum(self.df['open'].shift(1), self.df['close'].shift(1))))
+        return self.candlestickPatterns()['evening_star']
 
     def addCandleEveningStar(self):
         self.df['evening_star'] = self.candleEveningStar()
@@ -212,10 +410,7 @@ class TechnicalAnalysis():
     def candleAbandonedBaby(self):
         """** Candlestick Detected: Abandoned Baby ("Reliable - Reversal - Bullish Pattern - Up")"""
 
-        return (self.df['open'] < self.df['close']) \
-            & (self.df['high'].shift(1) < self.df['low']) \
-            & (self.df['open'].shift(2) > self.df['close'].shift(2)) \
-            & (self.df['high'].shift(1) < self.df['low'].shift(2))
+        return self.candlestickPatterns()['abandoned_baby']
 
     def addCandleAbandonedBaby(self):
         self.df['abandoned_baby'] = self.candleAbandonedBaby()
@@ -223,18 +418,7 @@ class TechnicalAnalysis():
     def candleMorningDojiStar(self):
         """** Candlestick Detected: Morning Doji Star ("Reliable - Reversal - Bullish Pattern - Up")"""
 
-        return (self.df['close'].shift(2) < self.df['open'].shift(2)) \
-            & (abs(self.df['close'].shift(2) - self.df['open'].shift(2)) / (self.df['high'].shift(2) - self.df['low'].shift(2)) >= 0.7) \
-            & (abs(self.df['close'].shift(1) - self.df['open'].shift(1)) / (self.df['high'].shift(1) - self.df['low'].shift(1)) < 0.1) \
-            & (self.df['close'] > self.df['open']) \
-            & (abs(self.df['close'] - self.df['open']) / (self.df['high'] - self.df['low']) >= 0.7) \
-            & (self.df['close'].shift(2) > self.df['close'].shift(1)) \
-            & (self.df['close'].shift(2) > self.df['open'].shift(1)) \
-            & (self.df['close'].shift(1) < self.df['open']) \
-            & (self.df['open'].shift(1) < self.df['open']) \
-            & (self.df['close'] > self.df['close'].shift(2)) \
-            & ((self.df['high'].shift(1) - np.maximum(self.df['close'].shift(1), self.df['open'].shift(1))) > (3 * abs(self.df['close'].shift(1) - self.df['open'].shift(1)))) \
-            & (np.minimum(self.df['close'].shift(1), self.df['open'].shift(1)) - self.df['low'].shift(1)) > (3 * abs(self.df['close'].shift(1) - self.df['open'].shift(1)))
+        return self.candlestickPatterns()['morning_doji_star']
 
     def addCandleMorningDojiStar(self):
         self.df['morning_doji_star'] = self.candleMorningDojiStar()
@@ -242,18 +426,7 @@ class TechnicalAnalysis():
     def candleEveningDojiStar(self):
         """** Candlestick Detected: Evening Doji Star ("Reliable - Reversal - Bearish Pattern - Down")"""
 
-        return (self.df['close'].shift(2) > self.df['open'].shift(2)) \
-            & (abs(self.df['close'].shift(2) - self.df['open'].shift(2)) / (self.df['high'].shift(2) - self.df['low'].shift(2)) >= 0.7) \
-            & (abs(self.df['close'].shift(1) - self.df['open'].shift(1)) / (self.df['high'].shift(1) - self.df['low'].shift(1)) < 0.1) \
-            & (self.df['close'] < self.df['open']) \
-            & (abs(self.df['close'] - self.df['open']) / (self.df['high'] - self.df['low']) >= 0.7) \
-            & (self.df['close'].shift(2) < self.df['close'].shift(1)) \
-            & (self.df['close'].shift(2) < self.df['open'].shift(1)) \
-            & (self.df['close'].shift(1) > self.df['open']) \
-            & (self.df['open'].shift(1) > self.df['open']) \
-            & (self.df['close'] < self.df['close'].shift(2)) \
-            & ((self.df['high'].shift(1) - np.maximum(self.df['close'].shift(1), self.df['open'].shift(1))) > (3 * abs(self.df['close'].shift(1) - self.df['open'].shift(1)))) \
-            & (np.minimum(self.df['close'].shift(1), self.df['open'].shift(1)) - self.df['low'].shift(1)) > (3 * abs(self.df['close'].shift(1) - self.df['open'].shift(1)))
+        return self.candlestickPatterns()['evening_doji_star']
 
     def addCandleEveningDojiStar(self):
         self.df['evening_doji_star'] = self.candleEveningDojiStar()
@@ -261,30 +434,16 @@ class TechnicalAnalysis():
     def candleAstralBuy(self):
         """*** Candlestick Detected: Astral Buy (Fibonacci 3, 5, 8)"""
 
-        return (self.df['close'] < self.df['close'].shift(3)) & (self.df['low'] < self.df['low'].shift(5)) \
-            & (self.df['close'].shift(1) < self.df['close'].shift(4)) & (self.df['low'].shift(1) < self.df['low'].shift(6)) \
-            & (self.df['close'].shift(2) < self.df['close'].shift(5)) & (self.df['low'].shift(2) < self.df['low'].shift(7)) \
-            & (self.df['close'].shift(3) < self.df['close'].shift(6)) & (self.df['low'].shift(3) < self.df['low'].shift(8)) \
-            & (self.df['close'].shift(4) < self.df['close'].shift(7)) & (self.df['low'].shift(4) < self.df['low'].shift(9)) \
-            & (self.df['close'].shift(5) < self.df['close'].shift(8)) & (self.df['low'].shift(5) < self.df['low'].shift(10)) \
-            & (self.df['close'].shift(6) < self.df['close'].shift(9)) & (self.df['low'].shift(6) < self.df['low'].shift(11)) \
-            & (self.df['close'].shift(7) < self.df['close'].shift(10)) & (self.df['low'].shift(7) < self.df['low'].shift(12))
-  
+        return self.candlestickPatterns()['astral_buy']
+
     def addCandleAstralBuy(self):
         self.df['astral_buy'] = self.candleAstralBuy()
 
     def candleAstralSell(self):
         """*** Candlestick Detected: Astral Sell (Fibonacci 3, 5, 8)"""
 
-        return (self.df['close'] > self.df['close'].shift(3)) & (self.df['high'] > self.df['high'].shift(5)) \
-            & (self.df['close'].shift(1) > self.df['close'].shift(4)) & (self.df['high'].shift(1) > self.df['high'].shift(6)) \
-            & (self.df['close'].shift(2) > self.df['close'].shift(5)) & (self.df['high'].shift(2) > self.df['high'].shift(7)) \
-            & (self.df['close'].shift(3) > self.df['close'].shift(6)) & (self.df['high'].shift(3) > self.df['high'].shift(8)) \
-            & (self.df['close'].shift(4) > self.df['close'].shift(7)) & (self.df['high'].shift(4) > self.df['high'].shift(9)) \
-            & (self.df['close'].shift(5) > self.df['close'].shift(8)) & (self.df['high'].shift(5) > self.df['high'].shift(10)) \
-            & (self.df['close'].shift(6) > self.df['close'].shift(9)) & (self.df['high'].shift(6) > self.df['high'].shift(11)) \
-            & (self.df['close'].shift(7) > self.df['close'].shift(10)) & (self.df['high'].shift(7) > self.df['high'].shift(12))
-  
+        return self.candlestickPatterns()['astral_sell']
+
     def addCandleAstralSell(self):
         self.df['astral_sell'] = self.candleAstralSell()
 
@@ -325,7 +484,8 @@ class TechnicalAnalysis():
         if len(self.df) < period:
             raise Exception('Data range too small.')
 
-        return self.df.close.ewm(span=period, adjust=False).mean()
+        ema = Kernels.exponentialMean(self.df['close'].to_numpy(dtype=float), (period - 1) / 2)
+        return pd.Series(ema, index=self.df.index, name='close')
 
     def addEMA(self, period):
         """Adds the Exponential Moving Average (EMA) the DateFrame"""
@@ -353,20 +513,21 @@ class TechnicalAnalysis():
         if(len(series) < interval):
             raise IndexError('Pandas Series smaller than interval.')
 
-        diff = series.diff(1).dropna()
+        diff = np.diff(series.to_numpy(dtype=float))
 
-        sum_gains = 0 * diff
-        sum_gains[diff > 0] = diff[diff > 0]
-        avg_gains = sum_gains.ewm(com=interval-1, min_periods=interval).mean()
+        # the average gains, then the average losses and the RSI, are calculated in place
+        rsi = np.maximum(diff, 0)
+        Kernels.exponentialMean(rsi, interval - 1, True, interval, out=rsi)
+        avg_losses = Kernels.exponentialMean(np.minimum(diff, 0, out=diff), interval - 1, True, interval, out=diff)
 
-        sum_losses = 0 * diff
-        sum_losses[diff < 0] = diff[diff < 0]
-        avg_losses = sum_losses.ewm(com=interval-1, min_periods=interval).mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(rsi, avg_losses, out=rsi)
+        np.abs(rsi, out=rsi)
+        np.add(rsi, 1, out=rsi)
+        np.divide(100, rsi, out=rsi)
+        np.subtract(100, rsi, out=rsi)
 
-        rs = abs(avg_gains / avg_losses)
-        rsi = 100 - 100 / (1 + rs)
-
-        return rsi
+        return pd.Series(rsi, index=series.index[1:], name=series.name)
 
     def addFibonacciBollingerBands(self, interval=20, multiplier=3):
         """Adds Fibonacci Bollinger Bands."""
@@ -377,26 +538,27 @@ class TechnicalAnalysis():
         if not isinstance(multiplier, int):
             raise TypeError('Multiplier integer required.')
 
-        tp = (self.df['high'] + self.df['low'] + self.df['close']) / 3
-        sma = tp.rolling(interval).mean()
-        sd = multiplier * tp.rolling(interval).std()
-
-        sma = sma.fillna(0)
-        sd = sd.fillna(0)
-
-        self.df['fbb_mid'] = sma
-        self.df['fbb_upper0_236'] = sma + (0.236 * sd)
-        self.df['fbb_upper0_382'] = sma + (0.382 * sd)
-        self.df['fbb_upper0_5'] = sma + (0.5 * sd)
-        self.df['fbb_upper0_618'] = sma + (0.618 * sd)
-        self.df['fbb_upper0_764'] = sma + (0.764 * sd)
-        self.df['fbb_upper1'] = sma + (1 * sd)
-        self.df['fbb_lower0_236'] = sma - (0.236 * sd)
-        self.df['fbb_lower0_382'] = sma - (0.382 * sd)
-        self.df['fbb_lower0_5'] = sma - (0.5 * sd)
-        self.df['fbb_lower0_618'] = sma - (0.618 * sd)
-        self.df['fbb_lower0_764'] = sma - (0.764 * sd)
-        self.df['fbb_lower1'] = sma - (1 * sd)
+        # the typical price, then the bands, are calculated in place
+        tp = self.df['high'].to_numpy(dtype=float) + self.df['low'].to_numpy(dtype=float)
+        np.add(tp, self.df['close'].to_numpy(dtype=float), out=tp)
+        np.divide(tp, 3, out=tp)
+
+        sma = np.nan_to_num(Kernels.rollingMean(tp, interval), copy=False, nan=0)
+        sd = np.nan_to_num(Kernels.rollingStd(tp, interval), copy=False, nan=0)
+        np.multiply(multiplier, sd, out=sd)
+
+        ratios = [ 0.236, 0.382, 0.5, 0.618, 0.764, 1 ]
+        bands = np.empty((len(sma), 1 + (2 * len(ratios))), order='F')
+        bands[:, 0] = sma
+        for i, ratio in enumerate(ratios):
+            np.multiply(ratio, sd, out=bands[:, 1 + i])
+            np.add(sma, bands[:, 1 + i], out=bands[:, 1 + i])
+            np.multiply(ratio, sd, out=bands[:, 1 + len(ratios) + i])
+            np.subtract(sma, bands[:, 1 + len(ratios) + i], out=bands[:, 1 + len(ratios) + i])
+
+        for i, column in enumerate([ 'fbb_mid', 'fbb_upper0_236', 'fbb_upper0_382', 'fbb_upper0_5', 'fbb_upper0_618', 'fbb_upper0_764', 'fbb_upper1',
+            'fbb_lower0_236', 'fbb_lower0_382', 'fbb_lower0_5', 'fbb_lower0_618', 'fbb_lower0_764', 'fbb_lower1' ]):
+            self.df[column] = bands[:, i]
 
     def movingAverageConvergenceDivergence(self):
         """Calculates the Moving Average Convergence Divergence (MACD)"""
@@ -412,7 +574,7 @@ class TechnicalAnalysis():
 
         df = pd.DataFrame()
         df['macd'] = self.df['ema12'] - self.df['ema26']
-        df['signal'] = df['macd'].ewm(span=9, adjust=False).mean()        
+        df['signal'] = Kernels.exponentialMean(df['macd'].to_numpy(dtype=float), (9 - 1) / 2)
         return df
 
     def addMACD(self):
@@ -462,12 +624,16 @@ class TechnicalAnalysis():
         self.df['rsi' + str(period)] = self.relativeStrengthIndex(period)   
         self.df['rsi' + str(period)] = self.df['rsi' + str(period)].replace(np.nan, 50)
 
-    def seasonalARIMAModel(self):
-        """Returns the Seasonal ARIMA Model for price predictions"""
+    def seasonalARIMAModel(self, wait=True):
+        """Returns the Seasonal ARIMA Model for price predictions
 
-        # parameters for SARIMAX
-        model = SARIMAX(self.df['close'], trend='n', order=(0,1,0), seasonal_order=(1,1,1,12))
-        return model.fit(disp=-1)
+        Parameters
+        ----------
+        wait : bool
+            Waits for a refit that is due, False predicts with the last fit until it finishes
+        """
+
+        return self.forecast.getResults(self.df, wait)
 
     def seasonalARIMAModelFittedValues(self):
         """Returns the Seasonal ARIMA Model for price predictions"""
@@ -486,7 +652,8 @@ class TechnicalAnalysis():
         if len(self.df) < period:
             raise Exception('Data range too small.')
 
-        return self.df.close.rolling(period, min_periods=1).mean()
+        sma = Kernels.rollingMean(self.df['close'].to_numpy(dtype=float), period, 1)
+        return pd.Series(sma, index=self.df.index, name='close')
 
     def addSMA(self, period):
         """Add the Simple Moving Average (SMA) to the DataFrame"""
@@ -544,13 +711,37 @@ class TechnicalAnalysis():
     def getSupportResistanceLevels(self):
         """Calculate the Support and Resistance Levels"""
 
-        self.levels = [] 
-        self.__calculateSupportResistenceLevels()
+        positions, levels, spacing = self.getSupportResistancePivots()
+        self.levels = self.__filterLevels(positions, levels, spacing)
+
         levels_ts = {}
         for level in self.levels:
             levels_ts[self.df.index[level[0]]] = level[1]
         # add the support levels to the DataFrame
-        return pd.Series(levels_ts)
+        return pd.Series(levels_ts, dtype='float64')
+
+    def getSupportResistancePivots(self):
+        """Returns the positions and levels of the fractal support and resistance pivots, and the mean candle range
+
+        A support pivot has two falling lows before and two rising lows after
+        it, a resistance pivot the same with highs. Candles that are both are
+        support pivots.
+        """
+
+        low = self.df['low'].to_numpy(dtype='float64')
+        high = self.df['high'].to_numpy(dtype='float64')
+        spacing = (self.df['high'] - self.df['low']).mean()
+
+        if len(low) < 5:
+            return np.array([], dtype='int64'), np.array([], dtype='float64'), spacing
+
+        support = (low[2:-2] < low[1:-3]) & (low[2:-2] < low[3:-1]) & (low[3:-1] < low[4:]) & (low[1:-3] < low[:-4])
+        resistance = (high[2:-2] > high[1:-3]) & (high[2:-2] > high[3:-1]) & (high[3:-1] > high[4:]) & (high[1:-3] > high[:-4])
+
+        pivots = np.flatnonzero(support | resistance)
+        levels = np.where(support, low[2:-2], high[2:-2])[pivots]
+
+        return pivots + 2, levels, spacing
 
     def printSupportResistanceLevel(self, price=0):
         if isinstance(price, int) or isinstance(price, float):
@@ -656,8 +847,9 @@ class TechnicalAnalysis():
         if not isinstance(price, int) and not isinstance(price, float):
             raise TypeError('Optional price is not numeric.')
 
-        price_min = self.df.close.min()
-        price_max = self.df.close.max()
+        # NumPy reductions, a backtest asks for the levels at every buy
+        price_min = np.nanmin(self.df['close'].to_numpy(dtype=float))
+        price_max = np.nanmax(self.df['close'].to_numpy(dtype=float))
         
         diff = price_max - price_min
         
@@ -733,50 +925,349 @@ class TechnicalAnalysis():
         if not isinstance(self.df, pd.DataFrame):
             raise TypeError('Pandas DataFrame required.')
 
+        self.addAll()
+
         try:
             self.df.to_csv(filename)
         except OSError:
             print('Unable to save: ', filename)
 
-    def __calculateSupportResistenceLevels(self):
-        """Support and Resistance levels. (private function)"""
-
-        for i in range(2, self.df.shape[0] - 2):
-            if self.__isSupport(self.df, i):
-                l = self.df['low'][i]
-                if self.__isFarFromLevel(l):
-                    self.levels.append((i, l))
-            elif self.__isResistance(self.df, i):
-                l = self.df['high'][i]
-                if self.__isFarFromLevel(l):
-                    self.levels.append((i, l))
-        return self.levels
-
-    def __isSupport(self, df, i):
-        """Is support level? (privte function)"""
-
-        c1 = df['low'][i] < df['low'][i - 1]
-        c2 = df['low'][i] < df['low'][i + 1]
-        c3 = df['low'][i + 1] < df['low'][i + 2]
-        c4 = df['low'][i - 1] < df['low'][i - 2]
-        support = c1 and c2 and c3 and c4
-        return support
-
-    def __isResistance(self, df, i):
-        """Is resistance level? (private function)"""
-
-        c1 = df['high'][i] > df['high'][i - 1]
-        c2 = df['high'][i] > df['high'][i + 1]
-        c3 = df['high'][i + 1] > df['high'][i + 2]
-        c4 = df['high'][i - 1] > df['high'][i - 2]
-        resistance = c1 and c2 and c3 and c4
-        return resistance
-
-    def __isFarFromLevel(self, l):
-        """Is far from support level? (private function)"""
-
-        s = np.mean(self.df['high'] - self.df['low'])
-        return np.sum([abs(l-x) < s for x in self.levels]) == 0
+    def __filterLevels(self, positions, levels, spacing):
+        """Keeps the pivots further than the mean candle range from the levels kept before them (private function)"""
+
+        kept = []
+        # levels kept so far, sorted so only the nearest two need checking
+        sorted_levels = []
+
+        for i, l in zip(positions, levels):
+            j = bisect.bisect_left(sorted_levels, l)
+            if j < len(sorted_levels) and abs(l - sorted_levels[j]) < spacing:
+                continue
+            if j > 0 and abs(l - sorted_levels[j - 1]) < spacing:
+                continue
+
+            sorted_levels.insert(j, l)
+            kept.append((int(i), l))
+
+        return kept
 
     def __truncate(self, f, n):
-        return math.floor(f * 10 ** n) / 10 ** n
\ No newline at end of file
+        return math.floor(f * 10 ** n) / 10 ** n
+
+
+class IncrementalTechnicalAnalysis(TechnicalAnalysis):
+    def __init__(self, data=pd.DataFrame()):
+        """Incremental Technical Analysis object model
+
+        Keeps the running state of every indicator added by addAll() so that
+        appending a candle, or revising the last one, does not analyse the
+        candles again. The moving averages take amortised constant time,
+        while the Bollinger band deviation sums its 20 candle window and the
+        candlestick patterns are calculated on the last 13 candles. The
+        DataFrame matches TechnicalAnalysis.addAll() on the same data.
+
+        Parameters
+        ----------
+        data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        """
+
+        TechnicalAnalysis.__init__(self, data)
+
+    @property
+    def df(self):
+        """The Pandas DataFrame, built on demand from the analysed candles"""
+
+        if self.__df is None:
+            self.__df = pd.DataFrame(self.__columns, index=pd.Index(self.__index, name=self.__index_name))
+
+        return self.__df
+
+    @df.setter
+    def df(self, data):
+        self.__load(data)
+
+    def addAll(self):
+        """Analysis is maintained as candles are added, nothing to do"""
+
+        return
+
+    def require(self, *columns):
+        """Analysis is maintained as candles are added, nothing to do"""
+
+        return
+
+    def getSupportResistancePivots(self):
+        """Returns the positions and levels of the support and resistance pivots, maintained as candles are added"""
+
+        positions = np.array(list(self.__pivots.keys()), dtype='int64')
+        levels = np.array(list(self.__pivots.values()), dtype='float64')
+        spacing = self.__state['range']['sum'] / self.__state['range']['nobs'] if self.__state['range']['nobs'] > 0 else np.nan
+
+        return positions, levels, spacing
+
+    def getLastRow(self):
+        """Returns the last candle and its analysis as a dictionary"""
+
+        if len(self.__index) == 0:
+            return {}
+
+        return { column: values[-1] for column, values in self.__columns.items() }
+
+    def update(self, data):
+        """Appends new candles or revises the last candle
+
+        Parameters
+        ----------
+        data : Pandas Time Series
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+        """
+
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        if list(data.keys()) != self.__raw_columns:
+            raise ValueError('Data not not contain date, market, granularity, low, high, open, close, volume')
+
+        for ts, candle in zip(data.index, data.to_dict('records')):
+            if len(self.__index) > 0 and ts == self.__index[-1]:
+                revise = True
+            elif len(self.__index) == 0 or ts > self.__index[-1]:
+                revise = False
+            else:
+                raise ValueError('Candle ' + str(ts) + ' is older than the last candle.')
+
+            self.__addCandle(ts, candle, self.__lastCandlePatterns, revise)
+
+        self.__df = None
+
+    def __load(self, data):
+        """Analyses the initial candles (private function)"""
+
+        self.__raw_columns = list(data.keys())
+        self.__index = []
+        self.__index_name = data.index.name
+        self.__columns = { column: [] for column in self.__raw_columns }
+        self.__tp = []
+        self.__pivots = {}
+        self.__state = self.__initialState()
+        self.__state_previous = None
+        self.__df = None
+
+        if len(data) == 0:
+            return
+
+        patterns = self.__candlePatterns(data)
+
+        for i, (ts, candle) in enumerate(zip(data.index, data.to_dict('records'))):
+            self.__addCandle(ts, candle, lambda: { name: values[i] for name, values in patterns.items() }, False)
+
+    def __addCandle(self, ts, candle, patterns, revise):
+        """Adds or revises the last candle and its analysis (private function)"""
+
+        if revise:
+            self.__state = self.__copyState(self.__state_previous)
+            self.__index[-1] = ts
+            for column in self.__raw_columns:
+                self.__columns[column][-1] = candle[column]
+            self.__tp[-1] = (candle['high'] + candle['low'] + candle['close']) / 3
+        else:
+            self.__state_previous = self.__copyState(self.__state)
+            self.__index.append(ts)
+            for column in self.__raw_columns:
+                self.__columns[column].append(candle[column])
+            self.__tp.append((candle['high'] + candle['low'] + candle['close']) / 3)
+
+        row = self.__analyseLastCandle()
+        row.update(patterns())
+        self.__updatePivots()
+
+        for column, value in row.items():
+            if column not in self.__columns:
+                self.__columns[column] = []
+            if revise:
+                self.__columns[column][-1] = value
+            else:
+                self.__columns[column].append(value)
+
+    def __analyseLastCandle(self):
+        """Updates the running state with the last candle (private function)"""
+
+        state = self.__state
+        i = len(self.__index) - 1
+        close = np.float64(self.__columns['close'][i])
+        high = self.__columns['high'][i]
+        low = self.__columns['low'][i]
+        volume = self.__columns['volume'][i]
+        prev_close = np.float64(self.__columns['close'][i - 1]) if i > 0 else np.nan
+        row = {}
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            close_pc = close / prev_close - 1
+            if np.isnan(close_pc):
+                close_pc = 0.0
+            row['close_pc'] = close_pc
+            state['close_cpc'] = 1 + close_pc if i == 0 else state['close_cpc'] * (1 + close_pc)
+            row['close_cpc'] = state['close_cpc']
+
+            row['cma'] = self.__rollingMean(state['cma'], close, None, 1)
+            for period in [ 20, 50, 200 ]:
+                row['sma' + str(period)] = Kernels.rollingMeanStep(state['sma' + str(period)], self.__columns['close'], period, 1)
+            row['ema12'] = Kernels.exponentialMeanStep(state['ema12'], close, (12 - 1) / 2)
+            row['ema26'] = Kernels.exponentialMeanStep(state['ema26'], close, (26 - 1) / 2)
+            row['goldencross'] = row['sma50'] > row['sma200']
+            row['deathcross'] = row['sma50'] < row['sma200']
+
+            sma = Kernels.rollingMeanStep(state['tp20'], self.__tp, 20)
+            sd = 3 * Kernels.rollingStdStep(self.__tp, sma, 20)
+            sma = 0.0 if np.isnan(sma) else sma
+            sd = 0.0 if np.isnan(sd) else sd
+            row['fbb_mid'] = sma
+            for ratio, name in [ (0.236, '0_236'), (0.382, '0_382'), (0.5, '0_5'), (0.618, '0_618'), (0.764, '0_764'), (1, '1') ]:
+                row['fbb_upper' + name] = sma + (ratio * sd)
+            for ratio, name in [ (0.236, '0_236'), (0.382, '0_382'), (0.5, '0_5'), (0.618, '0_618'), (0.764, '0_764'), (1, '1') ]:
+                row['fbb_lower' + name] = sma - (ratio * sd)
+
+            rsi = np.nan
+            if i > 0:
+                diff = close - prev_close
+                avg_gain = Kernels.exponentialMeanStep(state['rsi_gain'], max(diff, 0), 14 - 1, True, 14)
+                avg_loss = Kernels.exponentialMeanStep(state['rsi_loss'], min(diff, 0), 14 - 1, True, 14)
+                rs = abs(np.float64(avg_gain) / avg_loss)
+                rsi = 100 - 100 / (1 + rs)
+            row['rsi14'] = 50.0 if np.isnan(rsi) else rsi
+
+            row['macd'] = row['ema12'] - row['ema26']
+            row['signal'] = Kernels.exponentialMeanStep(state['signal'], row['macd'], (9 - 1) / 2)
+
+            if i == 0 or not (close == prev_close or close > prev_close or close < prev_close):
+                obv_change = self.__columns['volume'][0]
+            elif close == prev_close:
+                obv_change = 0
+            elif close > prev_close:
+                obv_change = volume
+            else:
+                obv_change = -volume
+            prev_obv = state['obv']
+            state['obv'] = obv_change if i == 0 else state['obv'] + obv_change
+            row['obv'] = state['obv']
+            obv_pc = (np.float64(state['obv']) / prev_obv - 1) * 100 if i > 0 else np.nan
+            row['obv_pc'] = np.round(0.0 if np.isnan(obv_pc) else obv_pc, 2)
+
+            row['ema13'] = Kernels.exponentialMeanStep(state['ema13'], close, (13 - 1) / 2)
+            row['elder_ray_bull'] = high - row['ema13']
+            row['elder_ray_bear'] = low - row['ema13']
+            prev_bull = state['elder_ray_bull']
+            prev_bear = state['elder_ray_bear']
+            row['eri_buy'] = bool(((row['elder_ray_bear'] < 0) and (row['elder_ray_bear'] > prev_bear)) or (row['elder_ray_bull'] > prev_bull))
+            row['eri_sell'] = bool(((row['elder_ray_bull'] > 0) and (row['elder_ray_bull'] < prev_bull)) or (row['elder_ray_bull'] < prev_bull))
+            state['elder_ray_bull'] = row['elder_ray_bull']
+            state['elder_ray_bear'] = row['elder_ray_bear']
+
+        for first, second, gt, lt in [ ('ema12', 'ema26', 'ema12gtema26', 'ema12ltema26'),
+                                       ('sma50', 'sma200', 'sma50gtsma200', 'sma50ltsma200'),
+                                       ('macd', 'signal', 'macdgtsignal', 'macdltsignal') ]:
+            for column, value in [ (gt, bool(row[first] > row[second])), (lt, bool(row[first] < row[second])) ]:
+                row[column] = value
+                row[column + 'co'] = value and (i == 0 or value != state[column])
+                state[column] = value
+
+        return row
+
+    def __updatePivots(self):
+        """Updates the candle range and the pivot two candles before the last candle (private function)"""
+
+        low = self.__columns['low']
+        high = self.__columns['high']
+        i = len(self.__index) - 3
+
+        candle_range = np.float64(high[-1]) - np.float64(low[-1])
+        if candle_range == candle_range:
+            self.__state['range']['nobs'] += 1
+            self.__state['range']['sum'] += candle_range
+
+        if i < 2:
+            return
+
+        # the last candle may be revised, so the pivot it completes is decided again
+        self.__pivots.pop(i, None)
+
+        if low[i] < low[i - 1] and low[i] < low[i + 1] and low[i + 1] < low[i + 2] and low[i - 1] < low[i - 2]:
+            self.__pivots[i] = np.float64(low[i])
+        elif high[i] > high[i - 1] and high[i] > high[i + 1] and high[i + 1] > high[i + 2] and high[i - 1] > high[i - 2]:
+            self.__pivots[i] = np.float64(high[i])
+
+    def __lastCandlePatterns(self):
+        """Candlestick patterns of the last candle, they look back at most 12 candles (private function)"""
+
+        tail = [ self.__columns[column][-13:] for column in [ 'open', 'high', 'low', 'close' ] ]
+        return { name: values[-1] for name, values in self.calculateCandlestickPatterns(*tail).items() }
+
+    def __candlePatterns(self, data):
+        """Candlestick patterns of the initial candles (private function)"""
+
+        return self.calculateCandlestickPatterns(data['open'].values, data['high'].values, data['low'].values, data['close'].values)
+
+    def __initialState(self):
+        """Running state before the first candle (private function)"""
+
+        state = {
+            'close_cpc': 1.0,
+            'obv': 0,
+            'elder_ray_bull': np.nan,
+            'elder_ray_bear': np.nan,
+            'cma': { 'nobs': 0, 'sum': 0.0, 'neg_ct': 0, 'compensation_add': 0.0, 'compensation_remove': 0.0, 'consecutive': 0, 'prev': np.nan },
+            'range': { 'nobs': 0, 'sum': 0.0 }
+        }
+
+        for name in [ 'ema12', 'ema26', 'ema13', 'signal', 'rsi_gain', 'rsi_loss' ]:
+            state[name] = { 'count': 0, 'mean': 0.0, 'weight': 0.0 }
+
+        # the rolling means read the candles of the previous block of the window once per block
+        for name in [ 'sma20', 'sma50', 'sma200', 'tp20' ]:
+            state[name] = { 'count': 0, 'prefix': 0.0, 'suffix': None, 'run': 0, 'prev': np.nan }
+
+        return state
+
+    def __copyState(self, state):
+        """Copies the running state (private function)"""
+
+        return { key: dict(value) if isinstance(value, dict) else value for key, value in state.items() }
+
+    def __rollingMean(self, state, value, removed, min_periods):
+        """Next value of a rolling mean using Kahan summation, as Pandas rolling().mean() (private function)"""
+
+        if state['nobs'] == 0 and state['prev'] != state['prev']:
+            state['prev'] = value
+
+        if removed is not None and removed == removed:
+            state['nobs'] -= 1
+            y = - removed - state['compensation_remove']
+            t = state['sum'] + y
+            state['compensation_remove'] = t - state['sum'] - y
+            state['sum'] = t
+            if math.copysign(1, removed) < 0:
+                state['neg_ct'] -= 1
+
+        if value == value:
+            state['nobs'] += 1
+            y = value - state['compensation_add']
+            t = state['sum'] + y
+            state['compensation_add'] = t - state['sum'] - y
+            state['sum'] = t
+            if math.copysign(1, value) < 0:
+                state['neg_ct'] += 1
+            state['consecutive'] = state['consecutive'] + 1 if value == state['prev'] else 1
+            state['prev'] = value
+
+        if state['nobs'] >= min_periods and state['nobs'] > 0:
+            result = state['sum'] / state['nobs']
+            if state['consecutive'] >= state['nobs']:
+                result = state['prev']
+            elif state['neg_ct'] == 0 and result < 0:
+                result = 0.0
+            elif state['neg_ct'] == state['nobs'] and result > 0:
+                result = 0.0
+            return result
+
+        return np.nan
@@ -3,11 +3,11 @@
 import sys
 import numpy as np
 import pandas as pd
-import json, math, re, requests, sys
+import json, math, os, re, requests, sys
 from datetime import datetime
-from binance.client import Client
-from models.Binance import AuthAPI as BAuthAPI, PublicAPI as BPublicAPI
-from models.CoinbasePro import AuthAPI as CBAuthAPI, PublicAPI as CBPublicAPI
+from models.ClientRegistry import client_registry
+from models.OrderLedger import OrderLedger
+from models.PaperTrading import PaperTradingEngine
 
 # production: disable traceback
 sys.tracebacklimit = 0
@@ -26,15 +26,9 @@ class TradingAccount():
         if not isinstance(app, object):
             raise TypeError('App is not a PyCryptoBot object.')
 
-        if app.getExchange() == 'binance':
-            self.client = Client(app.getAPIKey(), app.getAPISecret(), { 'verify': False, 'timeout': 20 })
-
         # if trading account is for testing it will be instantiated with a balance of 1000
-        self.balance = pd.DataFrame([
-            [ 'QUOTE', 1000, 0, 1000 ],
-            [ 'BASE', 0, 0, 0 ]], 
-            columns=['currency','balance','hold','available'])
-        
+        self.paper_trading = PaperTradingEngine({ 'QUOTE': 1000, 'BASE': 0 })
+
         self.app = app
 
         if app.isLive() == 1:
@@ -42,7 +36,23 @@ class TradingAccount():
         else:
             self.mode = 'test'
 
-        self.orders = pd.DataFrame()
+        self.order_ledger = None
+
+    @property
+    def client(self):
+        """Binance API client of the account, shared by the process"""
+
+        return client_registry.getAuthAPI('binance', self.app.getAPIKey(), self.app.getAPISecret(), api_url=self.app.getAPIURL()).getClient()
+
+    @property
+    def orders(self):
+        """Dummy orders of test trading as a Pandas dataframe"""
+
+        return self.paper_trading.getOrders()
+
+    @orders.setter
+    def orders(self, orders):
+        self.paper_trading.setOrders(orders)
 
     def __convertStatus(self, val):
         if val == 'filled':
@@ -50,7 +60,7 @@ class TradingAccount():
         else:
             return val
 
-    def getOrders(self, market='', action='', status='all'):
+    def getOrders(self, market='', action='', status='all', iso8601start=''):
         """Retrieves orders either live or simulation
 
         Parameters
@@ -61,6 +71,8 @@ class TradingAccount():
             Filters orders by action
         status : str
             Filters orders by status, defaults to 'all'
+        iso8601start : str, optional
+            Retrieves the orders created from the ISO 8601 date, E.g. the last order already stored
         """
 
         if self.app.getExchange() == 'coinbasepro' and market != '':
@@ -85,7 +97,10 @@ class TradingAccount():
 
         if self.app.getExchange() == 'binance':
             if self.mode == 'live':
-                resp = self.client.get_all_orders(symbol=market)
+                if iso8601start != '':
+                    resp = self.client.get_all_orders(symbol=market, startTime=int(pd.Timestamp(iso8601start).timestamp() * 1000))
+                else:
+                    resp = self.client.get_all_orders(symbol=market)
                 if len(resp) > 0:
                     df = pd.DataFrame(resp)
                 else:
@@ -120,27 +135,25 @@ class TradingAccount():
 
                 return df
             else:
-               # return dummy orders
-                if market == '':
-                    return self.orders
-                else:
-                    if (len(self.orders) > 0):
-                        return self.orders[self.orders['market'] == market]
-                    else:
-                        return pd.DataFrame()                
+                # return dummy orders
+                return self.paper_trading.getOrders(market, iso8601start)
         if self.app.getExchange() == 'coinbasepro':
             if self.mode == 'live':
                 # if config is provided and live connect to Coinbase Pro account portfolio
-                model = CBAuthAPI(self.app.getAPIKey(), self.app.getAPISecret(), self.app.getAPIPassphrase(), self.app.getAPIURL())
+                model = client_registry.getAuthAPI('coinbasepro', self.app.getAPIKey(), self.app.getAPISecret(), self.app.getAPIPassphrase(), self.app.getAPIURL())
                 # retrieve orders from live Coinbase Pro account portfolio
-                self.orders = model.getOrders(market, action, status)
-                return self.orders
+                return model.getOrders(market, action, status, iso8601start)
             else:
                 # return dummy orders
-                if market == '':
-                    return self.orders
-                else:
-                    return self.orders[self.orders['market'] == market]
+                return self.paper_trading.getOrders(market, iso8601start)
+
+    def getOrderLedger(self):
+        """Returns the local ledger of the orders, not persisted for test trading"""
+
+        if self.order_ledger == None:
+            self.order_ledger = OrderLedger('orders.db' if self.mode == 'live' else ':memory:')
+
+        return self.order_ledger
 
     def getBalance(self, currency=''):
         """Retrieves balance either live or simulation
@@ -183,40 +196,12 @@ class TradingAccount():
                     return 0.0
             else:
                 # return dummy balances
-                if currency == '':
-                    # retrieve all balances
-                    return self.balance
-                else:
-                    if self.app.getExchange() == 'binance':
-                        self.balance = self.balance.replace('QUOTE', currency)
-                    else:    
-                        # replace QUOTE and BASE placeholders
-                        if currency in ['EUR','GBP','USD']:
-                            self.balance = self.balance.replace('QUOTE', currency)
-                        else:
-                            self.balance = self.balance.replace('BASE', currency)
-
-                    if self.balance.currency[self.balance.currency.isin([currency])].empty == True:
-                        self.balance.loc[len(self.balance)] = [currency,0,0,0]
-
-                    # retrieve balance of specified currency
-                    df = self.balance
-                    df_filtered = df[df['currency'] == currency]['available']
-
-                    if len(df_filtered) == 0:
-                        # return nil balance if no positive balance was found
-                        return 0.0
-                    else:
-                        # return balance of specified currency (if positive)
-                        if currency in ['EUR','GBP','USD']:
-                            return float(self.app.truncate(float(df[df['currency'] == currency]['available'].values[0]), 2))
-                        else:
-                            return float(self.app.truncate(float(df[df['currency'] == currency]['available'].values[0]), 4))
+                return self.__getDummyBalance(currency)
 
         else:
             if self.mode == 'live':
                 # if config is provided and live connect to Coinbase Pro account portfolio
-                model = CBAuthAPI(self.app.getAPIKey(), self.app.getAPISecret(), self.app.getAPIPassphrase(), self.app.getAPIURL())
+                model = client_registry.getAuthAPI('coinbasepro', self.app.getAPIKey(), self.app.getAPISecret(), self.app.getAPIPassphrase(), self.app.getAPIURL())
                 if currency == '':
                     # retrieve all balances
                     return model.getAccounts()[['currency', 'balance', 'hold', 'available']]
@@ -236,33 +221,30 @@ class TradingAccount():
                             
             else:
                 # return dummy balances
+                return self.__getDummyBalance(currency)
 
-                if currency == '':
-                    # retrieve all balances
-                    return self.balance
-                else:
-                    # replace QUOTE and BASE placeholders
-                    if currency in ['EUR','GBP','USD']:
-                        self.balance = self.balance.replace('QUOTE', currency)
-                    elif currency in ['BCH','BTC','ETH','LTC','XLM']:
-                        self.balance = self.balance.replace('BASE', currency)
+    def __getDummyBalance(self, currency=''):
+        """Retrieves the balance of test trading (private function)"""
 
-                    if self.balance.currency[self.balance.currency.isin([currency])].empty == True:
-                        self.balance.loc[len(self.balance)] = [currency,0,0,0]
+        if currency == '':
+            # retrieve all balances
+            return self.paper_trading.getBalances()
 
-                    # retrieve balance of specified currency
-                    df = self.balance
-                    df_filtered = df[df['currency'] == currency]['available']
+        self.__renameDummyCurrency(currency)
 
-                    if len(df_filtered) == 0:
-                        # return nil balance if no positive balance was found
-                        return 0.0
-                    else:
-                        # return balance of specified currency (if positive)
-                        if currency in ['EUR','GBP','USD']:
-                            return float(self.app.truncate(float(df[df['currency'] == currency]['available'].values[0]), 2))
-                        else:
-                            return float(self.app.truncate(float(df[df['currency'] == currency]['available'].values[0]), 4))
+        # return balance of specified currency, nil if never held
+        if currency in ['EUR','GBP','USD']:
+            return float(self.app.truncate(self.paper_trading.getBalance(currency), 2))
+        else:
+            return float(self.app.truncate(self.paper_trading.getBalance(currency), 4))
+
+    def __renameDummyCurrency(self, currency):
+        """Replaces the QUOTE and BASE placeholders of test trading (private function)"""
+
+        if self.app.getExchange() == 'binance' or currency in ['EUR','GBP','USD']:
+            self.paper_trading.renameCurrency('QUOTE', currency)
+        elif currency in ['BCH','BTC','ETH','LTC','XLM']:
+            self.paper_trading.renameCurrency('BASE', currency)
 
     def saveTrackerCSV(self, market='', save_file='tracker.csv'):
         """Saves order tracker to CSV
@@ -286,75 +268,35 @@ class TradingAccount():
             if not p.match(market):
                 raise TypeError('Binance market is invalid.')
 
+        ledger = self.getOrderLedger()
+        exchange = self.app.getExchange()
+
+        # only the orders from the last stored order are retrieved, those already stored are ignored
+        last_order_time = ledger.getLastOrderTime(exchange, market)
+        iso8601start = '' if last_order_time == None else last_order_time.isoformat()
+
         if self.mode == 'live':
-            if self.app.getExchange() == 'coinbasepro':
-                # retrieve orders from live Coinbase Pro account portfolio
-                df = self.getOrders(market, '', 'done')
-            elif self.app.getExchange() == 'binance':
-                # retrieve orders from live Binance account portfolio
-                df = self.getOrders(market, '', 'done')
+            if exchange in [ 'coinbasepro', 'binance' ]:
+                # retrieve orders from live Coinbase Pro or Binance account portfolio
+                df = self.getOrders(market, '', 'done', iso8601start)
             else:
                 df = pd.DataFrame()
         else:
             # return dummy orders
-            if market == '':
-                df = self.orders
-            else:
-                df = self.orders[self.orders['market'] == market]
-
-        if list(df.keys()) != [ 'created_at', 'market', 'action', 'type', 'size', 'value', 'status', 'price' ]:
-            # no data, return early
-            return False
-
-        df_tracker = pd.DataFrame()
-
-        last_action = ''
-        for market in df['market'].sort_values().unique():
-            df_market = df[df['market'] == market]
+            df = self.paper_trading.getOrders(market, iso8601start)
 
-            df_buy = pd.DataFrame()
-            df_sell = pd.DataFrame()
+        if list(df.keys()) == [ 'created_at', 'market', 'action', 'type', 'size', 'value', 'status', 'price' ]:
+            ledger.addOrders(exchange, df)
 
-            pair = 0
-            # pylint: disable=unused-variable
-            for index, row in df_market.iterrows():
-                if row['action'] == 'buy':
-                    pair = 1
+        df_tracker = ledger.pairOrders(exchange, market)
 
-                if pair == 1 and (row['action'] != last_action):
-                    if row['action'] == 'buy':
-                        df_buy = row
-                    elif row['action'] == 'sell':
-                        df_sell = row
-                            
-                if row['action'] == 'sell' and len(df_buy) != 0:
-                    df_pair = pd.DataFrame([
-                        [
-                            df_sell['status'], 
-                            df_buy['market'], 
-                            df_buy['created_at'], 
-                            df_buy['type'], 
-                            df_buy['size'],
-                            df_buy['value'], 
-                            df_buy['price'],
-                            df_sell['created_at'],
-                            df_sell['type'], 
-                            df_sell['size'], 
-                            df_sell['value'], 
-                            df_sell['price']                    
-                        ]], columns=[ 'status', 'market', 
-                            'buy_at', 'buy_type', 'buy_size', 'buy_value', 'buy_price',
-                            'sell_at', 'sell_type', 'sell_size', 'sell_value', 'sell_price' 
-                        ])
-                    df_tracker = df_tracker.append(df_pair, ignore_index=True)
-                    pair = 0
-                
-                last_action = row['action']
+        # a new tracker starts with every trade, an existing tracker only has the new trades appended
+        save_header = not os.path.exists(save_file)
+        if save_header:
+            df_tracker = ledger.getTrades(exchange, market)
 
-        if list(df_tracker.keys()) != [ 'status', 'market', 
-                            'buy_at', 'buy_type', 'buy_size', 'buy_value', 'buy_price',
-                            'sell_at', 'sell_type', 'sell_size', 'sell_value', 'sell_price' ]:
-            # no data, return early
+        if len(df_tracker) == 0:
+            # no new data, return early
             return False
 
         df_tracker['profit'] = np.subtract(df_tracker['sell_value'], df_tracker['buy_value'])
@@ -362,7 +304,7 @@ class TradingAccount():
         df_sincebot = df_tracker[df_tracker['buy_at'] > '2021-02-1']
 
         try:
-            df_sincebot.to_csv(save_file, index=False)
+            df_sincebot.to_csv(save_file, mode='w' if save_header else 'a', header=save_header, index=False)
         except OSError:
             raise SystemExit('Unable to save: ', save_file) 
 
@@ -434,7 +376,7 @@ class TradingAccount():
                 # if manualPrice is non-positive retrieve the current live price
                 if manualPrice <= 0:
                     if self.app.getExchange() == 'binance':
-                        api = BPublicAPI()
+                        api = client_registry.getPublicAPI('binance')
                         price = api.getTicker(market)
                     else:
                         resp = requests.get('https://api-public.sandbox.pro.coinbase.com/products/' + market + '/ticker')
@@ -445,31 +387,14 @@ class TradingAccount():
                         json = resp.json()
                         price = float(json['price'])
 
-                # calculate purchase fees
-                fee = fiatAmount * 0.005
-                fiatAmountMinusFee = fiatAmount - fee
-                total = float(fiatAmountMinusFee / float(price))
-
-                # append dummy order into orders dataframe
-                ts = pd.Timestamp.now()
-                price = (fiatAmountMinusFee * 100) / (total * 100)
-                order = pd.DataFrame([['', market, 'buy', 'market', float('{:.8f}'.format(total)), fiatAmountMinusFee, 'done', '{:.8f}'.format(float(price))]], columns=[
-                                    'created_at', 'market', 'action', 'type', 'size', 'value', 'status', 'price'], index=[ts])
-                order['created_at'] = order.index
-                self.orders = pd.concat([self.orders, pd.DataFrame(order)], ignore_index=False)
-
-                # update the dummy fiat balance
-                self.balance.loc[self.balance['currency'] == fiatMarket, 'balance'] = self.getBalance(fiatMarket) - fiatAmount
-                self.balance.loc[self.balance['currency'] == fiatMarket, 'available'] = self.getBalance(fiatMarket) - fiatAmount
-
-                # update the dummy crypto balance
-                self.balance.loc[self.balance['currency'] == cryptoMarket, 'balance'] = self.getBalance(cryptoMarket) + (fiatAmountMinusFee / price)
-                self.balance.loc[self.balance['currency'] == cryptoMarket, 'available'] = self.getBalance(cryptoMarket) + (fiatAmountMinusFee / price)
+                # fill the dummy order, less the purchase fees, and update the dummy balances
+                self.__renameDummyCurrency(cryptoMarket)
+                self.paper_trading.buy(market, cryptoMarket, fiatMarket, fiatAmount, float(price))
 
         else:
             if self.mode == 'live':
                 # connect to coinbase pro api (authenticated)
-                model = CBAuthAPI(self.app.getAPIKey(), self.app.getAPISecret(), self.app.getAPIPassphrase(), self.app.getAPIURL())
+                model = client_registry.getAuthAPI('coinbasepro', self.app.getAPIKey(), self.app.getAPISecret(), self.app.getAPIPassphrase(), self.app.getAPIURL())
 
                 # execute a live market buy
                 if fiatAmount > 0:
@@ -499,26 +424,9 @@ class TradingAccount():
                     json = resp.json()
                     price = float(json['price'])
 
-                # calculate purchase fees
-                fee = fiatAmount * 0.005
-                fiatAmountMinusFee = fiatAmount - fee
-                total = float(fiatAmountMinusFee / price)
-
-                # append dummy order into orders dataframe
-                ts = pd.Timestamp.now()
-                price = (fiatAmountMinusFee * 100) / (total * 100)
-                order = pd.DataFrame([['', market, 'buy', 'market', float('{:.8f}'.format(total)), fiatAmountMinusFee, 'done', price]], columns=[
-                                    'created_at', 'market', 'action', 'type', 'size', 'value', 'status', 'price'], index=[ts])
-                order['created_at'] = order.index
-                self.orders = pd.concat([self.orders, pd.DataFrame(order)], ignore_index=False)
-
-                # update the dummy fiat balance
-                self.balance.loc[self.balance['currency'] == fiatMarket, 'balance'] = self.getBalance(fiatMarket) - fiatAmount
-                self.balance.loc[self.balance['currency'] == fiatMarket, 'available'] = self.getBalance(fiatMarket) - fiatAmount
-
-                # update the dummy crypto balance
-                self.balance.loc[self.balance['currency'] == cryptoMarket, 'balance'] = self.getBalance(cryptoMarket) + (fiatAmountMinusFee / price)
-                self.balance.loc[self.balance['currency'] == cryptoMarket, 'available'] = self.getBalance(cryptoMarket) + (fiatAmountMinusFee / price)
+                # fill the dummy order, less the purchase fees, and update the dummy balances
+                self.__renameDummyCurrency(cryptoMarket)
+                self.paper_trading.buy(market, cryptoMarket, fiatMarket, fiatAmount, float(price))
 
     def sell(self, cryptoMarket, fiatMarket, cryptoAmount, manualPrice=0.00000000):
         """Places a sell order either live or simulation
@@ -583,10 +491,6 @@ class TradingAccount():
                 if not isinstance(manualPrice, float) and not isinstance(manualPrice, int):
                     raise TypeError('Optional manual price not numeric.')
 
-                # calculate purchase fees
-                fee = cryptoAmount * 0.005
-                cryptoAmountMinusFee = cryptoAmount - fee
-
                 price = manualPrice
                 # if manualPrice is non-positive retrieve the current live price
                 if manualPrice <= 0:
@@ -598,28 +502,14 @@ class TradingAccount():
                     json = resp.json()
                     price = float(json['price'])
 
-                total = price * cryptoAmountMinusFee
-
-                # append dummy order into orders dataframe
-                ts = pd.Timestamp.now()
-                price = ((price * cryptoAmount) * 100) / (cryptoAmount * 100)
-                order = pd.DataFrame([['', market, 'sell', 'market', cryptoAmountMinusFee, float('{:.8f}'.format(
-                    total)), 'done', '{:.8f}'.format(float(price))]], columns=['created_at', 'market', 'action', 'type', 'size', 'value', 'status', 'price'], index=[ts])
-                order['created_at'] = order.index
-                self.orders = pd.concat([self.orders, pd.DataFrame(order)], ignore_index=False)
-
-                # update the dummy fiat balance
-                self.balance.loc[self.balance['currency'] == fiatMarket, 'balance'] = self.getBalance(fiatMarket) + total
-                self.balance.loc[self.balance['currency'] == fiatMarket, 'available'] = self.getBalance(fiatMarket) + total
-
-                # update the dummy crypto balance
-                self.balance.loc[self.balance['currency'] == cryptoMarket, 'balance'] = self.getBalance(cryptoMarket) - cryptoAmount
-                self.balance.loc[self.balance['currency'] == cryptoMarket, 'available'] = self.getBalance(cryptoMarket) - cryptoAmount
+                # fill the dummy order, less the sale fees, and update the dummy balances
+                self.__renameDummyCurrency(cryptoMarket)
+                self.paper_trading.sell(market, cryptoMarket, fiatMarket, cryptoAmount, float(price))
         
         else:
             if self.mode == 'live':
                 # connect to Coinbase Pro API live
-                model = CBAuthAPI(self.app.getAPIKey(), self.app.getAPISecret(), self.app.getAPIPassphrase(), self.app.getAPIURL())
+                model = client_registry.getAuthAPI('coinbasepro', self.app.getAPIKey(), self.app.getAPISecret(), self.app.getAPIPassphrase(), self.app.getAPIURL())
 
                 # execute a live market sell
                 resp = model.marketSell(market, float(self.getBalance(cryptoMarket)))
@@ -635,10 +525,6 @@ class TradingAccount():
                 if not isinstance(manualPrice, float) and not isinstance(manualPrice, int):
                     raise TypeError('Optional manual price not numeric.')
 
-                # calculate purchase fees
-                fee = cryptoAmount * 0.005
-                cryptoAmountMinusFee = cryptoAmount - fee
-
                 price = manualPrice
                 if manualPrice <= 0:
                     # if manualPrice is non-positive retrieve the current live price
@@ -649,20 +535,6 @@ class TradingAccount():
                     json = resp.json()
                     price = float(json['price'])
 
-                total = price * cryptoAmountMinusFee
-
-                # append dummy order into orders dataframe
-                ts = pd.Timestamp.now()
-                price = ((price * cryptoAmount) * 100) / (cryptoAmount * 100)
-                order = pd.DataFrame([[market, 'sell', 'market', cryptoAmountMinusFee, float('{:.8f}'.format(
-                    total)), 'done', price]], columns=['market', 'action', 'type', 'size', 'value', 'status', 'price'], index=[ts])
-                order['created_at'] = order.index
-                self.orders = pd.concat([self.orders, pd.DataFrame(order)], ignore_index=False)
-
-                # update the dummy fiat balance
-                self.balance.loc[self.balance['currency'] == fiatMarket, 'balance'] = self.getBalance(fiatMarket) + total
-                self.balance.loc[self.balance['currency'] == fiatMarket, 'available'] = self.getBalance(fiatMarket) + total
-
-                # update the dummy crypto balance
-                self.balance.loc[self.balance['currency'] == cryptoMarket, 'balance'] = self.getBalance(cryptoMarket) - cryptoAmount
-                self.balance.loc[self.balance['currency'] == cryptoMarket, 'available'] = self.getBalance(cryptoMarket) - cryptoAmount
\ No newline at end of file
+                # fill the dummy order, less the sale fees, and update the dummy balances
+                self.__renameDummyCurrency(cryptoMarket)
+                self.paper_trading.sell(market, cryptoMarket, fiatMarket, cryptoAmount, float(price))
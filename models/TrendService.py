@@ -0,0 +1,140 @@
+"""Higher timeframe trends, cached until the next candle"""
+
+import time
+from models.CandleResampler import CandleResampler
+from models.Trading import TechnicalAnalysis
+
+class TrendService():
+    def __init__(self, app, resample=False):
+        """Trend Service object model
+
+        The trading data of each higher timeframe is downloaded once per candle
+        and shared by the EMA12/26 and SMA50/200 trend checks. When resampling,
+        the trading data is aggregated from the candles of the app granularity
+        in the candle store instead, which the bot already syncs every poll.
+
+        Parameters
+        ----------
+        app : object
+            PyCryptoBot object
+        resample : bool
+            Aggregates the timeframes from the candle store where possible
+        """
+
+        self.app = app
+        self.trends = {}
+        self.resample = resample
+        self.resampler = CandleResampler()
+
+    def getTrend(self, timeframe='1h'):
+        """Returns the EMA12/26 and SMA50/200 bull and bear flags of a timeframe
+
+        Parameters
+        ----------
+        timeframe : str
+            '1h' or '6h'
+        """
+
+        granularity = self.getGranularity(timeframe)
+        trend = { 'ema1226_bull': False, 'ema1226_bear': False, 'sma50200_bull': False, 'sma50200_bear': False }
+
+        if granularity == None:
+            return trend
+
+        if self.isCached(timeframe):
+            return self.trends[self.__getKey(timeframe)][1]
+
+        try:
+            if self.canResample(timeframe):
+                return self.setTrendData(timeframe, self.getResampledData(timeframe))
+
+            return self.setTrendData(timeframe, self.app.getHistoricalData(self.app.getMarket(), granularity))
+        except Exception:
+            return trend
+
+    def getGranularity(self, timeframe='1h'):
+        """Returns the granularity of a timeframe on the exchange, None if not supported"""
+
+        granularities = {
+            'coinbasepro': { '1h': 3600, '6h': 21600 },
+            'binance': { '1h': '1h', '6h': '6h' }
+        }
+
+        if not timeframe in [ '1h', '6h' ]:
+            raise ValueError('Timeframe options: 1h, 6h')
+
+        if not self.app.getExchange() in granularities:
+            return None
+
+        return granularities[self.app.getExchange()][timeframe]
+
+    def canResample(self, timeframe='1h'):
+        """Returns True if the timeframe is aggregated from the candles of the app granularity"""
+
+        granularity = self.getGranularity(timeframe)
+
+        if self.resample == False or granularity == None or self.app.getCandleStore() == None:
+            return False
+
+        return self.resampler.canResample(self.app.getGranularity(), granularity)
+
+    def getResampledData(self, timeframe='1h'):
+        """Returns the trading data of a timeframe aggregated from the candles of the app granularity"""
+
+        granularity = self.getGranularity(timeframe)
+        base_granularity = self.app.getGranularity()
+        candles = self.resampler.candles * self.resampler.getRatio(base_granularity, granularity)
+        start = self.resampler.getNextStart(granularity)
+
+        if start == None:
+            # the history of the timeframe is downloaded once, later polls sync the new candles
+            data = self.app.getCandleHistory(self.app.getMarket(), base_granularity, candles)
+        else:
+            data = self.app.getCandleStore().getCandles(self.app.getExchange(), self.app.getMarket(), base_granularity, start=start, limit=candles)
+
+        return self.resampler.update(data, granularity)
+
+    def isCached(self, timeframe='1h'):
+        """Returns True if the trend of the current candle of a timeframe is cached"""
+
+        key = self.__getKey(timeframe)
+
+        return key in self.trends and self.trends[key][0] > time.time()
+
+    def setTrendData(self, timeframe, data):
+        """Calculates and caches the trend of the trading data of a timeframe
+
+        Parameters
+        ----------
+        timeframe : str
+            '1h' or '6h'
+        data : Pandas Time Series
+            Trading data downloaded with the granularity of the timeframe
+        """
+
+        ta = TechnicalAnalysis(data)
+        ta.require('ema12', 'ema26', 'sma50', 'sma200')
+        df_last = ta.getDataFrame().iloc[-1]
+
+        trend = {}
+        trend['ema1226_bull'] = bool(df_last['ema12'] > df_last['ema26'])
+        trend['ema1226_bear'] = bool(df_last['ema12'] < df_last['ema26'])
+        trend['sma50200_bull'] = bool(df_last['sma50'] > df_last['sma200'])
+        trend['sma50200_bear'] = bool(df_last['sma50'] < df_last['sma200'])
+
+        # valid until the next candle of the timeframe starts
+        seconds = 3600 if timeframe == '1h' else 21600
+        self.trends[self.__getKey(timeframe)] = ((int(time.time()) // seconds + 1) * seconds, trend)
+
+        return trend
+
+    def __getKey(self, timeframe):
+        """Returns the cache key of a timeframe (private function)"""
+
+        return (self.app.getExchange(), self.app.getMarket(), timeframe)
+
+    def clear(self):
+        """Clears the cached trends"""
+
+        self.trends = {}
+        self.resampler.clear()
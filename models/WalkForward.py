@@ -0,0 +1,149 @@
+"""Backtests the trading strategy over many windows of the candle history"""
+
+import numpy as np
+import pandas as pd
+from models.Backtest import Backtest, getRunSettings, runBacktests
+from models.CandleArchive import CandleArchiveSlice
+from models.CandleFrame import CandleFrame
+
+def backtestWindow(window, history, settings):
+    """Backtests a window of the history, in a worker process"""
+
+    start, end = window
+    backtest = Backtest(None, history.getDataFrame(start, end))
+    backtest.run(settings)
+    return backtest.getSummary()
+
+class WalkForward():
+    def __init__(self, app, trading_data=pd.DataFrame(), window=300):
+        """Walk Forward object model
+
+        Each window is analysed and backtested on its own, as a sample
+        simulation of the bot would, but from the local candle history and
+        spread over worker processes.
+
+        Parameters
+        ----------
+        app : object
+            PyCryptoBot object, the strategy settings are read from it
+        trading_data : Pandas Time Series or CandleArchiveSlice
+            data[ts] = [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ],
+            or archived candles the windows are read from without loading them
+        window : int
+            Number of candles of a window
+        """
+
+        if not isinstance(trading_data, (pd.DataFrame, CandleArchiveSlice)):
+            raise TypeError('Data is not a Pandas dataframe.')
+
+        if not isinstance(window, int) or window < 1:
+            raise ValueError('Window must be a positive integer.')
+
+        if len(trading_data) < window:
+            raise ValueError('Trading data is shorter than the window (' + str(len(trading_data)) + ' < ' + str(window) + ').')
+
+        if isinstance(trading_data, CandleArchiveSlice):
+            # each worker process maps the archive and reads its windows
+            self.history = trading_data
+        else:
+            # compact history, sent to each worker process
+            self.history = CandleFrame(trading_data[[ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]])
+        self.window = window
+        self.settings = Backtest(app, self.history.getDataFrame(0, window)).getSettings()
+        self.results = pd.DataFrame()
+
+    def getRandomWindows(self, count=100, seed=None):
+        """Returns the start and end positions of random windows
+
+        Parameters
+        ----------
+        count : int
+            Number of windows
+        seed : int, optional
+            Seed of the random generator
+        """
+
+        starts = np.random.default_rng(seed).integers(0, len(self.history) - self.window + 1, count)
+        return [ (int(start), int(start) + self.window) for start in starts ]
+
+    def getRollingWindows(self, step=24):
+        """Returns the start and end positions of windows every step candles, ending with the most recent
+
+        Parameters
+        ----------
+        step : int
+            Number of candles between the starts of consecutive windows
+        """
+
+        if not isinstance(step, int) or step < 1:
+            raise ValueError('Step must be a positive integer.')
+
+        last = len(self.history) - self.window
+        return [ (start, start + self.window) for start in range(last % step, last + 1, step) ]
+
+    def run(self, windows, settings=None, workers=None):
+        """Backtests each window and returns a result per window
+
+        Parameters
+        ----------
+        windows : list
+            Start and end positions of the windows
+        settings : dict, optional
+            Strategy settings overriding the app, see Backtest.getSettings()
+        workers : int, optional
+            Number of worker processes, 1 runs the backtests in this process
+        """
+
+        if not isinstance(windows, list) or len(windows) == 0:
+            raise ValueError('Windows list is empty.')
+
+        run_settings = getRunSettings(self.settings, settings)
+        summaries = runBacktests(backtestWindow, windows, (self.history, run_settings), workers)
+
+        self.results = pd.DataFrame({
+            'start': [ self.history.index[start] for start, end in windows ],
+            'end': [ self.history.index[end - 1] for start, end in windows ],
+            'margin': [ summary['margin'] for summary in summaries ],
+            'buy_count': [ summary['buy_count'] for summary in summaries ],
+            'sell_count': [ summary['sell_count'] for summary in summaries ],
+            'win_rate': [ summary['win_rate'] for summary in summaries ],
+            'max_drawdown': [ summary['max_drawdown'] for summary in summaries ]
+        })
+
+        return self.results
+
+    def getResults(self):
+        """Returns the result of each window of the last run"""
+
+        return self.results
+
+    def getDistribution(self):
+        """Returns the distribution of the margins, win rates and drawdowns of the last run"""
+
+        if len(self.results) == 0:
+            return pd.DataFrame()
+
+        # windows without a trade have no win rate
+        traded = self.results[self.results['sell_count'] > 0]
+
+        return pd.DataFrame({
+            'margin': self.results['margin'].describe(percentiles=[ 0.05, 0.25, 0.5, 0.75, 0.95 ]),
+            'win_rate': traded['win_rate'].describe(percentiles=[ 0.05, 0.25, 0.5, 0.75, 0.95 ]),
+            'max_drawdown': self.results['max_drawdown'].describe(percentiles=[ 0.05, 0.25, 0.5, 0.75, 0.95 ])
+        })
+
+    def printSummary(self):
+        """Prints the distribution of the last run"""
+
+        if len(self.results) == 0:
+            return
+
+        profitable = (self.results['margin'] > 0).sum()
+        traded = (self.results['sell_count'] > 0).sum()
+
+        print ("\nWalk Forward Summary\n")
+        print ('     Windows :', len(self.results), '(' + str(self.window) + ' candles)')
+        print ('      Traded :', traded)
+        print ('  Profitable :', profitable, '(' + str(round((profitable / len(self.results)) * 100, 2)) + '%)', "\n")
+        print (self.getDistribution().to_string())
+        print ("\n  ** non-live simulation, assuming highest fees", "\n")
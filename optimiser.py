@@ -0,0 +1,54 @@
+"""Optimises the strategy settings by backtesting them on the stored candle history"""
+
+import argparse, json, sys
+
+# optimiser arguments, the remaining arguments configure the bot
+parser = argparse.ArgumentParser(description='Python Crypto Bot strategy optimiser')
+parser.add_argument('--search', type=str, default='grid', help='search the space: grid, random')
+parser.add_argument('--samples', type=int, default=100, help='configurations of a random search')
+parser.add_argument('--space', type=str, help='JSON file of the values of each strategy setting')
+parser.add_argument('--candles', type=int, default=300, help='stored candles backtested')
+parser.add_argument('--archive', type=str, help='candle archive directory backtested instead of the candle store')
+parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+parser.add_argument('--top', type=int, default=10, help='configurations printed')
+args, sys.argv[1:] = parser.parse_known_args()
+
+from models.CandleArchive import CandleArchive
+from models.Optimiser import Optimiser
+from models.PyCryptoBot import PyCryptoBot
+
+# thresholds of executeJob searched when no space is provided
+space = {
+    'sellupperpcnt': [ None, 2, 5, 10 ],
+    'selllowerpcnt': [ None, -2, -5 ],
+    'sellatloss': [ 0, 1 ],
+    'buyobvpcnt': [ -10, -5, 0 ],
+    'reversalbankmargin': [ 1, 3, 5 ]
+}
+
+if __name__ == '__main__':
+    if not args.search in [ 'grid', 'random' ]:
+        raise ValueError('Search options: grid, random')
+
+    if args.space != None:
+        with open(args.space) as space_file:
+            space = json.load(space_file)
+
+    app = PyCryptoBot()
+
+    if args.archive != None:
+        trading_data = CandleArchive(args.archive).getCandles(app.getExchange(), app.getMarket(), app.getGranularity(), limit=args.candles)
+    else:
+        trading_data = app.getCandleHistory(app.getMarket(), app.getGranularity(), args.candles)
+
+    print ('Backtesting', app.getMarket(), str(app.getGranularity()), 'from', str(trading_data.index[0]), 'to', str(trading_data.index[-1]))
+
+    optimiser = Optimiser(app, trading_data)
+
+    if args.search == 'grid':
+        settings_list = optimiser.getGridSearch(space)
+    else:
+        settings_list = optimiser.getRandomSearch(space, args.samples)
+
+    optimiser.run(settings_list, args.workers)
+    optimiser.printResults(args.top)
@@ -3,90 +3,144 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import logging, os, random, sched, sys, time
+import logging, os, random, sched, sys, threading, time
 
+from models.Backtest import Backtest
+from models.MarketFeed import MarketFeed
+from models.MarketState import MarketState
 from models.PyCryptoBot import PyCryptoBot
+from models.RequestScheduler import request_scheduler
+from models.Strategy import Strategy
 from models.Trading import TechnicalAnalysis
 from models.TradingAccount import TradingAccount
 from models.Telegram import Telegram
-from views.TradingGraphs import TradingGraphs
+from views.GraphRenderer import GraphRenderer
 
 # production: disable traceback
 #sys.tracebacklimit = 0
 
 app = PyCryptoBot()
-s = sched.scheduler(time.time, time.sleep)
-
-# initial state is to wait
-action = 'WAIT'
-last_action = ''
-last_df_index = ''
-buy_state = ''
-eri_text = ''
-last_buy = 0
-iterations = 0
-buy_count = 0
-sell_count = 0
-buy_sum = 0
-sell_sum = 0
-fib_high = 0
-fib_low = 0
-
-config = {}
-account = None
-# if live trading is enabled
-if app.isLive() == 1:
-    account = TradingAccount(app)
-
-    if account.getBalance(app.getBaseCurrency()) < account.getBalance(app.getQuoteCurrency()):
-        last_action = 'SELL'
-    elif account.getBalance(app.getBaseCurrency()) > account.getBalance(app.getQuoteCurrency()):
-        last_action = 'BUY'
-
-    if app.getExchange() == 'binance':
-        if last_action == 'SELL'and account.getBalance(app.getQuoteCurrency()) < 0.001:
-            raise Exception('Insufficient available funds to place sell order: ' + str(account.getBalance(app.getQuoteCurrency())) + ' < 0.1 ' + app.getQuoteCurrency() + "\nNote: A manual limit order places a hold on available funds.")
-        elif last_action == 'BUY'and account.getBalance(app.getBaseCurrency()) < 0.001:
-            raise Exception('Insufficient available funds to place buy order: ' + str(account.getBalance(app.getBaseCurrency())) + ' < 0.1 ' + app.getBaseCurrency() + "\nNote: A manual limit order places a hold on available funds.")
+
+# set by the websocket feeds to wake the scheduler when they trigger a job
+wakeup = threading.Event()
+
+# buy and sell graphs are rendered in the background, never delaying an order
+graph_renderer = GraphRenderer()
+
+def waitForJob(seconds):
+    """Sleeps until the next scheduled job or a websocket feed triggers one"""
+
+    wakeup.wait(seconds)
+    wakeup.clear()
+
+s = sched.scheduler(time.time, waitForJob)
+
+def initMarketState(app):
+    """Returns the initial trading state of a market"""
+
+    state = MarketState(app)
+
+    # if live trading is enabled
+    if app.isLive() == 1:
+        app.loadMarkets()
+        account = TradingAccount(app)
+        state.account = account
+
+        if account.getBalance(app.getBaseCurrency()) < account.getBalance(app.getQuoteCurrency()):
+            state.last_action = 'SELL'
+        elif account.getBalance(app.getBaseCurrency()) > account.getBalance(app.getQuoteCurrency()):
+            state.last_action = 'BUY'
+
+        if app.getExchange() == 'binance':
+            if state.last_action == 'SELL'and account.getBalance(app.getQuoteCurrency()) < 0.001:
+                raise Exception('Insufficient available funds to place sell order: ' + str(account.getBalance(app.getQuoteCurrency())) + ' < 0.1 ' + app.getQuoteCurrency() + "\nNote: A manual limit order places a hold on available funds.")
+            elif state.last_action == 'BUY'and account.getBalance(app.getBaseCurrency()) < 0.001:
+                raise Exception('Insufficient available funds to place buy order: ' + str(account.getBalance(app.getBaseCurrency())) + ' < 0.1 ' + app.getBaseCurrency() + "\nNote: A manual limit order places a hold on available funds.")
  
-    elif app.getExchange() == 'coinbasepro':
-        if last_action == 'SELL'and account.getBalance(app.getQuoteCurrency()) < 50:
-            raise Exception('Insufficient available funds to place buy order: ' + str(account.getBalance(app.getQuoteCurrency())) + ' < 50 ' + app.getQuoteCurrency() + "\nNote: A manual limit order places a hold on available funds.")
-        elif last_action == 'BUY'and account.getBalance(app.getBaseCurrency()) < 0.001:
-            raise Exception('Insufficient available funds to place sell order: ' + str(account.getBalance(app.getBaseCurrency())) + ' < 0.1 ' + app.getBaseCurrency() + "\nNote: A manual limit order places a hold on available funds.")
-
-    orders = account.getOrders(app.getMarket(), '', 'done')
-    if len(orders) > 0:
-        df = orders[-1:]
-
-        if str(df.action.values[0]) == 'buy':
-            last_buy = float(df[df.action == 'buy']['price'])
-        else:
-            last_buy = 0.0
+        elif app.getExchange() == 'coinbasepro':
+            if state.last_action == 'SELL'and account.getBalance(app.getQuoteCurrency()) < 50:
+                raise Exception('Insufficient available funds to place buy order: ' + str(account.getBalance(app.getQuoteCurrency())) + ' < 50 ' + app.getQuoteCurrency() + "\nNote: A manual limit order places a hold on available funds.")
+            elif state.last_action == 'BUY'and account.getBalance(app.getBaseCurrency()) < 0.001:
+                raise Exception('Insufficient available funds to place sell order: ' + str(account.getBalance(app.getBaseCurrency())) + ' < 0.1 ' + app.getBaseCurrency() + "\nNote: A manual limit order places a hold on available funds.")
+
+        orders = account.getOrders(app.getMarket(), '', 'done')
+        if len(orders) > 0:
+            df = orders[-1:]
+
+            if str(df.action.values[0]) == 'buy':
+                state.last_buy = float(df[df.action == 'buy']['price'])
+            else:
+                state.last_buy = 0.0
 
-def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
-    """Trading bot job which runs at a scheduled interval"""
-    global action, buy_count, buy_sum, iterations, last_action, last_buy, eri_text, last_df_index, sell_count, sell_sum, buy_state, fib_high, fib_low
+    return state
+
+def initMarketFeed(state):
+    """Starts the websocket feed of a market, each closed candle or price change runs the job"""
+
+    def onFeedEvent(event):
+        if event == 'candle':
+            state.tracker_due = True
+        state.trigger(s, executeJob, (s, state, pd.DataFrame(), event))
+        wakeup.set()
+
+    state.feed = MarketFeed(state.app)
+    state.feed.addListener(onFeedEvent)
+    state.feed.start()
+
+def addStrategyIndicators(app, ta):
+    """Adds the indicators read by executeJob for the app of the market, graphs and exports add the rest"""
+
+    ta.require('ema12', 'ema26', 'ema12gtema26', 'ema12gtema26co', 'ema12ltema26', 'ema12ltema26co', 'sma50', 'sma200', 'goldencross', 
+        'macd', 'signal', 'macdgtsignal', 'macdgtsignalco', 'macdltsignal', 'macdltsignalco', 'obv', 'obv_pc', 'eri_buy', 'eri_sell')
+
+    # candlestick detection
+    ta.require('hammer', 'inverted_hammer', 'hanging_man', 'shooting_star', 'three_white_soldiers', 'three_black_crows', 'morning_star', 
+        'evening_star', 'three_line_strike', 'abandoned_baby', 'morning_doji_star', 'evening_doji_star', 'two_black_gapping')
+
+    if app.isVerbose() != 0:
+        ta.require('sma20')
+
+def executeJob(sc, state, trading_data=pd.DataFrame(), feed_event=None):
+    """Trading bot job which runs at a scheduled interval, or when the websocket feed triggers it with feed_event"""
+
+    app = state.app
+    account = state.account
 
     # increment iterations
-    iterations = iterations + 1
+    state.iterations = state.iterations + 1
 
     if app.isSimulation() == 0:
-        # retrieve the app.getMarket() data
-        trading_data = app.getHistoricalData(app.getMarket(), app.getGranularity())
+        if state.feed != None and state.feed.isLive():
+            # candles and price of the websocket feed, no market data requests
+            trading_data, ticker = state.feed.getMarketData()
+        else:
+            # retrieve the app.getMarket() data and ticker concurrently
+            trading_data, ticker = app.getMarketData()
+
+        # requests delayed by the rate limits of the exchange, or limited by it
+        request_stats = request_scheduler.getStats(app.getExchange())
+        if request_stats['throttled'] > 0 or request_stats['limited'] > 0:
+            logging.debug('requests: ' + str(request_stats))
+
+        # analyse the market data
+        trading_dataCopy = trading_data.copy()
+        ta = TechnicalAnalysis(trading_dataCopy)
+        addStrategyIndicators(app, ta)
     else:
         if len(trading_data) == 0:
             return None
 
-    # analyse the market data
-    trading_dataCopy = trading_data.copy()
-    ta = TechnicalAnalysis(trading_dataCopy)
-    ta.addAll()
+        # simulation data does not change between iterations, analyse it once
+        if state.sim_ta is None:
+            state.sim_ta = TechnicalAnalysis(trading_data.copy())
+            addStrategyIndicators(app, state.sim_ta)
+        ta = state.sim_ta
+
     df = ta.getDataFrame()
 
     if app.isSimulation() == 1:
         # with a simulation df_last will iterate through data
-        df_last = df.iloc[iterations-1:iterations]
+        df_last = df.iloc[state.iterations-1:state.iterations]
     else:
         # df_last contains the most recent entry
         df_last = df.tail(1)
@@ -94,7 +148,7 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
     if len(df_last.index.format()) > 0:
         current_df_index = str(df_last.index.format()[0])
     else:
-        current_df_index = last_df_index
+        current_df_index = state.last_df_index
 
     if app.getSmartSwitch() == 1 and app.getExchange() == 'binance' and app.getGranularity() == '1h' and app.is1hEMA1226Bull() == True and app.is6hEMA1226Bull() == True:
         print ("*** smart switch from granularity '1h' (1 hour) to '15m' (15 min) ***")
@@ -105,8 +159,7 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
             telegram.send(app.getMarket() + " smart switch from granularity '1h' (1 hour) to '15m' (15 min)")
 
         app.setGranularity('15m')
-        list(map(s.cancel, s.queue))
-        s.enter(5, 1, executeJob, (sc, app))
+        state.schedule(sc, 5, executeJob, (sc, state))
 
     elif app.getSmartSwitch() == 1 and app.getExchange() == 'coinbasepro' and app.getGranularity() == 3600 and app.is1hEMA1226Bull() == True and app.is6hEMA1226Bull() == True:
         print ('*** smart switch from granularity 3600 (1 hour) to 900 (15 min) ***')
@@ -117,8 +170,7 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
             telegram.send(app.getMarket() + " smart switch from granularity 3600 (1 hour) to 900 (15 min)")
 
         app.setGranularity(900)
-        list(map(s.cancel, s.queue))
-        s.enter(5, 1, executeJob, (sc, app))
+        state.schedule(sc, 5, executeJob, (sc, state))
 
     if app.getSmartSwitch() == 1 and app.getExchange() == 'binance' and app.getGranularity() == '15m' and app.is1hEMA1226Bull() == False and app.is6hEMA1226Bull() == False:
         print ("*** smart switch from granularity '15m' (15 min) to '1h' (1 hour) ***")
@@ -129,8 +181,7 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
             telegram.send(app.getMarket() + " smart switch from granularity '15m' (15 min) to '1h' (1 hour)")
 
         app.setGranularity('1h')
-        list(map(s.cancel, s.queue))
-        s.enter(5, 1, executeJob, (sc, app))
+        state.schedule(sc, 5, executeJob, (sc, state))
 
     elif app.getSmartSwitch() == 1 and app.getExchange() == 'coinbasepro' and app.getGranularity() == 900 and app.is1hEMA1226Bull() == False and app.is6hEMA1226Bull() == False:
         print ("*** smart switch from granularity 900 (15 min) to 3600 (1 hour) ***")
@@ -141,27 +192,24 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
             telegram.send(app.getMarket() + " smart switch from granularity 900 (15 min) to 3600 (1 hour)")
 
         app.setGranularity(3600)
-        list(map(s.cancel, s.queue))
-        s.enter(5, 1, executeJob, (sc, app))
+        state.schedule(sc, 5, executeJob, (sc, state))
 
     if app.getExchange() == 'binance' and str(app.getGranularity()) == '1d':
         if len(df) < 250:
             # data frame should have 250 rows, if not retry
             print('error: data frame length is < 250 (' + str(len(df)) + ')')
             logging.error('error: data frame length is < 250 (' + str(len(df)) + ')')
-            list(map(s.cancel, s.queue))
-            s.enter(300, 1, executeJob, (sc, app))
+            state.schedule(sc, 300, executeJob, (sc, state))
     else:
         if len(df) < 300:
             # data frame should have 300 rows, if not retry
             print('error: data frame length is < 300 (' + str(len(df)) + ')')
             logging.error('error: data frame length is < 300 (' + str(len(df)) + ')')
-            list(map(s.cancel, s.queue))
-            s.enter(300, 1, executeJob, (sc, app))
+            state.schedule(sc, 300, executeJob, (sc, state))
 
     if len(df_last) > 0:
         if app.isSimulation() == 0:
-            price = app.getTicker(app.getMarket())
+            price = ticker
             if price < df_last['low'].values[0] or price == 0:
                 price = float(df_last['close'].values[0])
         else:
@@ -201,123 +249,36 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
         evening_doji_star = bool(df_last['evening_doji_star'].values[0])
         two_black_gapping = bool(df_last['two_black_gapping'].values[0])
 
-        # criteria for a buy signal
-        if ema12gtema26co == True and macdgtsignal == True and goldencross == True and obv_pc > -5 and elder_ray_buy == True and last_action != 'BUY':
-            action = 'BUY'
-        # criteria for a sell signal
-        elif ema12ltema26co == True and macdltsignal == True and last_action not in ['','SELL']:
-            action = 'SELL'
-        # anything other than a buy or sell, just wait
-        else:
-            action = 'WAIT'
+        # buy, sell and wait decision, shared with the backtests
+        strategy = Strategy(app)
+        signals = strategy.getSignals(df_last)
+        state.action, triggers = strategy.getAction(signals['buy'][0], signals['sell'][0], signals['reversal'][0], price, state.last_action, state.last_buy, state.fib_low, state.fib_high)
 
         last_buy_minus_fees = 0
-        if last_buy > 0 and last_action == 'BUY':
-            change_pcnt = ((price / last_buy) - 1) * 100
-
+        if state.last_buy > 0 and state.last_action == 'BUY':
             # calculate last buy minus fees
-            fee = last_buy * 0.005
-            last_buy_minus_fees = last_buy + fee
-            margin = ((price - last_buy_minus_fees) / price) * 100
-
-            # loss failsafe sell at fibonacci band
-            if app.allowSellAtLoss() and app.sellLowerPcnt() == None and fib_low > 0 and fib_low >= float(price):
-                action = 'SELL'
-                last_action = 'BUY'
-                log_text = '! Loss Failsafe Triggered (Fibonacci Band: ' + str(fib_low) + ')'
-                print (log_text, "\n")
-                logging.warning(log_text)
-
-                # telegram
-                if app.isTelegramEnabled():
-                    telegram = Telegram(app.getTelegramToken(), app.getTelegramClientId())
-                    telegram.send(app.getMarket() + ' (' + str(app.getGranularity()) + ') ' + log_text)
-
-            # loss failsafe sell at sell_lower_pcnt
-            if app.allowSellAtLoss() and app.sellLowerPcnt() != None and change_pcnt < app.sellLowerPcnt():
-                action = 'SELL'
-                last_action = 'BUY'
-                log_text = '! Loss Failsafe Triggered (< ' + str(app.sellLowerPcnt()) + '%)'
-                print (log_text, "\n")
-                logging.warning(log_text)
-
-                # telegram
-                if app.isTelegramEnabled():
-                    telegram = Telegram(app.getTelegramToken(), app.getTelegramClientId())
-                    telegram.send(app.getMarket() + ' (' + str(app.getGranularity()) + ') ' + log_text)
-
-            if app.getSmartSwitch() == 1 and app.getExchange() == 'binance' and app.getGranularity() == '15m' and change_pcnt >= 2:
-                # profit bank at 2% in smart switched mode
-                action = 'SELL'
-                last_action = 'BUY'
-                log_text = '! Profit Bank Triggered (Smart Switch 2%)'
-                print (log_text, "\n")
-                logging.warning(log_text)
-
-                # telegram
-                if app.isTelegramEnabled():
-                    telegram = Telegram(app.getTelegramToken(), app.getTelegramClientId())
-                    telegram.send(app.getMarket() + ' (' + str(app.getGranularity()) + ') ' + log_text)
-
-            if app.getSmartSwitch() == 1 and app.getExchange() == 'coinbasepro' and app.getGranularity() == 900 and change_pcnt >= 2:
-                # profit bank at 2% in smart switched mode
-                action = 'SELL'
-                last_action = 'BUY'
-                log_text = '! Profit Bank Triggered (Smart Switch 2%)'
-                print (log_text, "\n")
-                logging.warning(log_text)
-
-                # telegram
-                if app.isTelegramEnabled():
-                    telegram = Telegram(app.getTelegramToken(), app.getTelegramClientId())
-                    telegram.send(app.getMarket() + ' (' + str(app.getGranularity()) + ') ' + log_text)
-
-            # profit bank at sell_upper_pcnt
-            if app.sellUpperPcnt() != None and change_pcnt > app.sellUpperPcnt():
-                action = 'SELL'
-                last_action = 'BUY'
-                log_text = '! Profit Bank Triggered (> ' + str(app.sellUpperPcnt()) + '%)'
-                print (log_text, "\n")
-                logging.warning(log_text)
-
-                # telegram
-                if app.isTelegramEnabled():
-                    telegram = Telegram(app.getTelegramToken(), app.getTelegramClientId())
-                    telegram.send(app.getMarket() + ' (' + str(app.getGranularity()) + ') ' + log_text)
-
-            # profit bank at sell at fibonacci band
-            if margin > 3 and app.sellUpperPcnt() != None and fib_high > fib_low and fib_high <= float(price):
-                action = 'SELL'
-                last_action = 'BUY'
-                log_text = '! Profit Bank Triggered (Fibonacci Band: ' + str(fib_high) + ')'
-                print (log_text, "\n")
-                logging.warning(log_text)
-
-                # telegram
-                if app.isTelegramEnabled():
-                    telegram = Telegram(app.getTelegramToken(), app.getTelegramClientId())
-                    telegram.send(app.getMarket() + ' (' + str(app.getGranularity()) + ') ' + log_text)
-
-            # profit bank when strong reversal detected
-            if margin > 3 and obv_pc < 0 and macdltsignal == True:
-                action = 'SELL'
-                last_action = 'BUY'
-                log_text = '! Profit Bank Triggered (Strong Reversal Detected)'
-                print (log_text, "\n")
-                logging.warning(log_text)
-
-                # telegram
-                if app.isTelegramEnabled():
-                    telegram = Telegram(app.getTelegramToken(), app.getTelegramClientId())
-                    telegram.send(app.getMarket() + ' (' + str(app.getGranularity()) + ') ' + log_text)
-
-            # configuration specifies to not sell at a loss
-            if not app.allowSellAtLoss() and margin <= 0:
-                action = 'WAIT'
-                last_action = 'BUY'
-                log_text = '! Ignore Sell Signal (No Sell At Loss)'
-                print (log_text, "\n")
-                logging.warning(log_text)
+            fee = state.last_buy * 0.005
+            last_buy_minus_fees = state.last_buy + fee
+
+        trigger_texts = {
+            'fibonacci_loss': '! Loss Failsafe Triggered (Fibonacci Band: ' + str(state.fib_low) + ')',
+            'lower_pcnt': '! Loss Failsafe Triggered (< ' + str(app.sellLowerPcnt()) + '%)',
+            'smart_switch_bank': '! Profit Bank Triggered (Smart Switch 2%)',
+            'upper_pcnt': '! Profit Bank Triggered (> ' + str(app.sellUpperPcnt()) + '%)',
+            'fibonacci_bank': '! Profit Bank Triggered (Fibonacci Band: ' + str(state.fib_high) + ')',
+            'reversal_bank': '! Profit Bank Triggered (Strong Reversal Detected)',
+            'no_sell_at_loss': '! Ignore Sell Signal (No Sell At Loss)'
+        }
+
+        for trigger in triggers:
+            log_text = trigger_texts[trigger]
+            print (log_text, "\n")
+            logging.warning(log_text)
+
+            # telegram
+            if app.isTelegramEnabled() and trigger != 'no_sell_at_loss':
+                telegram = Telegram(app.getTelegramToken(), app.getTelegramClientId())
+                telegram.send(app.getMarket() + ' (' + str(app.getGranularity()) + ') ' + log_text)
 
         bullbeartext = ''
         if df_last['sma50'].values[0] == df_last['sma200'].values[0]:
@@ -328,7 +289,7 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
             bullbeartext = ' (BEAR)'
 
         # polling is every 5 minutes (even for hourly intervals), but only process once per interval
-        if (last_df_index != current_df_index):
+        if (state.last_df_index != current_df_index):
             precision = 2
 
             if (price < 0.01):
@@ -340,11 +301,11 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
             obv_text = 'OBV: ' + str(app.truncate(df_last['obv'].values[0], 4)) + ' (' + str(app.truncate(df_last['obv_pc'].values[0], 2)) + '%)'
 
             if elder_ray_buy == True:
-                eri_text = 'ERI: buy'
+                state.eri_text = 'ERI: buy'
             elif elder_ray_sell == True:
-                eri_text = 'ERI: sell'
+                state.eri_text = 'ERI: sell'
             else:
-                eri_text = 'ERI:'
+                state.eri_text = 'ERI:'
 
             if hammer == True:
                 log_text = '* Candlestick Detected: Hammer ("Weak - Reversal - Bullish Signal - Up")'
@@ -496,12 +457,12 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                 obv_suffix = ' v'
 
             if app.isVerbose() == 0:
-                if last_action != '':
-                    output_text = current_df_index + ' | ' + app.getMarket() + bullbeartext + ' | ' + str(app.getGranularity()) + ' | ' + price_text + ' | ' + ema_co_prefix + ema_text + ema_co_suffix + ' | ' + macd_co_prefix + macd_text + macd_co_suffix + ' | ' + obv_prefix + obv_text + obv_suffix + ' | ' + eri_text + ' | ' + action + ' | Last Action: ' + last_action
+                if state.last_action != '':
+                    output_text = current_df_index + ' | ' + app.getMarket() + bullbeartext + ' | ' + str(app.getGranularity()) + ' | ' + price_text + ' | ' + ema_co_prefix + ema_text + ema_co_suffix + ' | ' + macd_co_prefix + macd_text + macd_co_suffix + ' | ' + obv_prefix + obv_text + obv_suffix + ' | ' + state.eri_text + ' | ' + state.action + ' | Last Action: ' + state.last_action
                 else:
-                    output_text = current_df_index + ' | ' + app.getMarket() + bullbeartext + ' | ' + str(app.getGranularity()) + ' | ' + price_text + ' | ' + ema_co_prefix + ema_text + ema_co_suffix + ' | ' + macd_co_prefix + macd_text + macd_co_suffix + ' | ' + obv_prefix + obv_text + obv_suffix + ' | ' + eri_text + ' | ' + action + ' '
+                    output_text = current_df_index + ' | ' + app.getMarket() + bullbeartext + ' | ' + str(app.getGranularity()) + ' | ' + price_text + ' | ' + ema_co_prefix + ema_text + ema_co_suffix + ' | ' + macd_co_prefix + macd_text + macd_co_suffix + ' | ' + obv_prefix + obv_text + obv_suffix + ' | ' + state.eri_text + ' | ' + state.action + ' '
 
-                if last_action == 'BUY':
+                if state.last_action == 'BUY':
                     if last_buy_minus_fees > 0:
                         margin = str(app.truncate((((price - last_buy_minus_fees) / price) * 100), 2)) + '%'
                     else:
@@ -512,10 +473,10 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                 logging.debug(output_text)
                 print (output_text)
             else:
-                logging.debug('-- Iteration: ' + str(iterations) + ' --' + bullbeartext)
+                logging.debug('-- Iteration: ' + str(state.iterations) + ' --' + bullbeartext)
 
-                if last_action == 'BUY':
-                    margin = str(app.truncate((((price - last_buy) / price) * 100), 2)) + '%'
+                if state.last_action == 'BUY':
+                    margin = str(app.truncate((((price - state.last_buy) / price) * 100), 2)) + '%'
                     logging.debug('-- Margin: ' + margin + '% --')            
                 
                 logging.debug('price: ' + str(app.truncate(price, precision)))
@@ -533,12 +494,12 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                 logging.debug('macdltsignal: ' + str(macdltsignal))
                 logging.debug('obv: ' + str(obv))
                 logging.debug('obv_pc: ' + str(obv_pc))
-                logging.debug('action: ' + action)
+                logging.debug('action: ' + state.action)
 
                 # informational output on the most recent entry  
                 print('')
                 print('================================================================================')
-                txt = '        Iteration : ' + str(iterations) + bullbeartext
+                txt = '        Iteration : ' + str(state.iterations) + bullbeartext
                 print('|', txt, (' ' * (75 - len(txt))), '|')
                 txt = '        Timestamp : ' + str(df_last.index.format()[0])
                 print('|', txt, (' ' * (75 - len(txt))), '|')
@@ -598,21 +559,21 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                 print('|', txt, (' ' * (75 - len(txt))), '|')
 
                 print('--------------------------------------------------------------------------------')
-                txt = '           Action : ' + action
+                txt = '           Action : ' + state.action
                 print('|', txt, (' ' * (75 - len(txt))), '|')
                 print('================================================================================')
-                if last_action == 'BUY':
+                if state.last_action == 'BUY':
                     txt = '           Margin : ' + margin + '%'
                     print('|', txt, (' ' * (75 - len(txt))), '|')
                     print('================================================================================')
 
             # if a buy signal
-            if action == 'BUY':
-                last_buy = price
-                buy_count = buy_count + 1
+            if state.action == 'BUY':
+                state.last_buy = price
+                state.buy_count = state.buy_count + 1
                 fee = float(price) * 0.005
                 price_incl_fees = float(price) + fee
-                buy_sum = buy_sum + price_incl_fees
+                state.buy_sum = state.buy_sum + price_incl_fees
 
                 # if live
                 if app.isLive() == 1:
@@ -636,6 +597,7 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                     # execute a live market buy
                     resp = app.marketBuy(app.getMarket(), float(account.getBalance(app.getQuoteCurrency())))
                     logging.info(resp)
+                    state.tracker_due = True
 
                     # display balances
                     print (app.getBaseCurrency(), 'balance after order:', account.getBalance(app.getBaseCurrency()))
@@ -655,19 +617,19 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                             if len(bands) == 1:
                                 first_key = list(bands.keys())[0]
                                 if first_key == 'ratio1':
-                                    fib_low = 0
-                                    fib_high = bands[first_key]
+                                    state.fib_low = 0
+                                    state.fib_high = bands[first_key]
                                 if first_key == 'ratio1_618':
-                                    fib_low = bands[first_key]
-                                    fib_high = bands[first_key] * 2
+                                    state.fib_low = bands[first_key]
+                                    state.fib_high = bands[first_key] * 2
                                 else:
-                                    fib_low = bands[first_key]
+                                    state.fib_low = bands[first_key]
 
                             elif len(bands) == 2:
                                 first_key = list(bands.keys())[0]
                                 second_key = list(bands.keys())[1]
-                                fib_low = bands[first_key] 
-                                fib_high = bands[second_key]
+                                state.fib_low = bands[first_key] 
+                                state.fib_high = bands[second_key]
                             
                     else:
                         print('--------------------------------------------------------------------------------')
@@ -675,17 +637,16 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                         print('--------------------------------------------------------------------------------')
 
                 if app.shouldSaveGraphs() == 1:
-                    tradinggraphs = TradingGraphs(ta)
                     ts = datetime.now().timestamp()
                     filename = app.getMarket() + '_' + str(app.getGranularity()) + '_buy_' + str(ts) + '.png'
-                    tradinggraphs.renderEMAandMACD(len(trading_data), 'graphs/' + filename, True)
+                    graph_renderer.submit('emamacd', ta.getDataFrame(), 'graphs/' + filename, len(trading_data))
 
             # if a sell signal
-            elif action == 'SELL':
-                sell_count = sell_count + 1
+            elif state.action == 'SELL':
+                state.sell_count = state.sell_count + 1
                 fee = float(price) * 0.005
                 price_incl_fees = float(price) - fee
-                sell_sum = sell_sum + price_incl_fees
+                state.sell_sum = state.sell_sum + price_incl_fees
 
                 # if live
                 if app.isLive() == 1:
@@ -705,19 +666,19 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                             if len(bands) == 1:
                                 first_key = list(bands.keys())[0]
                                 if first_key == 'ratio1':
-                                    fib_low = 0
-                                    fib_high = bands[first_key]
+                                    state.fib_low = 0
+                                    state.fib_high = bands[first_key]
                                 if first_key == 'ratio1_618':
-                                    fib_low = bands[first_key]
-                                    fib_high = bands[first_key] * 2
+                                    state.fib_low = bands[first_key]
+                                    state.fib_high = bands[first_key] * 2
                                 else:
-                                    fib_low = bands[first_key]
+                                    state.fib_low = bands[first_key]
 
                             elif len(bands) == 2:
                                 first_key = list(bands.keys())[0]
                                 second_key = list(bands.keys())[1]
-                                fib_low = bands[first_key] 
-                                fib_high = bands[second_key]
+                                state.fib_low = bands[first_key] 
+                                state.fib_high = bands[second_key]
 
                     else:
                         print('--------------------------------------------------------------------------------')
@@ -731,6 +692,7 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                     # execute a live market sell
                     resp = app.marketSell(app.getMarket(), float(account.getBalance(app.getBaseCurrency())))
                     logging.info(resp)
+                    state.tracker_due = True
 
                     # display balances
                     print (app.getBaseCurrency(), 'balance after order:', account.getBalance(app.getBaseCurrency()))
@@ -740,7 +702,7 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                 else:
                     if app.isVerbose() == 0:
                         sell_price = float(str(app.truncate(price, precision)))
-                        last_buy_price = float(str(app.truncate(float(last_buy), precision)))
+                        last_buy_price = float(str(app.truncate(float(state.last_buy), precision)))
                         buy_sell_diff = round(np.subtract(sell_price, last_buy_price), precision)
 
                         if (sell_price != 0):
@@ -765,31 +727,30 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
                         print('--------------------------------------------------------------------------------')
 
                 if app.shouldSaveGraphs() == 1:
-                    tradinggraphs = TradingGraphs(ta)
                     ts = datetime.now().timestamp()
                     filename = app.getMarket() + '_' + str(app.getGranularity()) + '_sell_' + str(ts) + '.png'
-                    tradinggraphs.renderEMAandMACD(len(trading_data), 'graphs/' + filename, True)
+                    graph_renderer.submit('emamacd', ta.getDataFrame(), 'graphs/' + filename, len(trading_data))
 
             # last significant action
-            if action in [ 'BUY', 'SELL' ]:
-                last_action = action
+            if state.action in [ 'BUY', 'SELL' ]:
+                state.last_action = state.action
             
-            last_df_index = str(df_last.index.format()[0])
+            state.last_df_index = str(df_last.index.format()[0])
 
-            if iterations == len(df):
+            if state.iterations == len(df):
                 print ("\nSimulation Summary\n")
 
-                if buy_count > sell_count:
+                if state.buy_count > state.sell_count:
                     fee = price * 0.005
                     last_price_minus_fees = price - fee
-                    sell_sum = sell_sum + last_price_minus_fees
-                    sell_count = sell_count + 1
+                    state.sell_sum = state.sell_sum + last_price_minus_fees
+                    state.sell_count = state.sell_count + 1
 
-                print ('   Buy Count :', buy_count)
-                print ('  Sell Count :', sell_count, "\n")
+                print ('   Buy Count :', state.buy_count)
+                print ('  Sell Count :', state.sell_count, "\n")
 
-                if sell_count > 0:
-                    print ('      Margin :', str(app.truncate((((sell_sum - buy_sum) / sell_sum) * 100), 2)) + '%', "\n")
+                if state.sell_count > 0:
+                    print ('      Margin :', str(app.truncate((((state.sell_sum - state.buy_sum) / state.sell_sum) * 100), 2)) + '%', "\n")
 
                     print ('  ** non-live simulation, assuming highest fees', "\n")
 
@@ -798,51 +759,92 @@ def executeJob(sc, app=PyCryptoBot(), trading_data=pd.DataFrame()):
             print (now, '|', app.getMarket() + bullbeartext, '|', str(app.getGranularity()), '| Current Price:', price)
 
             # decrement ignored iteration
-            iterations = iterations - 1
+            state.iterations = state.iterations - 1
+
+        # if live, and polled or after a closed candle or an order, as the orders are requested
+        if app.isLive() == 1 and (feed_event == None or state.tracker_due == True):
+            state.tracker_due = False
 
-        # if live
-        if app.isLive() == 1:
             # update order tracker csv
             if app.getExchange() == 'binance':
                 account.saveTrackerCSV(app.getMarket())
-            elif app.getExchange() == 'binance':
+            elif app.getExchange() == 'coinbasepro':
                 account.saveTrackerCSV()
 
         if app.isSimulation() == 1:
-            if iterations < 300:
-                if app.simuluationSpeed() in [ 'fast', 'fast-sample' ]:
-                    # fast processing
-                    executeJob(sc, app, trading_data)
-                else:
-                    # slow processing
-                    list(map(s.cancel, s.queue))
-                    s.enter(1, 1, executeJob, (sc, app, trading_data))
+            if state.iterations < 300:
+                # slow processing, fast processing is handled by runBacktest
+                state.schedule(sc, 1, executeJob, (sc, state, trading_data))
 
         else:
-            # poll every 5 minute
-            list(map(s.cancel, s.queue))
-            s.enter(300, 1, executeJob, (sc, app))
+            # poll every 5 minute, with a websocket feed the job also runs on each closed candle or price change
+            state.schedule(sc, 300, executeJob, (sc, state))
+
+def runBacktest(app, trading_data=pd.DataFrame()):
+    """Fast simulation using the backtest engine"""
+
+    if len(trading_data) == 0:
+        return None
+
+    backtest = Backtest(app, trading_data)
+    trades = backtest.run()
+
+    precision = 2
+    if float(trading_data['close'].min()) < 0.01:
+        precision = 8
+
+    for ts, trade in trades.iterrows():
+        price_text = 'Close: ' + str(app.truncate(float(trade['price']), precision))
+
+        if trade['action'] == 'BUY':
+            logging.info(str(ts) + ' | ' + app.getMarket() + ' ' + str(app.getGranularity()) + ' | ' + price_text + ' | BUY')
+            print (str(ts), '|', app.getMarket(), str(app.getGranularity()), '|', price_text, '| BUY')
+        else:
+            margin_text = str(app.truncate(float(trade['margin']), 2)) + '%'
+            logging.info(str(ts) + ' | ' + app.getMarket() + ' ' + str(app.getGranularity()) + ' | ' + price_text + ' | SELL | MARGIN FEES | ' + margin_text)
+            print (str(ts), '|', app.getMarket(), str(app.getGranularity()), '|', price_text, '| SELL | MARGIN FEES |', margin_text)
+
+    backtest.printSummary()
 
 try:
     # initialise logging
     logging.basicConfig(filename='pycryptobot.log', format='%(asctime)s - %(levelname)s: %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p', filemode='a', level=logging.DEBUG)
 
-    # telegram
-    if app.isTelegramEnabled():
-        telegram = Telegram(app.getTelegramToken(), app.getTelegramClientId())
-        if app.getExchange() == 'coinbasepro':
-            telegram.send('Starting Coinbase Pro bot for ' + app.getMarket() + ' using granularity ' + str(app.getGranularity()))
-        elif app.getExchange() == 'binance':
-            telegram.send('Starting Binance bot for ' + app.getMarket() + ' using granularity ' + str(app.getGranularity()))
+    # the exchange rate limits of the IP are shared with the other bots on it
+    request_scheduler.setShare(app.getRateLimitShare())
 
-    # initialise and start application
-    trading_data = app.startApp(account, last_action)
+    # every market shares the scheduler and the candle store
+    market_apps = [ app.forMarket(market) for market in app.getMarkets() ]
 
-    # run the first job immediately after starting
-    if app.isSimulation() == 1:
-        executeJob(s, app, trading_data)
-    else:
-        executeJob(s, app)
+    # the renderer is forked before the websocket feeds start their threads
+    if app.shouldSaveGraphs() == 1:
+        graph_renderer.start()
+
+    for market_app in market_apps:
+        state = initMarketState(market_app)
+
+        # telegram
+        if market_app.isTelegramEnabled():
+            telegram = Telegram(market_app.getTelegramToken(), market_app.getTelegramClientId())
+            if market_app.getExchange() == 'coinbasepro':
+                telegram.send('Starting Coinbase Pro bot for ' + market_app.getMarket() + ' using granularity ' + str(market_app.getGranularity()))
+            elif market_app.getExchange() == 'binance':
+                telegram.send('Starting Binance bot for ' + market_app.getMarket() + ' using granularity ' + str(market_app.getGranularity()))
+
+        # initialise and start application
+        trading_data = market_app.startApp(state.account, state.last_action)
+
+        # run the first job immediately after starting
+        if market_app.isSimulation() == 1:
+            if market_app.simuluationSpeed() in [ 'fast', 'fast-sample' ]:
+                runBacktest(market_app, trading_data)
+            else:
+                executeJob(s, state, trading_data)
+        else:
+            if market_app.useWebSocket() == 1:
+                initMarketFeed(state)
+
+            executeJob(s, state)
 
     s.run()
 
@@ -0,0 +1,135 @@
+import pytest, sys
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+
+class DummyApp():
+    def __init__(self, exchange='coinbasepro', sell_upper_pcnt=None, sell_lower_pcnt=None, sell_at_loss=1, granularity=None, history=None, store=None):
+        """Stands in for the PyCryptoBot object of a market in test mode
+
+        Parameters
+        ----------
+        exchange : str
+            'coinbasepro' or 'binance'
+        granularity : int or str, optional
+            Granularity of the market, 3600 or '1h' by default
+        history : function, optional
+            Returns the candles of a market and granularity, nothing is downloaded without it
+        store : CandleStore, optional
+            Local candle store
+        """
+
+        self.exchange = exchange
+        self.sell_upper_pcnt = sell_upper_pcnt
+        self.sell_lower_pcnt = sell_lower_pcnt
+        self.sell_at_loss = sell_at_loss
+        self.granularity = granularity
+        self.history = history
+        self.store = store
+        # granularities of the downloaded candles
+        self.requests = []
+
+    def getExchange(self):
+        return self.exchange
+
+    def getMarket(self):
+        return 'BTC-GBP' if self.exchange == 'coinbasepro' else 'BTCGBP'
+
+    def getGranularity(self):
+        if self.granularity != None:
+            return self.granularity
+
+        return 3600 if self.exchange == 'coinbasepro' else '1h'
+
+    def getAPIURL(self):
+        return 'https://api.pro.coinbase.com' if self.exchange == 'coinbasepro' else 'https://api.binance.com/'
+
+    def getSmartSwitch(self):
+        return 0
+
+    def isLive(self):
+        return 0
+
+    def isVerbose(self):
+        return 0
+
+    def sellUpperPcnt(self):
+        return self.sell_upper_pcnt
+
+    def sellLowerPcnt(self):
+        return self.sell_lower_pcnt
+
+    def allowSellAtLoss(self):
+        return self.sell_at_loss
+
+    def truncate(self, f, n):
+        return int(f * 10 ** n) / 10 ** n
+
+    def getCandleStore(self):
+        return self.store
+
+    def getCandleHistory(self, market, granularity, candles=300):
+        return self.store.getCandles(self.exchange, market, granularity, limit=candles)
+
+    def getHistoricalData(self, market, granularity, iso8601start='', iso8601end=''):
+        if self.history == None:
+            raise Exception('Not downloaded.')
+
+        self.requests.append(granularity)
+        return self.history(market, granularity)
+
+def getTradingData(rows=300, seed=1, prices='walk', granularity=3600, start='2021-01-01'):
+    """Returns candles of BTC-GBP
+
+    Parameters
+    ----------
+    rows : int
+        Number of candles
+    seed : int
+        Seed of the random prices
+    prices : str
+        'walk' a random walk, 'cycle' a rising trend with a cycle the strategy trades
+    granularity : int
+        Seconds of a candle
+    start : str
+        Date of the first candle
+    """
+
+    rng = np.random.default_rng(seed)
+    tsidx = pd.date_range(start, periods=rows, freq=pd.Timedelta(seconds=granularity), name='ts')
+
+    if prices == 'cycle':
+        t = np.arange(rows)
+        close = 30000 * (1 + 0.002 * t / 3 + 0.06 * np.sin(t / 7)) * (1 + rng.normal(0, 0.003, rows))
+        open = np.concatenate([[close[0]], close[:-1]])
+        low = np.minimum(open, close) * 0.998
+        high = np.maximum(open, close) * 1.002
+    else:
+        close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+        open = np.concatenate([[close[0]], close[:-1]]) * (1 + rng.normal(0, 0.002, rows))
+        low = np.minimum(open, close) * (1 - np.abs(rng.normal(0, 0.004, rows)))
+        high = np.maximum(open, close) * (1 + np.abs(rng.normal(0, 0.004, rows)))
+
+    return pd.DataFrame({
+        'date': tsidx,
+        'market': 'BTC-GBP',
+        'granularity': granularity,
+        'low': low,
+        'high': high,
+        'open': open,
+        'close': close,
+        'volume': rng.uniform(1, 100, rows)
+    }, index=tsidx)
+
+@pytest.fixture
+def dummy_app():
+    """Returns the app class of the tests, E.g. dummy_app('binance', sell_upper_pcnt=5)"""
+
+    return DummyApp
+
+@pytest.fixture
+def trading_data():
+    """Returns the candle factory of the tests, E.g. trading_data(rows=600)"""
+
+    return getTradingData
@@ -0,0 +1,54 @@
+import pytest, asyncio, sys
+from aiohttp import web
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.CoinbasePro import AsyncPublicAPI
+
+async def getCandles(request):
+    await asyncio.sleep(0.2)
+    granularity = int(request.query['granularity'])
+    return web.json_response([ [ 1609459200 + (i * granularity), 1.0, 3.0, 2.0, 2.5, 10.0 ] for i in range(299, -1, -1) ])
+
+async def getTicker(request):
+    await asyncio.sleep(0.2)
+    return web.json_response({ 'price': '2.5' })
+
+async def startServer():
+    server = web.Application()
+    server.router.add_get('/products/{market}/candles', getCandles)
+    server.router.add_get('/products/{market}/ticker', getTicker)
+    runner = web.AppRunner(server)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, 'http://127.0.0.1:' + str(runner.addresses[0][1]) + '/'
+
+def test_concurrent_requests():
+    async def run():
+        runner, url = await startServer()
+        api = AsyncPublicAPI(limit=4)
+        api.api_url = url
+
+        try:
+            start = asyncio.get_running_loop().time()
+            data, ticker, trend = await asyncio.gather(api.getHistoricalData('BTC-GBP', 3600), api.getTicker('BTC-GBP'), api.getHistoricalData('BTC-GBP', 21600))
+            elapsed = asyncio.get_running_loop().time() - start
+        finally:
+            await api.close()
+            await runner.cleanup()
+
+        return data, ticker, trend, elapsed
+
+    data, ticker, trend, elapsed = asyncio.run(run())
+    assert len(data) == 300
+    assert list(data.columns) == [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+    assert str(data.index[0]) == '2021-01-01 00:00:00'
+    assert trend['granularity'].iloc[0] == 21600
+    assert ticker == 2.5
+    # the requests overlap instead of running one after another
+    assert elapsed < 0.5
+
+def test_invalid_market_error():
+    with pytest.raises(TypeError):
+        asyncio.run(AsyncPublicAPI().getTicker('BTCGBP'))
@@ -0,0 +1,40 @@
+import pytest, sys
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.Backtest import Backtest
+
+def test_empty_trading_data_error(dummy_app):
+    with pytest.raises(ValueError) as execinfo:
+        Backtest(dummy_app(), pd.DataFrame())
+    assert str(execinfo.value) == 'Trading data is empty.'
+
+def test_analysis_is_precomputed(dummy_app, trading_data):
+    backtest = Backtest(dummy_app(), trading_data(prices='cycle'))
+    df = backtest.getDataFrame()
+    assert len(df) == 300
+    assert 'ema12gtema26co' in df.columns
+    assert 'eri_buy' in df.columns
+
+def test_run_alternates_buy_and_sell(dummy_app, trading_data):
+    backtest = Backtest(dummy_app(), trading_data(prices='cycle'))
+    trades = backtest.run()
+    assert len(trades) > 0
+    assert trades['action'].iloc[0] == 'BUY'
+    assert all(trades['action'].values[1:] != trades['action'].values[:-1])
+
+def test_summary(dummy_app, trading_data):
+    backtest = Backtest(dummy_app(), trading_data(prices='cycle'))
+    trades = backtest.run()
+    summary = backtest.getSummary()
+    assert summary['buy_count'] == len(trades[trades['action'] == 'BUY'])
+    assert summary['sell_count'] >= summary['buy_count']
+    assert summary['margin'] == ((summary['sell_sum'] - summary['buy_sum']) / summary['sell_sum']) * 100
+
+def test_sell_upper_pcnt_banks_profit(dummy_app, trading_data):
+    backtest = Backtest(dummy_app(sell_upper_pcnt=1), trading_data(prices='cycle'))
+    trades = backtest.run()
+    sells = trades[trades['action'] == 'SELL']
+    assert len(sells) > 0
+    assert all(((sells['price'] / sells['last_buy']) - 1) * 100 > 1)
@@ -0,0 +1,56 @@
+import pytest, sys, time
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.CandleArchive import CandleArchive
+
+class DummyPublicAPI():
+    def __init__(self, granularity=3600):
+        self.calls = []
+
+        # hourly candles up to the current (incomplete) candle
+        last = (int(time.time()) // granularity) * granularity
+        epochs = np.arange(last - (999 * granularity), last + granularity, granularity)
+        tsidx = pd.DatetimeIndex(pd.to_datetime(epochs, unit='s'), name='ts')
+        close = np.linspace(100, 200, len(epochs))
+        self.data = pd.DataFrame({ 'date': tsidx, 'market': 'BTC-GBP', 'granularity': granularity,
+            'low': close - 1, 'high': close + 1, 'open': close, 'close': close, 'volume': 1.0 }, index=tsidx)
+
+    def getHistoricalData(self, market='BTC-GBP', granularity=3600, iso8601start='', iso8601end=''):
+        self.calls.append((iso8601start, iso8601end))
+        return self.data[(self.data.index >= pd.Timestamp(iso8601start)) & (self.data.index <= pd.Timestamp(iso8601end))]
+
+def test_import_history(tmp_path):
+    api = DummyPublicAPI()
+    archive = CandleArchive(str(tmp_path))
+    start = api.data.index[0] - pd.Timedelta(days=30)
+
+    # the candles before the market was listed are empty pages, the forming candle is not archived
+    assert archive.importHistory(api, 'coinbasepro', 'BTC-GBP', 3600, start.isoformat()) == 999
+    assert archive.getLength('coinbasepro', 'BTC-GBP', 3600) == 999
+    assert archive.getLastEpoch('coinbasepro', 'BTC-GBP', 3600) == api.data.index[-2].timestamp()
+
+    # only the candles since the last archived candle are downloaded
+    calls = len(api.calls)
+    assert archive.importHistory(api, 'coinbasepro', 'BTC-GBP', 3600, start.isoformat()) == 0
+    assert len(api.calls) == calls + 1
+
+def test_get_arrays_and_candles(tmp_path):
+    api = DummyPublicAPI()
+    archive = CandleArchive(str(tmp_path))
+    assert archive.append('coinbasepro', 'BTC-GBP', 3600, api.data.iloc[:500]) == 500
+    assert archive.append('coinbasepro', 'BTC-GBP', 3600, api.data.iloc[400:700]) == 200
+
+    start = int(api.data.index[100].timestamp())
+    end = int(api.data.index[199].timestamp())
+    arrays = archive.getArrays('coinbasepro', 'BTC-GBP', 3600, start, end)
+    assert isinstance(arrays['close'], np.memmap)
+    assert len(arrays['close']) == 100
+    assert arrays['epoch'][0] == start
+
+    df = archive.getCandles('coinbasepro', 'BTC-GBP', 3600, limit=300)
+    pd.testing.assert_frame_equal(df, api.data.iloc[400:700], check_freq=False)
+
+    assert len(archive.getCandles('coinbasepro', 'BTC-EUR', 3600)) == 0
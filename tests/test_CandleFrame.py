@@ -0,0 +1,41 @@
+import pytest, pickle, sys
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.CandleFrame import CandleFrame
+from models.Trading import TechnicalAnalysis
+
+def getAnalysis(data):
+    ta = TechnicalAnalysis(data)
+    ta.addAll()
+    return ta.getDataFrame()
+
+def test_round_trip(trading_data):
+    df = getAnalysis(trading_data())
+    frame = pickle.loads(pickle.dumps(CandleFrame(df)))
+
+    assert frame.market == 'BTC-GBP'
+    assert frame.granularity == 3600
+    assert len(frame) == 300
+    assert 'ema12gtema26co' in frame
+    pd.testing.assert_frame_equal(frame.getDataFrame(), df, check_freq=False)
+    pd.testing.assert_frame_equal(frame.getDataFrame(13, 250), df.iloc[13:250], check_freq=False)
+    pd.testing.assert_series_equal(frame['ema12gtema26co'], df['ema12gtema26co'], check_freq=False)
+    assert frame.getMemoryUsage() < df.memory_usage(deep=True).sum()
+
+def test_float32(trading_data):
+    df = getAnalysis(trading_data())
+    frame = CandleFrame(df, 'float32')
+
+    assert frame['close'].dtype == 'float32'
+    assert frame.getDataFrame(columns=[ 'close' ])['close'].dtype == 'float64'
+    assert np.allclose(frame['close'], df['close'], rtol=1e-6)
+    assert frame.getMemoryUsage() < CandleFrame(df).getMemoryUsage() * 0.6
+
+    with pytest.raises(KeyError):
+        frame['unknown']
+
+    with pytest.raises(ValueError):
+        CandleFrame(df, 'float16')
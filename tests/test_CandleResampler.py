@@ -0,0 +1,55 @@
+import pytest, sys
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.CandleResampler import CandleResampler
+from models.CandleStore import CandleStore
+from models.TrendService import TrendService
+
+def test_resample_matches_pandas(trading_data):
+    data = trading_data(1000, 5, granularity=900, start='2021-01-01 00:15:00')
+    # a gap without trades, as the exchanges leave them
+    data = data.drop(data.index[100:103])
+    df = CandleResampler().resample(data, 3600)
+
+    expected = data.resample('1H').agg({ 'low': 'min', 'high': 'max', 'open': 'first', 'close': 'last', 'volume': 'sum' })
+    for column in [ 'low', 'high', 'open', 'close', 'volume' ]:
+        np.testing.assert_allclose(df[column], expected[column])
+
+    assert list(df.columns) == [ 'date', 'market', 'granularity', 'low', 'high', 'open', 'close', 'volume' ]
+    assert (df['granularity'] == 3600).all()
+    # the forming candle is only included when partial
+    assert len(CandleResampler().resample(data, 3600, False)) == len(df) - 1
+
+    with pytest.raises(ValueError):
+        CandleResampler().resample(data, 300)
+
+def test_update_matches_resample(trading_data):
+    data = trading_data(1000, 5, granularity=900, start='2021-01-01 00:15:00')
+    # a gap without trades, as the exchanges leave them
+    data = data.drop(data.index[100:103])
+    resampler = CandleResampler(candles=50)
+
+    # the first update aggregates the history, later updates the base candles from the forming candle
+    for end in range(500, len(data) + 1, 7):
+        df = resampler.update(data.iloc[:end] if end == 500 else data.iloc[end - 60:end], 21600)
+        pd.testing.assert_frame_equal(df, CandleResampler().resample(data.iloc[:end], 21600).iloc[-50:])
+
+    # a revised forming candle is aggregated again
+    revised = data.copy()
+    revised.iloc[-1, revised.columns.get_loc('close')] = 1.0
+    assert resampler.update(revised.iloc[-10:], 21600)['close'].iloc[-1] == 1.0
+
+def test_trend_from_candle_store(dummy_app, trading_data):
+    store = CandleStore(':memory:')
+    store.saveCandles('coinbasepro', trading_data(2000, 5, granularity=900, start='2020-01-01'))
+    service = TrendService(dummy_app(granularity=900, store=store), True)
+
+    assert service.canResample('1h') == True
+    expected = service.setTrendData('1h', CandleResampler().resample(store.getCandles('coinbasepro', 'BTC-GBP', 900, limit=1200), 3600))
+    service.clear()
+    assert service.getTrend('1h') == expected
+
+    assert TrendService(dummy_app(granularity=900, store=store)).canResample('1h') == False
@@ -0,0 +1,87 @@
+import pytest, sys, time
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.CandleStore import CandleStore
+
+class DummyPublicAPI():
+    def __init__(self, granularity=3600):
+        self.granularity = granularity
+        self.calls = []
+
+        # hourly candles up to the current (incomplete) candle
+        last = (int(time.time()) // granularity) * granularity
+        epochs = np.arange(last - (999 * granularity), last + granularity, granularity)
+        tsidx = pd.DatetimeIndex(pd.to_datetime(epochs, unit='s'), name='ts')
+        close = np.linspace(100, 200, len(epochs))
+        self.data = pd.DataFrame({ 'date': tsidx, 'market': 'BTC-GBP', 'granularity': granularity,
+            'low': close - 1, 'high': close + 1, 'open': close, 'close': close, 'volume': 1.0 }, index=tsidx)
+
+    def getHistoricalData(self, market='BTC-GBP', granularity=3600, iso8601start='', iso8601end=''):
+        self.calls.append((iso8601start, iso8601end))
+
+        if iso8601start == '':
+            return self.data.tail(300)
+
+        return self.data[(self.data.index >= pd.Timestamp(iso8601start)) & (self.data.index <= pd.Timestamp(iso8601end))]
+
+def test_granularity_seconds():
+    store = CandleStore(':memory:')
+    assert store.getGranularitySeconds(900) == 900
+    assert store.getGranularitySeconds('6h') == 21600
+
+    with pytest.raises(ValueError):
+        store.getGranularitySeconds('2h')
+
+def test_save_and_get_candles():
+    api = DummyPublicAPI()
+    store = CandleStore(':memory:')
+    store.saveCandles('coinbasepro', api.data)
+
+    df = store.getCandles('coinbasepro', 'BTC-GBP', 3600)
+    assert len(df) == 300
+    pd.testing.assert_frame_equal(df, api.data.tail(300), check_freq=False)
+
+def test_sync_downloads_missing_candles_only():
+    api = DummyPublicAPI()
+    store = CandleStore(':memory:')
+
+    # first sync downloads the most recent candles
+    store.sync(api, 'coinbasepro', 'BTC-GBP', 3600)
+    assert api.calls[-1] == ('', '')
+
+    # the last candle was still forming when it was downloaded
+    api.data.iloc[-1, api.data.columns.get_loc('close')] = 250.0
+
+    store.sync(api, 'coinbasepro', 'BTC-GBP', 3600)
+    start, end = api.calls[-1]
+    assert pd.Timestamp(start) == api.data.index[-1]
+
+    df = store.getCandles('coinbasepro', 'BTC-GBP', 3600)
+    assert len(df) == 300
+    assert df['close'].iloc[-1] == 250.0
+
+def test_has_candles():
+    api = DummyPublicAPI()
+    store = CandleStore(':memory:')
+    store.saveCandles('coinbasepro', api.data.iloc[100:200])
+
+    start = api.data.index[120].timestamp()
+    end = api.data.index[180].timestamp()
+    assert store.hasCandles('coinbasepro', 'BTC-GBP', 3600, start, end) == True
+    assert store.hasCandles('coinbasepro', 'BTC-GBP', 3600, start, api.data.index[250].timestamp()) == False
+    assert store.hasCandles('binance', 'BTC-GBP', 3600, start, end) == False
+
+def test_backfill_downloads_missing_chunks_only():
+    api = DummyPublicAPI()
+    store = CandleStore(':memory:')
+
+    store.backfill(api, 'coinbasepro', 'BTC-GBP', 3600, 700)
+    assert len(api.calls) == 3
+    assert len(store.getCandles('coinbasepro', 'BTC-GBP', 3600, limit=1000)) == 700
+
+    store.backfill(api, 'coinbasepro', 'BTC-GBP', 3600, 900)
+    assert len(api.calls) == 4
+    assert len(store.getCandles('coinbasepro', 'BTC-GBP', 3600, limit=1000)) == 900
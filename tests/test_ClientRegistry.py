@@ -0,0 +1,46 @@
+import pytest, sys
+
+sys.path.append('.')
+# pylint: disable=import-error
+from binance.client import Client
+from models.ClientRegistry import ClientRegistry
+from models.CoinbasePro import AuthAPI as CBAuthAPI, PublicAPI as CBPublicAPI
+
+API_KEY = '0123456789abcdef0123456789abcdef'
+API_SECRET = '0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef0123456789=='
+API_PASS = '0123456789a'
+
+def test_clients_created_once():
+    registry = ClientRegistry()
+
+    public = registry.getPublicAPI('coinbasepro')
+    assert isinstance(public, CBPublicAPI)
+    assert registry.getPublicAPI('coinbasepro') is public
+
+    auth = registry.getAuthAPI('coinbasepro', API_KEY, API_SECRET, API_PASS, 'https://api.pro.coinbase.com')
+    assert isinstance(auth, CBAuthAPI)
+    assert registry.getAuthAPI('coinbasepro', API_KEY, API_SECRET, API_PASS, 'https://api.pro.coinbase.com') is auth
+    assert registry.getAuthAPI('coinbasepro', API_KEY, API_SECRET, API_PASS, 'https://api.pro.coinbase.com/') is not auth
+
+    assert registry.getStats() == { 'created': 3, 'reused': 2, 'clients': 3 }
+
+    registry.clear()
+    assert registry.getPublicAPI('coinbasepro') is not public
+
+def test_binance_client_not_pinged(monkeypatch):
+    def ping(self):
+        raise AssertionError('Binance API pinged')
+
+    monkeypatch.setattr(Client, 'ping', ping)
+
+    registry = ClientRegistry()
+    assert isinstance(registry.getPublicAPI('binance').getClient(), Client)
+
+def test_invalid_exchange():
+    registry = ClientRegistry()
+
+    with pytest.raises(ValueError):
+        registry.getPublicAPI('kraken')
+
+    with pytest.raises(ValueError):
+        registry.getAuthAPI('kraken', API_KEY, API_SECRET)
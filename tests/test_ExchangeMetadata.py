@@ -0,0 +1,121 @@
+import pytest, sys
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.Binance import AuthAPI as BAuthAPI, getExchangeInfoMarkets
+from models.CoinbasePro import getProductMarkets
+from models.ExchangeMetadata import ExchangeMetadata, exchange_metadata, truncateAmount
+
+def getExchangeInfo():
+    return {
+        'symbols': [
+            {
+                'symbol': 'BTCGBP', 'baseAsset': 'BTC', 'quoteAsset': 'GBP', 'baseAssetPrecision': 8, 'quoteAssetPrecision': 8,
+                'filters': [
+                    { 'filterType': 'PRICE_FILTER', 'minPrice': '0.01', 'maxPrice': '1000000.00', 'tickSize': '0.01' },
+                    { 'filterType': 'LOT_SIZE', 'minQty': '0.000001', 'maxQty': '9000.00', 'stepSize': '0.000001' },
+                    { 'filterType': 'MIN_NOTIONAL', 'minNotional': '10.00' }
+                ]
+            },
+            {
+                'symbol': 'ADAUSDT', 'baseAsset': 'ADA', 'quoteAsset': 'USDT', 'baseAssetPrecision': 8, 'quoteAssetPrecision': 8,
+                'filters': [
+                    { 'filterType': 'PRICE_FILTER', 'minPrice': '0.0001', 'maxPrice': '1000.00', 'tickSize': '0.0001' },
+                    { 'filterType': 'LOT_SIZE', 'minQty': '0.1', 'maxQty': '900000.00', 'stepSize': '0.1' }
+                ]
+            }
+        ]
+    }
+
+class DummyAPI():
+    def __init__(self, markets):
+        self.markets = markets
+        self.requests = 0
+
+    def getMarkets(self):
+        self.requests += 1
+        return self.markets
+
+class DummyClient():
+    def __init__(self):
+        self.requests = []
+
+    def get_exchange_info(self):
+        self.requests.append('get_exchange_info')
+        return getExchangeInfo()
+
+    def order_market_buy(self, **params):
+        self.requests.append(('order_market_buy', params))
+        return params
+
+    def order_market_sell(self, **params):
+        self.requests.append(('order_market_sell', params))
+        return params
+
+def test_markets_loaded_once():
+    api = DummyAPI(getExchangeInfoMarkets(getExchangeInfo()))
+    metadata = ExchangeMetadata(ttl=3600)
+
+    assert metadata.splitMarket('binance', 'ADAUSDT', api) == ('ADA', 'USDT')
+    info = metadata.getMarketInfo('binance', 'BTCGBP', api)
+    assert (info['step_size'], info['base_precision'], info['price_precision'], info['min_funds']) == (0.000001, 6, 2, 10.0)
+    assert metadata.getMarketInfo('binance', 'ETHGBP', api) == None
+
+    assert api.requests == 1
+    assert metadata.getStats() == { 'loads': 1, 'hits': 2, 'entries': 1 }
+
+    # markets older than the TTL are downloaded again
+    metadata.ttl = 0
+    metadata.getMarkets('binance', api)
+    assert api.requests == 2
+
+def test_markets_not_loaded():
+    api = DummyAPI({})
+    metadata = ExchangeMetadata()
+
+    assert metadata.splitMarket('binance', 'BTCUSDT', api) == ('BTC', 'USDT')
+    assert metadata.splitMarket('binance', 'ETHBTC', api) == ('ETH', 'BTC')
+
+    # failures are not requested again until the retry
+    assert api.requests == 1
+
+    assert metadata.splitMarket('coinbasepro', 'BTC-GBP', api) == ('BTC', 'GBP')
+
+    with pytest.raises(ValueError):
+        metadata.splitMarket('binance', 'BTCXYZ', api)
+
+def test_split_without_download():
+    api = DummyAPI(getExchangeInfoMarkets(getExchangeInfo()))
+    metadata = ExchangeMetadata()
+
+    # split by the quote currency until the markets are loaded
+    assert metadata.splitMarket('binance', 'BTCGBP', api, False) == ('BTC', 'GBP')
+    assert api.requests == 0
+
+    metadata.getMarkets('binance', api)
+    assert metadata.splitMarket('binance', 'ADAUSDT', api, False) == ('ADA', 'USDT')
+    assert api.requests == 1
+
+def test_coinbasepro_products():
+    markets = getProductMarkets([ { 'id': 'BTC-GBP', 'base_currency': 'BTC', 'quote_currency': 'GBP', 'base_increment': '0.00000001', 'quote_increment': '0.01', 'base_min_size': '0.0001', 'min_market_funds': '10' } ])
+
+    assert markets['BTC-GBP']['base_precision'] == 8
+    assert markets['BTC-GBP']['price_precision'] == 2
+    assert truncateAmount(12.3456, markets['BTC-GBP']['quote_increment']) == 12.34
+
+def test_binance_order_single_request():
+    exchange_metadata.clear()
+    model = BAuthAPI('0123456789abcdef' * 4, 'fedcba9876543210' * 4)
+    model.client = DummyClient()
+
+    exchange_metadata.getMarkets('binance', model)
+    model.client.requests = []
+
+    model.marketBuy('BTCGBP', 100.0)
+    model.marketSell('ADAUSDT', 123.456)
+
+    assert model.client.requests == [
+        ('order_market_buy', { 'symbol': 'BTCGBP', 'quoteOrderQty': 99.95 }),
+        ('order_market_sell', { 'symbol': 'ADAUSDT', 'quantity': 123.3 })
+    ]
+    exchange_metadata.clear()
@@ -0,0 +1,41 @@
+import pytest, sys
+import numpy as np
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.ForecastService import ForecastService, getSeasonalARIMAModel
+from models.Trading import TechnicalAnalysis
+
+pytestmark = pytest.mark.filterwarnings('ignore')
+
+@pytest.mark.parametrize('workers', [ 0, 1 ])
+def test_first_fit_matches_model(workers, trading_data):
+    data = trading_data(200, 4)
+    service = ForecastService(workers=workers)
+
+    expected = getSeasonalARIMAModel(data['close']).fit(disp=-1)
+    results = TechnicalAnalysis(data, None, service).seasonalARIMAModel()
+
+    np.testing.assert_allclose(results.params, expected.params)
+    np.testing.assert_allclose(results.fittedvalues, expected.fittedvalues)
+    service.close()
+
+def test_new_candles_filtered_until_refit(trading_data):
+    data = trading_data(240, 4)
+    service = ForecastService(refit_candles=12, workers=0)
+
+    first = service.getResults(data.iloc[:200])
+    # the same candles are not filtered again
+    assert service.getResults(data.iloc[:200]) is first
+
+    appended = service.getResults(data.iloc[:205])
+    np.testing.assert_allclose(appended.params, first.params)
+    assert appended.fittedvalues.index[-1] == data.index[204]
+
+    service.getResults(data.iloc[5:210])
+    assert service.getStats() == { 'fits': 1, 'appends': 1, 'applies': 2, 'entries': 1 }
+
+    # 12 candles after the fit the parameters are refitted
+    refitted = service.getResults(data.iloc[12:212])
+    assert service.getStats()['fits'] == 2
+    np.testing.assert_allclose(refitted.params, getSeasonalARIMAModel(data['close'].iloc[12:212]).fit(disp=-1).params, rtol=1e-3)
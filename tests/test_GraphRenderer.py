@@ -0,0 +1,39 @@
+import pytest, sys
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.Trading import TechnicalAnalysis
+from views.GraphRenderer import GraphRenderer
+
+def getSnapshot(data):
+    ta = TechnicalAnalysis(data)
+    ta.require('signal')
+    return ta.getDataFrame()
+
+@pytest.mark.parametrize('use_process', [ True, False ])
+def test_snapshots_rendered_in_background(tmp_path, use_process, trading_data):
+    renderer = GraphRenderer(use_process=use_process)
+    data = getSnapshot(trading_data(100))
+
+    for i in range(3):
+        assert renderer.submit('emamacd', data, str(tmp_path / ('buy_' + str(i) + '.png')), 50) == True
+    renderer.stop()
+
+    for i in range(3):
+        with open(tmp_path / ('buy_' + str(i) + '.png'), 'rb') as png:
+            assert png.read(8) == b'\x89PNG\r\n\x1a\n'
+    assert renderer.getStats() == { 'submitted': 3, 'dropped': 0 }
+
+def test_snapshot_validated(trading_data):
+    renderer = GraphRenderer(use_process=False)
+
+    with pytest.raises(ValueError):
+        renderer.submit('candles', getSnapshot(trading_data(100)), 'graph.png')
+
+    with pytest.raises(TypeError):
+        renderer.submit('emamacd', pd.DataFrame(), 'graph.png')
+
+    with pytest.raises(KeyError):
+        renderer.submit('emamacd', getSnapshot(trading_data(100)).drop(columns=[ 'macd' ]), 'graph.png')
+    renderer.stop()
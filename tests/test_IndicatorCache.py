@@ -0,0 +1,64 @@
+import pytest, sys
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.IndicatorCache import IndicatorCache
+from models.Trading import TechnicalAnalysis
+
+def test_cached_analysis_matches_calculated(trading_data):
+    data = trading_data(seed=2)
+    cache = IndicatorCache()
+
+    expected = TechnicalAnalysis(data.copy(), None)
+    expected.addAll()
+
+    TechnicalAnalysis(data.copy(), cache).require('macdgtsignal')
+    ta = TechnicalAnalysis(data.copy(), cache)
+    ta.addAll()
+
+    pd.testing.assert_frame_equal(ta.getDataFrame(), expected.getDataFrame(), check_exact=True)
+    # the EMA12, EMA26, MACD and MACD signals were cached by the first analysis
+    stats = cache.getStats()
+    assert stats['hits'] == 4
+    assert stats['entries'] == 19
+
+def test_key_changes_with_candles(trading_data):
+    data = trading_data(seed=2)
+    cache = IndicatorCache()
+    key = cache.getKey(data)
+
+    assert key[:3] == ('BTC-GBP', '3600', str(data.index[-1]))
+    assert cache.getKey(data.copy()) == key
+
+    data.loc[data.index[-1], 'close'] = data['close'].iloc[-1] + 1
+    assert cache.getKey(data) != key
+
+def test_cached_columns_are_copies():
+    cache = IndicatorCache()
+    cache.set(('key',), 'ema12', { 'ema12': np.arange(3.0) })
+
+    columns = cache.get(('key',), 'ema12')
+    columns['ema12'][0] = 100
+    assert cache.get(('key',), 'ema12')['ema12'][0] == 0
+
+def test_least_recently_used_evicted():
+    cache = IndicatorCache(max_bytes=240)
+    for name in [ 'a', 'b', 'c' ]:
+        cache.set(('key',), name, { name: np.zeros(10) })
+
+    # 'a' is used, so 'b' is the least recently used
+    cache.get(('key',), 'a')
+    cache.set(('key',), 'd', { 'd': np.zeros(10) })
+
+    assert cache.get(('key',), 'b') is None
+    assert cache.get(('key',), 'a') is not None
+    assert cache.getStats()['bytes'] == 240
+
+    # larger than the cache, not cached
+    cache.set(('key',), 'e', { 'e': np.zeros(100) })
+    assert cache.get(('key',), 'e') is None
+
+    with pytest.raises(ValueError):
+        IndicatorCache(-1)
@@ -0,0 +1,72 @@
+import pytest, sys
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models import Kernels
+
+def getPrices(rows=500, seed=1):
+    rng = np.random.default_rng(seed)
+    prices = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    # a flat run is the value itself, as in Pandas
+    prices[300:330] = prices[300]
+    return prices
+
+def test_exponential_mean_matches_pandas():
+    prices = getPrices()
+    series = pd.Series(prices)
+
+    np.testing.assert_allclose(Kernels.exponentialMean(prices, 5.5), series.ewm(span=12, adjust=False).mean(), rtol=1e-12)
+    np.testing.assert_allclose(Kernels.exponentialMean(prices, 13, True, 14), series.ewm(com=13, min_periods=14).mean(), rtol=1e-12)
+
+def test_rolling_mean_and_std_match_pandas():
+    prices = getPrices()
+    series = pd.Series(prices)
+
+    np.testing.assert_allclose(Kernels.rollingMean(prices, 200, 1), series.rolling(200, min_periods=1).mean(), rtol=1e-12)
+    np.testing.assert_allclose(Kernels.rollingMean(prices, 20), series.rolling(20).mean(), rtol=1e-12)
+    np.testing.assert_allclose(Kernels.rollingStd(prices, 20), series.rolling(20).std(), rtol=1e-6, atol=1e-9)
+    assert (Kernels.rollingMean(prices, 20)[320:330] == prices[300]).all()
+    assert (Kernels.rollingStd(prices, 20)[320:330] == 0).all()
+
+def test_out_buffer():
+    prices = getPrices()
+    out = np.empty(len(prices))
+
+    assert Kernels.exponentialMean(prices, 5.5, out=out) is out
+    assert Kernels.rollingMean(prices, 50, out=out) is out
+
+def test_steps_match_kernels():
+    prices = getPrices(450)
+    ema = Kernels.exponentialMean(prices, 5.5)
+    rsi_mean = Kernels.exponentialMean(prices, 13, True, 14)
+    sma = Kernels.rollingMean(prices, 50, 1)
+    std = Kernels.rollingStd(prices, 20)
+
+    ema_state = { 'count': 0, 'mean': 0.0, 'weight': 0.0 }
+    rsi_state = { 'count': 0, 'mean': 0.0, 'weight': 0.0 }
+    sma_state = { 'count': 0, 'prefix': 0.0, 'suffix': None, 'run': 0, 'prev': np.nan }
+    std_state = { 'count': 0, 'prefix': 0.0, 'suffix': None, 'run': 0, 'prev': np.nan }
+    values = []
+    for i in range(len(prices)):
+        values.append(prices[i])
+        assert Kernels.exponentialMeanStep(ema_state, prices[i], 5.5) == ema[i]
+        np.testing.assert_equal(Kernels.exponentialMeanStep(rsi_state, prices[i], 13, True, 14), rsi_mean[i])
+        assert Kernels.rollingMeanStep(sma_state, values, 50, 1) == sma[i]
+        np.testing.assert_equal(Kernels.rollingStdStep(values, Kernels.rollingMeanStep(std_state, values, 20), 20), std[i])
+
+def test_rolling_sum_step_revised():
+    prices = getPrices(340)
+    state = { 'count': 0, 'prefix': 0.0, 'suffix': None }
+    values = []
+
+    for i in range(len(prices)):
+        # each value is first added as another value, then revised
+        values.append(prices[i] * 1.01)
+        previous = dict(state)
+        Kernels.rollingSumStep(state, values, 50)
+
+        state = previous
+        values[-1] = prices[i]
+        assert Kernels.rollingSumStep(state, values, 50) == Kernels.rollingSum(prices[:i + 1], 50)[-1]
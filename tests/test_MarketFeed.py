@@ -0,0 +1,85 @@
+import pytest, json, sys
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.MarketFeed import MarketFeed, ReplayFeed
+
+def getHistory(market, granularity):
+    tsidx = pd.date_range('2021-01-01', periods=300, freq='H', name='ts')
+    close = np.linspace(100, 200, 300)
+    return pd.DataFrame({ 'date': tsidx, 'market': market, 'granularity': granularity,
+        'low': close - 1, 'high': close + 1, 'open': close, 'close': close, 'volume': 10.0 }, index=tsidx)
+
+def writeReplay(tmp_path, messages):
+    filename = str(tmp_path / 'replay.jsonl')
+    with open(filename, 'w') as replay_file:
+        for message in messages:
+            replay_file.write(json.dumps(message) + "\n")
+    return filename
+
+def test_coinbasepro_ticker_candles(tmp_path, dummy_app):
+    messages = [
+        { 'type': 'subscriptions', 'channels': [] },
+        { 'type': 'ticker', 'product_id': 'BTC-GBP', 'price': '210', 'last_size': '1', 'time': '2021-01-13T11:10:00.000000Z' },
+        { 'type': 'ticker', 'product_id': 'BTC-GBP', 'price': '190', 'last_size': '2', 'time': '2021-01-13T11:50:00.000000Z' },
+        { 'type': 'ticker', 'product_id': 'BTC-GBP', 'price': '195', 'last_size': '3', 'time': '2021-01-13T12:00:01.000000Z' }
+    ]
+
+    events = []
+    feed = ReplayFeed(dummy_app(history=getHistory), writeReplay(tmp_path, messages))
+    feed.addListener(events.append)
+
+    assert feed.replay() == [ None, 'price', 'price', 'candle' ]
+    assert events == [ 'price', 'price', 'candle' ]
+
+    trading_data, price = feed.getMarketData()
+    assert price == 195
+    assert len(trading_data) == 300
+    assert list(trading_data.index[-2:]) == [ pd.Timestamp('2021-01-13 11:00:00'), pd.Timestamp('2021-01-13 12:00:00') ]
+
+    closed = trading_data.iloc[-2]
+    assert (closed['low'], closed['high'], closed['close'], closed['volume']) == (190, 210, 190, 13)
+    assert trading_data.iloc[-1]['open'] == 195
+
+def test_binance_kline_candles(tmp_path, dummy_app):
+    def kline(start, close, closed):
+        return { 'e': 'kline', 's': 'BTCGBP', 'k': { 't': start * 1000, 'i': '1h', 'o': '200', 'h': '205', 'l': '150', 'c': str(close), 'v': '5', 'x': closed } }
+
+    start = int(pd.Timestamp('2021-01-13 11:00:00').timestamp())
+    messages = [ kline(start, 180, False), kline(start, 170, True), kline(start + 3600, 171, False) ]
+
+    feed = ReplayFeed(dummy_app('binance', history=getHistory), writeReplay(tmp_path, messages))
+    assert feed.replay() == [ 'price', 'candle', 'price' ]
+    assert feed.getURL() == 'wss://stream.binance.com:9443/ws/btcgbp@kline_1h'
+
+    trading_data, price = feed.getMarketData()
+    assert price == 171
+    assert trading_data.iloc[-2]['close'] == 170
+    assert trading_data.iloc[-2]['low'] == 150
+
+def test_binance_closed_kline_added_once(tmp_path, dummy_app):
+    start = int(pd.Timestamp('2021-01-13 11:00:00').timestamp())
+    messages = [
+        { 'e': 'kline', 's': 'BTCGBP', 'k': { 't': start * 1000, 'i': '1h', 'o': '200', 'h': '205', 'l': '150', 'c': '180', 'v': '5', 'x': False } },
+        { 'e': 'kline', 's': 'BTCGBP', 'k': { 't': start * 1000, 'i': '1h', 'o': '200', 'h': '205', 'l': '150', 'c': '170', 'v': '5', 'x': True } }
+    ]
+
+    feed = ReplayFeed(dummy_app('binance', history=getHistory), writeReplay(tmp_path, messages))
+    closed = []
+    # the bot reads the trading data as soon as the candle closes
+    feed.addListener(lambda event: closed.append(feed.getMarketData()[0]) if event == 'candle' else None)
+
+    assert feed.replay() == [ 'price', 'candle' ]
+    trading_data = closed[0]
+    assert trading_data.index.is_unique == True
+    assert trading_data.index[-1] == pd.Timestamp('2021-01-13 11:00:00')
+    assert trading_data.iloc[-1]['close'] == 170
+
+def test_price_events_are_throttled(tmp_path, dummy_app):
+    messages = [ { 'type': 'ticker', 'product_id': 'BTC-GBP', 'price': str(200 + i), 'last_size': '1', 'time': '2021-01-13T11:10:0' + str(i) + '.000000Z' } for i in range(5) ]
+
+    feed = ReplayFeed(dummy_app(history=getHistory), writeReplay(tmp_path, messages), interval=60)
+    assert feed.replay() == [ 'price', None, None, None, None ]
+    assert feed.getMarketData()[1] == 204
@@ -0,0 +1,54 @@
+import pytest, sched, sys, time
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.MarketState import MarketState
+
+def job(*args):
+    pass
+
+def test_initial_state():
+    state = MarketState(None)
+    assert state.action == 'WAIT'
+    assert state.last_action == ''
+    assert state.iterations == 0
+    assert state.sim_ta is None
+    assert state.event is None
+
+def test_schedule_replaces_own_event_only():
+    s = sched.scheduler(time.time, time.sleep)
+    btc = MarketState(None)
+    eth = MarketState(None)
+
+    btc.schedule(s, 300, job, (s, btc))
+    eth.schedule(s, 300, job, (s, eth))
+    btc.schedule(s, 5, job, (s, btc))
+
+    assert len(s.queue) == 2
+    assert btc.event in s.queue
+    assert eth.event in s.queue
+    assert btc.event.time < eth.event.time
+
+def test_schedule_after_event_ran():
+    s = sched.scheduler(time.time, time.sleep)
+    state = MarketState(None)
+
+    state.schedule(s, 0, job, (s, state))
+    s.run()
+    assert len(s.queue) == 0
+
+    state.schedule(s, 300, job, (s, state))
+    assert s.queue == [ state.event ]
+
+def test_trigger_keeps_scheduled_poll():
+    s = sched.scheduler(time.time, time.sleep)
+    state = MarketState(None)
+
+    state.schedule(s, 300, job, (s, state))
+    state.trigger(s, job, (s, state))
+    state.trigger(s, job, (s, state))
+
+    # one triggered job at a time, the poll stays scheduled
+    assert len(s.queue) == 2
+    assert state.event in s.queue
+    assert state.trigger_event.time < state.event.time
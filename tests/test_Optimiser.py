@@ -0,0 +1,49 @@
+import pytest, pickle, sys
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.Backtest import Backtest
+from models.Optimiser import Optimiser
+
+space = { 'sellupperpcnt': [ None, 1, 5 ], 'buyobvpcnt': [ -10, -5 ], 'reversalbankmargin': [ 1, 3 ] }
+
+def test_grid_search(dummy_app, trading_data):
+    optimiser = Optimiser(dummy_app(), trading_data(prices='cycle'))
+    settings_list = optimiser.getGridSearch(space)
+    assert len(settings_list) == 12
+    assert { 'sellupperpcnt': 5, 'buyobvpcnt': -10, 'reversalbankmargin': 3 } in settings_list
+
+    assert len(optimiser.getRandomSearch(space, 5, seed=1)) == 5
+    assert len(optimiser.getRandomSearch(space, 50)) == 12
+
+def test_unknown_setting_error(dummy_app, trading_data):
+    optimiser = Optimiser(dummy_app(), trading_data(prices='cycle'))
+    with pytest.raises(KeyError):
+        optimiser.getGridSearch({ 'unknown': [ 1, 2 ] })
+
+def test_results_ranked_by_margin(dummy_app, trading_data):
+    optimiser = Optimiser(dummy_app(), trading_data(prices='cycle'))
+    results = optimiser.run(optimiser.getGridSearch(space), workers=1)
+    assert len(results) == 12
+    assert all(results['margin'].values[:-1] >= results['margin'].values[1:])
+
+    backtest = Backtest(dummy_app(), trading_data(prices='cycle'))
+    backtest.run(results.iloc[0][[ 'sellupperpcnt', 'buyobvpcnt', 'reversalbankmargin' ]].to_dict())
+    assert backtest.getSummary()['margin'] == results['margin'].iloc[0]
+
+def test_worker_processes_match(dummy_app, trading_data):
+    optimiser = Optimiser(dummy_app(), trading_data(prices='cycle'))
+    settings_list = optimiser.getGridSearch(space)
+    expected = optimiser.run(settings_list, workers=1).copy()
+    pd.testing.assert_frame_equal(optimiser.run(settings_list, workers=2), expected)
+
+def test_pickled_backtest_keeps_analysis(dummy_app, trading_data):
+    backtest = Backtest(dummy_app(), trading_data(prices='cycle'))
+    copy = pickle.loads(pickle.dumps(backtest))
+    assert copy.getSettings() == backtest.getSettings()
+    pd.testing.assert_frame_equal(copy.getDataFrame(), backtest.getDataFrame())
+
+    backtest.run({ 'sellupperpcnt': 1 })
+    copy.run({ 'sellupperpcnt': 1 })
+    assert copy.getSummary() == backtest.getSummary()
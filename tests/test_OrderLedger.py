@@ -0,0 +1,71 @@
+import pytest, sys
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.OrderLedger import OrderLedger
+from models.TradingAccount import TradingAccount
+
+def getOrders(actions, market='BTC-GBP', start='2021-03-01'):
+    return pd.DataFrame({
+        'created_at': pd.date_range(start, periods=len(actions), freq='H'),
+        'market': market,
+        'action': actions,
+        'type': 'market',
+        'size': [ 0.1 * (i + 1) for i in range(len(actions)) ],
+        'value': [ 100.0 * (i + 1) for i in range(len(actions)) ],
+        'status': 'done',
+        'price': [ 1000.0 ] * len(actions)
+    })
+
+def test_pairs_first_buy_and_sell_of_runs():
+    ledger = OrderLedger(':memory:')
+    orders = pd.concat([ getOrders([ 'sell', 'buy', 'buy', 'sell', 'sell', 'buy', 'sell', 'buy' ]),
+        getOrders([ 'buy', 'sell' ], 'ETH-GBP') ], ignore_index=True)
+
+    assert ledger.addOrders('coinbasepro', orders) == 10
+    assert ledger.addOrders('coinbasepro', orders) == 0
+
+    trades = ledger.pairOrders('coinbasepro')
+    assert list(trades.columns) == [ 'status', 'market', 'buy_at', 'buy_type', 'buy_size', 'buy_value', 'buy_price',
+        'sell_at', 'sell_type', 'sell_size', 'sell_value', 'sell_price' ]
+    assert list(trades['market']) == [ 'BTC-GBP', 'BTC-GBP', 'ETH-GBP' ]
+    assert list(trades['buy_value']) == [ 200.0, 600.0, 100.0 ]
+    assert list(trades['sell_value']) == [ 400.0, 700.0, 200.0 ]
+    assert trades['buy_at'].iloc[0] == pd.Timestamp('2021-03-01 01:00:00')
+
+    # only the orders after the last paired sell are left to pair
+    assert len(ledger.pairOrders('coinbasepro')) == 0
+
+def test_incremental_pairing_matches_full():
+    actions = [ 'buy', 'buy', 'sell', 'buy', 'sell', 'sell', 'buy', 'buy', 'sell', 'buy' ]
+    orders = getOrders(actions)
+
+    full = OrderLedger(':memory:')
+    full.addOrders('binance', orders)
+    full.pairOrders('binance')
+
+    ledger = OrderLedger(':memory:')
+    for i in range(len(orders)):
+        ledger.addOrders('binance', orders.iloc[:i + 1])
+        ledger.pairOrders('binance', 'BTC-GBP')
+
+    pd.testing.assert_frame_equal(ledger.getTrades('binance'), full.getTrades('binance'))
+    assert ledger.getLastOrderTime('binance', 'BTC-GBP') == orders['created_at'].iloc[-1]
+    assert ledger.getLastOrderTime('binance', 'ETH-GBP') is None
+
+def test_tracker_appends_new_trades(tmp_path, dummy_app):
+    account = TradingAccount(dummy_app())
+    save_file = str(tmp_path / 'tracker.csv')
+
+    account.orders = getOrders([ 'buy', 'sell', 'buy' ])
+    account.saveTrackerCSV(save_file=save_file)
+    assert len(pd.read_csv(save_file)) == 1
+
+    account.orders = getOrders([ 'buy', 'sell', 'buy', 'sell' ])
+    account.saveTrackerCSV(save_file=save_file)
+    tracker = pd.read_csv(save_file)
+    assert list(tracker['sell_value']) == [ 200.0, 400.0 ]
+    assert list(tracker.columns)[-2:] == [ 'profit', 'margin' ]
+
+    assert account.saveTrackerCSV(save_file=save_file) == False
@@ -0,0 +1,60 @@
+import pytest, sys
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.PaperTrading import PaperTradingEngine, PercentageFee, PercentageSlippage
+from models.TradingAccount import TradingAccount
+
+def test_buy_and_sell_less_fees():
+    engine = PaperTradingEngine({ 'GBP': 1000, 'BTC': 0 })
+
+    engine.buy('BTC-GBP', 'BTC', 'GBP', 1000, 30000)
+    assert engine.getBalance('GBP') == 0
+    assert engine.getBalance('BTC') == pytest.approx(995 / 30000)
+
+    order = engine.sell('BTC-GBP', 'BTC', 'GBP', 0.0331, 35000)
+    assert order.size == pytest.approx(0.0331 * 0.995)
+    assert engine.getBalance('GBP') == pytest.approx(1152.7075)
+
+    with pytest.raises(Exception) as execinfo:
+        engine.sell('BTC-GBP', 'BTC', 'GBP', 1, 35000)
+    assert str(execinfo.value) == 'Insufficient funds.'
+
+def test_fee_and_slippage_models():
+    engine = PaperTradingEngine({ 'GBP': 1000 }, PercentageFee(0), PercentageSlippage(0.01))
+
+    order = engine.buy('BTC-GBP', 'BTC', 'GBP', 1000, 20000)
+    assert order.price == pytest.approx(20200)
+    assert order.value == 1000
+
+    order = engine.sell('BTC-GBP', 'BTC', 'GBP', 0.01, 20000)
+    assert order.price == pytest.approx(19800)
+
+    with pytest.raises(ValueError):
+        PercentageFee(1)
+
+def test_orders_exported_on_request():
+    engine = PaperTradingEngine({ 'GBP': 1000, 'ETH': 10 })
+    engine.buy('BTC-GBP', 'BTC', 'GBP', 500, 30000, pd.Timestamp('2021-03-01 01:00'))
+    engine.sell('ETH-GBP', 'ETH', 'GBP', 5, 1500, pd.Timestamp('2021-03-01 02:00'))
+
+    orders = engine.getOrders()
+    assert list(orders.columns) == [ 'created_at', 'market', 'action', 'type', 'size', 'value', 'status', 'price' ]
+    assert list(orders['action']) == [ 'buy', 'sell' ]
+    assert len(engine.getOrders('ETH-GBP')) == 1
+    assert len(engine.getOrders(iso8601start='2021-03-01T01:30:00')) == 1
+
+    # the orders survive a round trip, as the tracker tests rely on
+    engine.setOrders(orders)
+    pd.testing.assert_frame_equal(engine.getOrders(), orders)
+
+def test_trading_account_test_mode(dummy_app):
+    account = TradingAccount(dummy_app())
+    assert account.getBalance('GBP') == 1000
+
+    account.buy('BTC', 'GBP', 1000, 30000)
+    account.sell('BTC', 'GBP', 0.0331, 35000)
+    assert account.getBalance('GBP') == 1152.7
+    assert list(account.getBalance()['currency']) == [ 'GBP', 'BTC' ]
+    assert len(account.getOrders('BTC-GBP')) == 2
@@ -0,0 +1,76 @@
+import pytest, sys, threading, time
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.RequestScheduler import RequestScheduler, getEndpoint
+
+def test_endpoints():
+    assert getEndpoint('binance', 'post', 'https://api.binance.com/api/v3/order') == ('order', 1)
+    assert getEndpoint('binance', 'get', 'https://api.binance.com/api/v3/account?timestamp=1') == ('account', 20)
+    assert getEndpoint('binance', 'get', 'https://api.binance.com/api/v3/klines?symbol=BTCGBP&interval=1h') == ('market', 2)
+    assert getEndpoint('coinbasepro', 'DELETE', 'https://api.pro.coinbase.com/orders') == ('order', 1)
+    assert getEndpoint('coinbasepro', 'GET', 'https://api.pro.coinbase.com/accounts') == ('account', 1)
+    assert getEndpoint('coinbasepro', 'GET', 'https://api.pro.coinbase.com/products/BTC-GBP/candles?granularity=3600') == ('market', 1)
+
+    with pytest.raises(ValueError):
+        getEndpoint('kraken', 'GET', 'https://api.kraken.com/0/public/Ticker')
+
+def test_requests_throttled():
+    scheduler = RequestScheduler({ 'coinbasepro': { 'public': ('bucket', 2, 0.2), 'private': ('bucket', 2, 0.2) } })
+
+    start = time.time()
+    for i in range(4):
+        scheduler.acquire('coinbasepro', 'market')
+    elapsed = time.time() - start
+
+    # a burst of 2, then 10 requests a second
+    assert elapsed >= 0.15
+    stats = scheduler.getStats('coinbasepro')
+    assert (stats['requests'], stats['throttled']) == (4, 2)
+
+def test_orders_before_market_data():
+    scheduler = RequestScheduler({ 'coinbasepro': { 'public': ('bucket', 10, 1), 'private': ('bucket', 1, 0.3) } })
+    sent = []
+
+    def placeOrder():
+        scheduler.acquire('coinbasepro', 'order')
+        sent.append('order')
+
+    scheduler.acquire('coinbasepro', 'order')
+    thread = threading.Thread(target=placeOrder)
+    thread.start()
+    time.sleep(0.05)
+
+    # market data waits for the order, though its own limit is not used up
+    scheduler.acquire('coinbasepro', 'market')
+    sent.append('market')
+    thread.join()
+
+    assert sent == [ 'order', 'market' ]
+
+def test_responses_counted():
+    scheduler = RequestScheduler(backoff=0.2)
+
+    scheduler.acquire('binance', 'market', 2)
+    scheduler.update('binance', 200, { 'X-MBX-USED-WEIGHT-1M': '300' })
+    assert scheduler.getStats('binance')['used_weight'] == 300
+
+    # rate limit responses pause the requests of the exchange
+    scheduler.update('binance', 429, {})
+    start = time.time()
+    scheduler.acquire('binance', 'market', 2)
+    assert time.time() - start >= 0.15
+    assert scheduler.getStats('binance')['limited'] == 1
+    assert scheduler.getStats('coinbasepro')['requests'] == 0
+
+def test_share_of_limits():
+    scheduler = RequestScheduler({ 'coinbasepro': { 'public': ('bucket', 6, 0.3), 'private': ('bucket', 10, 2) } })
+    # two bots on one IP, E.g. from --ratelimitshare 0.5
+    scheduler.setShare(0.5)
+
+    for i in range(4):
+        scheduler.acquire('coinbasepro', 'market')
+    assert scheduler.getStats('coinbasepro')['throttled'] == 1
+
+    with pytest.raises(ValueError):
+        scheduler.setShare(0)
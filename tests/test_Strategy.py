@@ -0,0 +1,52 @@
+import pytest, sys
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.Strategy import Strategy
+
+def getSignalData():
+    tsidx = pd.date_range('2021-01-01', periods=4, freq='H', name='ts')
+    return pd.DataFrame({
+        'close': [ 100.0, 101.0, 102.0, 103.0 ],
+        'ema12gtema26co': [ True, True, False, False ],
+        'macdgtsignal': [ True, True, False, False ],
+        'goldencross': [ True, True, True, False ],
+        'obv_pc': [ 1.0, -6.0, -1.0, np.nan ],
+        'eri_buy': [ True, True, False, False ],
+        'ema12ltema26co': [ False, False, True, True ],
+        'macdltsignal': [ False, False, True, True ]
+    }, index=tsidx)
+
+def test_signals():
+    signals = Strategy().getSignals(getSignalData())
+    assert list(signals['buy']) == [ True, False, False, False ]
+    assert list(signals['sell']) == [ False, False, True, True ]
+    assert list(signals['reversal']) == [ False, False, True, False ]
+
+    signals = Strategy(settings={ 'buyobvpcnt': -10 }).getSignals(getSignalData())
+    assert list(signals['buy']) == [ True, True, False, False ]
+
+def test_actions():
+    strategy = Strategy()
+    assert strategy.getAction(True, False, False, 100) == ('BUY', [])
+    assert strategy.getAction(True, False, False, 100, 'BUY', 100) == ('WAIT', [])
+    # a sell signal needs an open position
+    assert strategy.getAction(False, True, False, 100) == ('WAIT', [])
+    assert strategy.getAction(False, True, False, 100, 'BUY', 100) == ('SELL', [])
+
+def test_failsafes():
+    assert Strategy(settings={ 'sellupperpcnt': 5 }).getAction(False, False, False, 106, 'BUY', 100) == ('SELL', [ 'upper_pcnt' ])
+    assert Strategy(settings={ 'selllowerpcnt': -2 }).getAction(False, False, False, 97, 'BUY', 100) == ('SELL', [ 'lower_pcnt' ])
+    assert Strategy().getAction(False, False, False, 95, 'BUY', 100, fib_low=96, fib_high=110) == ('SELL', [ 'fibonacci_loss' ])
+    assert Strategy().getAction(False, False, True, 110, 'BUY', 100) == ('SELL', [ 'reversal_bank' ])
+
+    smart_switched = Strategy(settings={ 'smartswitch': 1, 'exchange': 'coinbasepro', 'granularity': 900 })
+    assert smart_switched.getAction(False, False, False, 102, 'BUY', 100) == ('SELL', [ 'smart_switch_bank' ])
+
+    # no sell at a loss overrides a sell signal
+    assert Strategy(settings={ 'sellatloss': 0 }).getAction(False, True, False, 99, 'BUY', 100) == ('WAIT', [ 'no_sell_at_loss' ])
+
+    with pytest.raises(KeyError):
+        Strategy(settings={ 'unknown': 1 })
@@ -0,0 +1,113 @@
+import pytest, sys
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.Trading import TechnicalAnalysis, IncrementalTechnicalAnalysis
+
+def getAnalysis(data):
+    ta = TechnicalAnalysis(data.copy())
+    ta.addAll()
+    return ta.getDataFrame()
+
+def test_incremental_load_matches_addAll(trading_data):
+    data = trading_data()
+    ita = IncrementalTechnicalAnalysis(data.copy())
+    pd.testing.assert_frame_equal(ita.getDataFrame(), getAnalysis(data), check_exact=True, check_freq=False)
+
+def test_incremental_update_matches_addAll(trading_data):
+    data = trading_data(260)
+    # a flat run exercises the constant series handling of the rolling windows
+    data.loc[data.index[220:245], ['low', 'high', 'open', 'close']] = data['close'].iloc[220]
+
+    ita = IncrementalTechnicalAnalysis(data.iloc[:210].copy())
+    for i in range(210, len(data)):
+        # the forming candle is revised until it closes
+        candle = data.iloc[[i]].copy()
+        candle['close'] = candle['close'] * 1.01
+        ita.update(candle)
+        ita.update(data.iloc[[i]])
+
+    expected = getAnalysis(data)
+    pd.testing.assert_frame_equal(ita.getDataFrame(), expected, check_exact=True, check_freq=False)
+    assert ita.getLastRow()['ema12'] == expected['ema12'].iloc[-1]
+
+def test_incremental_update_older_candle_error(trading_data):
+    data = trading_data()
+    ita = IncrementalTechnicalAnalysis(data.copy())
+    with pytest.raises(ValueError):
+        ita.update(data.iloc[[100]])
+
+def test_candlestick_patterns(trading_data):
+    data = trading_data()
+    # last candle is a doji
+    data.loc[data.index[-1], ['open', 'close', 'high', 'low']] = [ 100.0, 100.0, 110.0, 90.0 ]
+
+    ta = TechnicalAnalysis(data)
+    patterns = ta.candlestickPatterns()
+    assert len(patterns.columns) == 16
+    assert all(patterns.dtypes == bool)
+    assert bool(patterns['doji'].iloc[-1]) == True
+    assert (ta.candleHammer().values == patterns['hammer'].values).all()
+
+def test_candlestick_patterns_detected_once(trading_data):
+    ta = TechnicalAnalysis(trading_data())
+    calculate = ta.calculateCandlestickPatterns
+    calls = []
+    ta.calculateCandlestickPatterns = lambda *ohlc: calls.append(1) or calculate(*ohlc)
+
+    ta.addCandleHammer()
+    ta.addCandleDoji()
+    ta.addCandleAstralSell()
+    assert len(calls) == 1
+
+    # changed candles are detected again
+    ta.df.loc[ta.df.index[-1], ['open', 'close', 'high', 'low']] = [ 100.0, 100.0, 110.0, 90.0 ]
+    assert bool(ta.candleDoji().iloc[-1]) == True
+    assert len(calls) == 2
+
+def test_require_adds_dependencies_only(trading_data):
+    ta = TechnicalAnalysis(trading_data())
+    ta.require('macdgtsignal')
+    df = ta.getDataFrame()
+    for column in [ 'ema12', 'ema26', 'macd', 'signal', 'macdgtsignal', 'macdltsignalco' ]:
+        assert column in df.columns
+    for column in [ 'rsi14', 'cma', 'sma20', 'fbb_mid', 'hammer' ]:
+        assert column not in df.columns
+
+def test_getitem_adds_indicator(trading_data):
+    ta = TechnicalAnalysis(trading_data())
+    assert (ta['eri_buy'].values == getAnalysis(trading_data())['eri_buy'].values).all()
+    assert 'ema13' in ta.getDataFrame().columns
+
+    with pytest.raises(KeyError):
+        ta.require('unknown')
+
+def test_addAll_after_require(trading_data):
+    data = trading_data()
+    ta = TechnicalAnalysis(data.copy())
+    ta.require('obv_pc', 'goldencross', 'hammer')
+    ta.addAll()
+    pd.testing.assert_frame_equal(ta.getDataFrame(), getAnalysis(data))
+
+def test_support_resistance_levels(trading_data):
+    data = trading_data(12)
+    data['low'] = [ 10, 9, 8, 7, 8, 9, 7.5, 7, 6.5, 7, 8, 9 ]
+    data['high'] = data['low'] + 2
+
+    levels = TechnicalAnalysis(data.copy()).getSupportResistanceLevels()
+    # the support at 6.5 is within the mean candle range of the support at 7
+    assert list(levels.index) == [ data.index[3], data.index[5] ]
+    assert list(levels.values) == [ 7, 11 ]
+
+def test_incremental_support_resistance_levels(trading_data):
+    data = trading_data(400)
+    ita = IncrementalTechnicalAnalysis(data.iloc[:300].copy())
+    for i in range(300, len(data)):
+        # the forming candle is revised until it closes
+        candle = data.iloc[[i]].copy()
+        candle['low'] = candle['low'] * 0.99
+        ita.update(candle)
+        ita.update(data.iloc[[i]])
+
+    pd.testing.assert_series_equal(ita.getSupportResistanceLevels(), TechnicalAnalysis(data.copy()).getSupportResistanceLevels())
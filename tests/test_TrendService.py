@@ -0,0 +1,50 @@
+import pytest, sys
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+# pylint: disable=import-error
+import models.TrendService
+from models.TrendService import TrendService
+
+def getHistory(market, granularity):
+    tsidx = pd.date_range('2021-01-01', periods=300, freq='H', name='ts')
+    # rising for the 1h timeframe, falling for the 6h timeframe
+    close = np.linspace(100, 200, 300) if granularity in [ 3600, '1h' ] else np.linspace(200, 100, 300)
+    return pd.DataFrame({ 'date': tsidx, 'market': market, 'granularity': granularity,
+        'low': close, 'high': close, 'open': close, 'close': close, 'volume': 1.0 }, index=tsidx)
+
+def test_trends(dummy_app):
+    service = TrendService(dummy_app(history=getHistory))
+    assert service.getTrend('1h') == { 'ema1226_bull': True, 'ema1226_bear': False, 'sma50200_bull': True, 'sma50200_bear': False }
+    assert service.getTrend('6h') == { 'ema1226_bull': False, 'ema1226_bear': True, 'sma50200_bull': False, 'sma50200_bear': True }
+
+def test_invalid_timeframe_error(dummy_app):
+    with pytest.raises(ValueError):
+        TrendService(dummy_app(history=getHistory)).getTrend('15m')
+
+def test_trend_cached_until_next_candle(monkeypatch, dummy_app):
+    app = dummy_app('binance', history=getHistory)
+    service = TrendService(app)
+
+    monkeypatch.setattr(models.TrendService.time, 'time', lambda: 7200.0)
+    service.getTrend('1h')
+    service.getTrend('1h')
+    service.getTrend('6h')
+    assert app.requests == [ '1h', '6h' ]
+
+    monkeypatch.setattr(models.TrendService.time, 'time', lambda: 10800.0)
+    service.getTrend('1h')
+    service.getTrend('6h')
+    assert app.requests == [ '1h', '6h', '1h' ]
+
+def test_set_trend_data_caches(monkeypatch, dummy_app):
+    app = dummy_app(history=getHistory)
+    service = TrendService(app)
+
+    monkeypatch.setattr(models.TrendService.time, 'time', lambda: 7200.0)
+    assert service.isCached('1h') == False
+    trend = service.setTrendData('1h', app.getHistoricalData('BTC-GBP', 3600))
+    assert service.isCached('1h') == True
+    assert service.getTrend('1h') == trend
+    assert app.requests == [ 3600 ]
@@ -0,0 +1,62 @@
+import pytest, pickle, sys
+
+sys.path.append('.')
+# pylint: disable=import-error
+from models.Backtest import Backtest
+from models.CandleArchive import CandleArchive
+from models.WalkForward import WalkForward
+
+def test_windows(dummy_app, trading_data):
+    walkforward = WalkForward(dummy_app(), trading_data(600, prices='cycle'), 300)
+
+    windows = walkforward.getRandomWindows(50, seed=1)
+    assert len(windows) == 50
+    assert windows == walkforward.getRandomWindows(50, seed=1)
+    assert all(start >= 0 and end - start == 300 and end <= 600 for start, end in windows)
+
+    windows = walkforward.getRollingWindows(100)
+    assert windows == [ (0, 300), (100, 400), (200, 500), (300, 600) ]
+
+    with pytest.raises(ValueError):
+        WalkForward(dummy_app(), trading_data(200, prices='cycle'), 300)
+
+def test_run_matches_window_backtests(dummy_app, trading_data):
+    data = trading_data(600, prices='cycle')
+    walkforward = WalkForward(dummy_app(), data, 300)
+    windows = walkforward.getRollingWindows(150)
+
+    results = walkforward.run(windows, workers=1)
+    assert len(results) == 3
+
+    for i, (start, end) in enumerate(windows):
+        backtest = Backtest(dummy_app(), data.iloc[start:end])
+        backtest.run()
+        assert results['margin'][i] == backtest.getSummary()['margin']
+        assert results['start'][i] == data.index[start]
+
+    assert 'win_rate' in walkforward.getDistribution()
+
+    with pytest.raises(KeyError):
+        walkforward.run(windows, { 'unknown': 1 }, workers=1)
+
+def test_run_in_worker_processes(dummy_app, trading_data):
+    walkforward = WalkForward(dummy_app(), trading_data(600, prices='cycle'), 300)
+    windows = walkforward.getRandomWindows(8, seed=2)
+
+    in_process = walkforward.run(windows, workers=1).copy()
+    assert walkforward.run(windows, workers=2).equals(in_process)
+
+def test_run_from_archive(tmp_path, dummy_app, trading_data):
+    data = trading_data(600, prices='cycle')
+    archive = CandleArchive(str(tmp_path))
+    archive.append('coinbasepro', 'BTC-GBP', 3600, data)
+
+    history = archive.getSlice('coinbasepro', 'BTC-GBP', 3600, limit=500)
+    # the worker processes receive where the candles are archived, not the candles
+    assert len(pickle.dumps(history)) < 500
+    assert list(pickle.loads(pickle.dumps(history)).index) == list(data.index[100:])
+
+    walkforward = WalkForward(dummy_app(), history, 300)
+    windows = walkforward.getRollingWindows(100)
+    expected = WalkForward(dummy_app(), data.iloc[100:], 300).run(windows, workers=1).copy()
+    assert walkforward.run(windows, workers=2).equals(expected)
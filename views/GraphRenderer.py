@@ -0,0 +1,194 @@
+"""Renders graph snapshots in the background, so trading never waits on Matplotlib"""
+
+import atexit, logging, multiprocessing, queue, threading
+import numpy as np
+import pandas as pd
+
+class EMAandMACDChart():
+    """Price, EMA12, EMA26 and MACD, as TradingGraphs.renderEMAandMACD()"""
+
+    columns = [ 'market', 'granularity', 'close', 'ema12', 'ema26', 'macd', 'signal' ]
+
+    def __init__(self):
+        # the figure is created once and only its data changes between snapshots
+        import matplotlib.style as mplstyle
+        import matplotlib.ticker as ticker
+        from matplotlib.figure import Figure
+
+        styles = [ style for style in [ 'seaborn', 'seaborn-v0_8' ] if style in mplstyle.available ]
+
+        with mplstyle.context(styles[:1]):
+            self.fig = Figure(figsize=(12, 6))
+            self.ax1, self.ax2 = self.fig.subplots(nrows=2)
+            self.title = self.fig.suptitle('', fontsize=16)
+
+            self.dates = []
+            for ax in [ self.ax1, self.ax2 ]:
+                ax.xaxis.set_major_formatter(ticker.FuncFormatter(self.__formatDate))
+
+            self.lines = {}
+            for column, color in [ ('close', 'royalblue'), ('ema12', 'orange'), ('ema26', 'purple') ]:
+                self.lines[column], = self.ax1.plot([], [], label='price' if column == 'close' else column, color=color)
+            self.ax1.set_title('Price, EMA12 and EMA26')
+            self.ax1.set_ylabel('Price')
+            self.ax1.legend()
+
+            for column in [ 'macd', 'signal' ]:
+                self.lines[column], = self.ax2.plot([], [], label=column)
+            self.ax2.set_title('MACD')
+            self.ax2.set_ylabel('Divergence')
+            self.ax2.legend()
+
+    def render(self, df, filename):
+        """Saves the snapshot as a PNG"""
+
+        self.dates = pd.to_datetime(df.index).to_pydatetime()
+        self.title.set_text(str(df['market'].iloc[0]) + ' | ' + str(df['granularity'].iloc[0]))
+
+        indices = np.arange(len(df))
+        for column, line in self.lines.items():
+            line.set_data(indices, df[column].to_numpy())
+
+        for ax in [ self.ax1, self.ax2 ]:
+            ax.relim()
+            ax.autoscale_view()
+
+        self.fig.autofmt_xdate()
+        self.fig.savefig(filename)
+
+    def __formatDate(self, x, pos=None): #pylint: disable=unused-argument
+        """Labels a plot index with the date of the candle (private function)"""
+
+        if len(self.dates) == 0:
+            return ''
+
+        return self.dates[np.clip(int(x + 0.5), 0, len(self.dates) - 1)].strftime('%Y-%m-%d %H:%M:%S')
+
+# chart types a snapshot can be rendered as
+charts = { 'emamacd': EMAandMACDChart }
+
+def runRenderer(jobs, use_agg=True):
+    """Renders the snapshot jobs of the queue until it receives None"""
+
+    if use_agg:
+        import matplotlib
+        matplotlib.use('Agg')
+
+    templates = {}
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+
+        chart, df, filename = job
+        try:
+            if chart not in templates:
+                templates[chart] = charts[chart]()
+            templates[chart].render(df, filename)
+        except Exception as err:
+            logging.error('Unable to render ' + filename + ': ' + str(err))
+
+class GraphRenderer():
+    def __init__(self, max_jobs=20, use_process=True):
+        """Graph Renderer object model
+
+        Snapshots of the trading data are queued to a worker that renders them
+        with the Agg backend into a figure reused for each chart type. The
+        worker is a process where it can be forked, else a thread. A snapshot
+        is dropped when the queue is full rather than wait for the worker.
+
+        Parameters
+        ----------
+        max_jobs : int
+            Maximum snapshots waiting to be rendered
+        use_process : bool
+            Renders in a forked process, False renders in a thread
+        """
+
+        if not isinstance(max_jobs, int) or max_jobs < 1:
+            raise ValueError('Maximum jobs must be an integer of 1 or more.')
+
+        self.max_jobs = max_jobs
+        self.use_process = use_process and 'fork' in multiprocessing.get_all_start_methods()
+        self.jobs = None
+        self.worker = None
+        self.submitted = 0
+        self.dropped = 0
+
+        # the queued snapshots are rendered before the bot exits
+        atexit.register(self.stop)
+
+    def start(self):
+        """Starts the worker, before the bot starts other threads where possible"""
+
+        if self.worker != None:
+            return
+
+        if self.use_process:
+            # forked, the bot is not re-imported by the worker
+            context = multiprocessing.get_context('fork')
+            self.jobs = context.Queue(self.max_jobs)
+            self.worker = context.Process(target=runRenderer, args=(self.jobs,), daemon=True)
+        else:
+            self.jobs = queue.Queue(self.max_jobs)
+            self.worker = threading.Thread(target=runRenderer, args=(self.jobs, False), daemon=True)
+
+        self.worker.start()
+
+    def submit(self, chart, df, filename, period=0):
+        """Queues a snapshot to be rendered, returns False if it was dropped
+
+        Parameters
+        ----------
+        chart : str
+            Chart type, E.g. 'emamacd'
+        df : Pandas DataFrame
+            Trading data with the columns of the chart
+        filename : str
+            PNG file to save
+        period : int, optional
+            Renders the last rows, defaults to every row
+        """
+
+        if chart not in charts:
+            raise ValueError('Chart options: ' + ', '.join(charts.keys()))
+
+        if not isinstance(df, pd.DataFrame) or len(df) == 0:
+            raise TypeError('Snapshot is not a Pandas dataframe with rows.')
+
+        self.start()
+
+        snapshot = df[charts[chart].columns]
+        if period > 0:
+            snapshot = snapshot.iloc[-period:]
+
+        try:
+            # a copy, the trading data may change before the snapshot is sent
+            self.jobs.put_nowait((chart, snapshot.copy(), filename))
+        except queue.Full:
+            self.dropped += 1
+            logging.warning('Graph renderer busy, dropped: ' + filename)
+            return False
+
+        self.submitted += 1
+        return True
+
+    def stop(self, timeout=10):
+        """Renders the queued snapshots and stops the worker"""
+
+        if self.worker == None:
+            return
+
+        try:
+            self.jobs.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+
+        self.worker.join(timeout)
+        self.worker = None
+        self.jobs = None
+
+    def getStats(self):
+        """Returns the snapshots submitted and dropped"""
+
+        return { 'submitted': self.submitted, 'dropped': self.dropped }
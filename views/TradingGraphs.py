@@ -27,6 +27,9 @@ class TradingGraphs():
 
         self.technical_analysis = technical_analysis
 
+        # graphs can render any indicator, add those not yet added
+        technical_analysis.addAll()
+
         # stores the pandas dataframe from technical_analysis object
         self.df = technical_analysis.getDataFrame()
 
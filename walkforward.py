@@ -0,0 +1,39 @@
+"""Backtests the trading strategy over many windows of the stored candle history"""
+
+import argparse, sys
+
+# walk forward arguments, the remaining arguments configure the bot
+parser = argparse.ArgumentParser(description='Python Crypto Bot walk forward backtest')
+parser.add_argument('--windows', type=int, default=200, help='random windows backtested')
+parser.add_argument('--rolling', type=int, help='candles between rolling windows, instead of random windows')
+parser.add_argument('--window', type=int, default=300, help='candles of a window')
+parser.add_argument('--candles', type=int, default=5000, help='stored candles the windows are taken from')
+parser.add_argument('--archive', type=str, help='candle archive directory backtested instead of the candle store')
+parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of CPUs')
+parser.add_argument('--seed', type=int, help='seed of the random windows')
+args, sys.argv[1:] = parser.parse_known_args()
+
+from models.CandleArchive import CandleArchive
+from models.PyCryptoBot import PyCryptoBot
+from models.WalkForward import WalkForward
+
+if __name__ == '__main__':
+    app = PyCryptoBot()
+
+    if args.archive != None:
+        # the windows are read from the archive, it is not loaded
+        trading_data = CandleArchive(args.archive).getSlice(app.getExchange(), app.getMarket(), app.getGranularity(), limit=args.candles)
+    else:
+        trading_data = app.getCandleHistory(app.getMarket(), app.getGranularity(), args.candles)
+
+    print ('Backtesting', app.getMarket(), str(app.getGranularity()), 'from', str(trading_data.index[0]), 'to', str(trading_data.index[-1]))
+
+    walkforward = WalkForward(app, trading_data, args.window)
+
+    if args.rolling != None:
+        windows = walkforward.getRollingWindows(args.rolling)
+    else:
+        windows = walkforward.getRandomWindows(args.windows, args.seed)
+
+    walkforward.run(windows, workers=args.workers)
+    walkforward.printSummary()